@@ -38,6 +38,8 @@ try:
             "--add-data", f"{ROOT / 'data' / 'redeem_codes.json'};data",
             "--add-data", f"{BUILD_ENV};config",    # inlude build.env in the bundle, so the bundled app can read its config (BUILD_CONDITION and MESSAGE_TYPE) at runtime from the same file used in dev
             "--collect-all", "pygame",              # include nel budled tutto il package pygame, Pyinstaller non lo fa in automatico
+            "--hidden-import", "core.slot_logic",   # gli engine sono importati a runtime da core/engines.py (importlib): PyInstaller non li vede
+            "--hidden-import", "core.reel_strip",
             str(ROOT / "main.py"),                  # entry point script
         ], check=True, cwd=ROOT) 
         # *args -> [...list]
@@ -0,0 +1,66 @@
+"""
+Walker/Vose alias tables for O(1) sampling from a fixed discrete distribution.
+
+Building the table is O(n); each draw then costs one uniform index and one
+uniform float, whatever the number of outcomes or how skewed the weights are.
+Used by the reel-strip engine (one table per reel) and by the empirical bet
+sampler.
+"""
+
+import random
+from typing import Sequence
+
+import numpy as np
+
+
+class AliasTable:
+    """Alias table over the outcomes 0..n-1 with the given (unnormalized) weights.
+
+    Args:
+        weights: Non-negative weights, at least one positive.
+
+    Raises:
+        ValueError: Empty weights, negative weights or all weights zero.
+    """
+
+    def __init__(self, weights: Sequence[float]) -> None:
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.ndim != 1 or len(weights) == 0:
+            raise ValueError("weights must be a non-empty 1-D sequence")
+        if (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError("weights must be non-negative with a positive sum")
+
+        n = len(weights)
+        scaled = weights * n / weights.sum()
+        prob = np.ones(n, dtype=np.float64)
+        alias = np.arange(n, dtype=np.int64)
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        # Vose: ogni colonna "piccola" viene completata con la massa di una colonna "grande"
+        while small and large:
+            low, high = small.pop(), large.pop()
+            prob[low] = scaled[low]
+            alias[low] = high
+            scaled[high] -= 1.0 - scaled[low]
+            (small if scaled[high] < 1.0 else large).append(high)
+        # residui numerici: le colonne rimaste valgono 1 (prob e alias già inizializzati)
+
+        self.probabilities = weights / weights.sum()
+        self._prob = prob
+        self._alias = alias
+        self._prob_list = prob.tolist()
+        self._alias_list = alias.tolist()
+
+    def __len__(self) -> int:
+        return len(self._prob)
+
+    def draw(self, rng: random.Random = random) -> int:
+        """Single draw with a `random`-style RNG (module random or random.Random(seed))."""
+        column = rng.randrange(len(self._prob_list))
+        return column if rng.random() < self._prob_list[column] else self._alias_list[column]
+
+    def sample(self, rng: np.random.Generator, size) -> np.ndarray:
+        """Vectorized draws with a NumPy Generator; returns int64 outcomes of the given shape."""
+        columns = rng.integers(0, len(self._prob), size=size)
+        keep = rng.random(size=size) < self._prob[columns]
+        return np.where(keep, columns, self._alias[columns])
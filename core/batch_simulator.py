@@ -0,0 +1,214 @@
+"""
+Vectorized batch simulator for the deterministic reward pipeline.
+
+Runs `calculate_reward` + `calculate_multiplier` for N sessions at once.
+The budget of bet k depends on the outcome of bet k-1, so the 60-bet axis is
+walked once, and every step is a handful of NumPy operations over all N
+sessions instead of N scalar Python calls.
+
+Mirrors SessionEngine in core/slot_logic.py exactly: both read the same
+compiled schedules (core/schedule.py) and keep budgets in integer cents with the
+same rounding as the original float engine (see core/money.py), without printing
+and without any GUI import.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from core.constants import INITIAL_BUDGET, VALID_CONDITIONS
+from core.money import CENTS_PER_UNIT, to_cents
+from core.schedule import RULE_LOSS, RULE_RECOVER, RULE_INCREASE, RULE_DECREASE, SCHEDULES
+from core.slot_logic import MULTIPLIER_KEYS
+
+# Ordine delle condition nelle tabelle: indice 0 = EQUAL, 1 = WIN, 2 = LOSE
+CONDITION_CODES = {"EQUAL": 0, "WIN": 1, "LOSE": 2}
+
+_MUL_KEYS = np.array(MULTIPLIER_KEYS, dtype=np.float64)
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """Per-session arrays produced by simulate_batch.
+
+    Attributes:
+        rewards_cents: [N, T] int64 reward of each bet in cents (0 on a loss), bet already deducted.
+        multipliers: [N, T] multiplier used for each bet (0 on a loss).
+        budgets_cents: [N, T + 1] int64 coin balance in cents before bet 1 and after every bet.
+    """
+
+    rewards_cents: np.ndarray
+    multipliers: np.ndarray
+    budgets_cents: np.ndarray
+
+
+def to_cents_array(amounts) -> np.ndarray:
+    """Vectorized to_cents: importi in coin -> centesimi int64."""
+    return np.rint(np.asarray(amounts, dtype=np.float64) * CENTS_PER_UNIT).astype(np.int64)
+
+
+def _round_coins(amounts: np.ndarray) -> np.ndarray:
+    """Vectorized round_coins: round(amount, 2) di Python (esatto, half-even sul valore del float) in centesimi int64.
+
+    np.rint(amount * 100) sbaglia vicino a mezzo centesimo, dove decide il valore esatto del
+    float (0.425 * ... -> 0.42500000000000004 -> 0.43). amount * 100 viene quindi calcolato senza
+    errore come somma di due float (split di Veltkamp) e confrontato con il mezzo centesimo.
+    """
+    split = amounts * 134217729.0  # 2**27 + 1
+    high = split - (split - amounts)
+    low = amounts - high
+    high, low = high * CENTS_PER_UNIT, low * CENTS_PER_UNIT  # prodotti esatti: high + low == amount * 100
+    lower = np.floor(high + low)
+    # segno di (amount * 100 - (lower + 0.5)): la somma arrotondata conserva il segno di quella esatta
+    above = (high - (lower + 0.5)) + low
+    up = (above > 0) | ((above == 0) & (lower % 2 == 1))
+    return (lower + up).astype(np.int64)
+
+
+def _coins(cents: np.ndarray) -> np.ndarray:
+    """Vectorized from_cents."""
+    return cents / CENTS_PER_UNIT
+
+
+def _percent_of_cents(percentages: np.ndarray, cents: np.ndarray, plus_cents=0) -> np.ndarray:
+    """Vectorized percent_of_cents."""
+    return _round_coins(percentages * _coins(cents) + _coins(np.asarray(plus_cents)))
+
+
+def _multiply_cents(cents: np.ndarray, multipliers: np.ndarray) -> np.ndarray:
+    """Vectorized multiply_cents."""
+    return _round_coins(_coins(cents) * multipliers)
+
+
+def stack_schedules(schedules: dict) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Impila gli schedule compilati (condition -> CompiledSchedule) in array [3, T + 1]: regole, percentuali, fase per bet."""
+    ordered = [schedules[condition] for condition in CONDITION_CODES]
+    if any(schedule.layout != ordered[0].layout for schedule in ordered):
+        raise ValueError("All condition schedules must share the same phase layout")
+    rules = np.array([schedule.rules for schedule in ordered], dtype=np.int8)
+    percentages = np.array([schedule.percentages for schedule in ordered], dtype=np.float64)
+    phases = np.array(ordered[0].phases, dtype=np.int8)  # il layout delle fasi è comune a tutte le condition
+    return rules, percentages, phases
+
+
+_TABLES = stack_schedules(SCHEDULES)
+
+
+def lookup_multipliers(ideal_multipliers: np.ndarray) -> np.ndarray:
+    """Floor lookup of whole arrays of ideal multipliers in MULTIPLIER_KEYS (np.searchsorted).
+
+    Same semantics as calculate_multiplier: largest key <= ideal, minimum key as fallback.
+    """
+    index = np.searchsorted(_MUL_KEYS, ideal_multipliers, side="right") - 1
+    return _MUL_KEYS[np.maximum(index, 0)]
+
+
+def calculate_multipliers(expected_rewards: np.ndarray, bets: np.ndarray) -> np.ndarray:
+    """Vectorized calculate_multiplier (importi in centesimi, rapporto calcolato in coin)."""
+    return lookup_multipliers(np.round(_coins(expected_rewards) / _coins(bets), 0))
+
+
+def encode_conditions(conditions, n_sessions: int) -> np.ndarray:
+    """Converte condition ("E"/"EQUAL", ...) in codici interi [N]; una stringa singola vale per tutte le sessioni."""
+    if isinstance(conditions, str):
+        conditions = [conditions] * n_sessions
+    codes = []
+    for condition in conditions:
+        name = VALID_CONDITIONS.get(condition.upper(), condition.upper())
+        if name not in CONDITION_CODES:
+            raise ValueError(f"Invalid condition: {condition}")
+        codes.append(CONDITION_CODES[name])
+    if len(codes) != n_sessions:
+        raise ValueError(f"Expected {n_sessions} conditions, got {len(codes)}")
+    return np.asarray(codes, dtype=np.int8)
+
+
+def simulate_batch(conditions, bets_cents, schedules: dict = None, first_bet: int = 1) -> BatchResult:
+    """Simulate N independent sessions of the deterministic reward pipeline.
+
+    Bets are assumed valid (0 < bet <= coins), as enforced by the GUI before each spin.
+
+    Args:
+        conditions: One condition per session ("EQUAL"/"WIN"/"LOSE" or "E"/"W"/"L"),
+            or a single condition applied to every session.
+        bets_cents: [N, T] integer bet amounts in cents; column j is bet number first_bet + j,
+            up to TOTAL_SESSION_BETS. Use to_cents_array() to convert amounts in coins.
+        schedules: Optional condition -> CompiledSchedule overrides (see core.schedule.compile_schedule);
+            defaults to the schedules compiled from core/constants.py.
+        first_bet: Bet number of the first column. The sessions start from INITIAL_BUDGET at that
+            bet, like a SessionEngine whose first call is for bet first_bet (e.g. logged sessions
+            started in the middle of the schedule).
+
+    Returns:
+        BatchResult with per-session rewards, multipliers and budget trajectories.
+    """
+    rule_table, percentage_table, phase_of_bet = _TABLES if schedules is None else stack_schedules(schedules)
+    bets = np.asarray(bets_cents)
+    if not np.issubdtype(bets.dtype, np.integer):
+        raise TypeError(f"bets_cents must be an integer array of cents, got {bets.dtype}")
+    bets = bets.astype(np.int64, copy=False)
+    max_bets = rule_table.shape[1] - first_bet
+    if not 1 <= first_bet < rule_table.shape[1]:
+        raise ValueError(f"first_bet must be between 1 and {rule_table.shape[1] - 1}, got {first_bet}")
+    if bets.ndim != 2 or bets.shape[1] > max_bets:
+        raise ValueError(f"bets must have shape [N, T] with T <= {max_bets}, got {bets.shape}")
+    n_sessions, n_bets = bets.shape
+    codes = encode_conditions(conditions, n_sessions)
+
+    rewards = np.zeros((n_sessions, n_bets), dtype=np.int64)
+    multipliers = np.zeros((n_sessions, n_bets), dtype=np.float64)
+    budgets = np.empty((n_sessions, n_bets + 1), dtype=np.int64)
+    budgets[:, 0] = to_cents(INITIAL_BUDGET)
+
+    initial_budget = budgets[:, 0].copy()
+    for column in range(n_bets):
+        bet_number = column + first_bet
+        budget_before_spin = budgets[:, column]
+        bet = bets[:, column]
+        # primo bet di DURING / AFTER: il budget iniziale di fase è quello prima dello spin
+        # (alla prima colonna coincide con INITIAL_BUDGET, come in SessionEngine)
+        if bet_number > first_bet and phase_of_bet[bet_number] != phase_of_bet[bet_number - 1]:
+            initial_budget = budget_before_spin.copy()
+
+        rule = rule_table[codes, bet_number]
+        expected = np.zeros(n_sessions, dtype=np.int64)
+        multiplier = np.zeros(n_sessions, dtype=np.float64)
+
+        # BEFORE / AFTER / DURING-EQUAL: recupero della perdita di fase
+        recover = rule == RULE_RECOVER
+        if recover.any():
+            difference = np.maximum(initial_budget[recover] - budget_before_spin[recover], 0)
+            expected[recover] = difference + bet[recover]
+
+        # DURING-WIN: incremento percentuale atteso
+        increase = rule == RULE_INCREASE
+        if increase.any():
+            percentage = percentage_table[codes[increase], bet_number]
+            expected[increase] = _percent_of_cents(percentage, initial_budget[increase], bet[increase])
+
+        computed = recover | increase
+        multiplier[computed] = calculate_multipliers(expected[computed], bet[computed])
+
+        # DURING-LOSE: contentino se la perdita supera quella attesa, altrimenti moltiplicatore minimo
+        decrease = rule == RULE_DECREASE
+        if decrease.any():
+            percentage = percentage_table[codes[decrease], bet_number]
+            lose_value = initial_budget[decrease] - budget_before_spin[decrease]
+            expected_lose_value = _percent_of_cents(percentage, initial_budget[decrease])
+            lose_difference = lose_value - expected_lose_value
+            consolation = np.ones(lose_difference.shape, dtype=np.float64)
+            over = lose_difference > 0
+            # differenza in coin come in SessionEngine._lose_increase
+            ratio = (_coins(lose_value[over]) - _coins(expected_lose_value[over])) / _coins(bet[decrease][over])
+            consolation[over] = lookup_multipliers(np.round(ratio, 0))
+            multiplier[decrease] = consolation
+
+        # arrotondamento della reward solo sulle bet vincenti
+        win = rule != RULE_LOSS
+        reward = np.zeros(n_sessions, dtype=np.int64)
+        reward[win] = _multiply_cents(bet[win], multiplier[win])
+        rewards[:, column] = reward
+        multipliers[:, column] = multiplier
+        budgets[:, column + 1] = (budget_before_spin - bet) + reward
+
+    return BatchResult(rewards_cents=rewards, multipliers=multipliers, budgets_cents=budgets)
@@ -0,0 +1,245 @@
+"""
+Cross-engine benchmark and regression suite.
+
+Measures every slot engine in the tree, on the scalar path (one spin per call) and
+on the batch path where the engine has one:
+
+    python -m core.benchmark                                  # print results
+    python -m core.benchmark --save benchmarks/baseline.json  # record a baseline
+    python -m core.benchmark --baseline benchmarks/baseline.json --threshold 0.2
+
+For each case: spins per second, p50/p99 latency per call (microseconds) and bytes
+allocated per spin (tracemalloc peak over one call, divided by the spins in the
+call). Engines that fail to run are reported with their error instead of aborting
+the suite. Cases in BROKEN_CASES (the class in core/Varianti/slot_logic.py fails on
+every call) run only when --cases names them. With --baseline the exit status is 1
+when a case got slower than the baseline by more than --threshold (throughput or
+p50 latency), or when a case that used to run now fails.
+
+Each case imports its engine only inside its own setup, so engines are measured
+in isolation. Baselines are machine specific, so none is committed: record one
+with --save on the box that runs the comparison. A --baseline file that does not
+exist is reported and skipped (exit status 0).
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_MIN_TIME = 0.5
+
+# sessioni / giri per chiamata dei casi batch
+BATCH_SESSIONS = 1_000
+BATCH_SPINS = 60_000
+
+
+# ---------------CASES---------
+# Ogni caso: setup() -> (step, spin per chiamata); gli import avvengono dentro setup.
+def _deterministic_scalar():
+    from core.constants import TOTAL_SESSION_BETS
+    from core.slot_logic import SessionEngine
+
+    engine, rng = SessionEngine("LOSE"), random.Random(0)
+    state = {"bet_number": 0, "coins": 10_000}
+
+    def step():
+        if state["bet_number"] == TOTAL_SESSION_BETS:
+            engine.reset()
+            state["bet_number"], state["coins"] = 0, 10_000
+        state["bet_number"] += 1
+        reward, _, _ = engine.play_cents(state["coins"], state["bet_number"], 100, rng)
+        state["coins"] += reward - 100
+    return step, 1
+
+
+def _deterministic_batch():
+    from core.batch_simulator import simulate_batch
+    from core.bet_strategies import random_bets
+    from core.symbol_tables import spin_reels_batch
+
+    rng = np.random.default_rng(0)
+    bets = random_bets(rng, BATCH_SESSIONS)
+
+    def step():
+        result = simulate_batch("LOSE", bets)
+        spin_reels_batch(result.rewards_cents, result.multipliers, rng)
+    return step, bets.size
+
+
+def _reel_strip_scalar():
+    from core.reel_strip import ReelStripEngine
+
+    engine, rng = ReelStripEngine(), random.Random(0)
+    return (lambda: engine.play_cents(10_000, 1, 100, rng)), 1
+
+
+def _reel_strip_batch():
+    from core.reel_strip import ReelStripEngine
+
+    engine, rng = ReelStripEngine(), np.random.default_rng(0)
+    return (lambda: engine.payouts(engine.spin_batch(BATCH_SPINS, rng))), BATCH_SPINS
+
+
+def _varianti_scalar():
+    from core.Varianti.slot_logic import SlotMachine
+
+    def step():
+        SlotMachine.calculate_reward(SlotMachine.spin_reels())
+    return step, 1
+
+
+def _old_module_scalar(module_name: str):
+    def setup():
+        import importlib
+
+        module = importlib.import_module(module_name)
+        return (lambda: module.calculate_reward(module.spin_reels())), 1
+    return setup
+
+
+CASES: dict[str, Callable] = {
+    "deterministic.scalar": _deterministic_scalar,
+    "deterministic.batch": _deterministic_batch,
+    "reel_strip.scalar": _reel_strip_scalar,
+    "reel_strip.batch": _reel_strip_batch,
+    "varianti.scalar": _varianti_scalar,
+    "old_real.scalar": _old_module_scalar("core.OLD.RealVersion.slot_logic_real"),
+    "old_real_spin.scalar": _old_module_scalar("core.OLD.RealVersion.slot_logic_realSpin"),
+    "old_real_spin_controlled.scalar": _old_module_scalar("core.OLD.RealVersion.slot_logic_realSpinControlled"),
+}
+
+# casi che falliscono sempre: esclusi dall'elenco di default, si eseguono solo se --cases li seleziona
+BROKEN_CASES = frozenset({"varianti.scalar"})
+
+
+# ---------------MEASUREMENT---------
+def _allocated_bytes_per_call(step: Callable, calls: int) -> float:
+    """Picco medio di memoria allocata (tracemalloc) durante una chiamata."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            step()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+    return float(np.mean(peaks))
+
+
+def measure(step: Callable, spins_per_call: int, min_time: float = DEFAULT_MIN_TIME, min_calls: int = 20) -> dict:
+    """Measure one case: throughput, per-call latency percentiles and allocations per spin."""
+    for _ in range(3):  # warm-up: import lazy, cache, branch predictor
+        step()
+
+    durations = []
+    start = time.perf_counter()
+    while len(durations) < min_calls or time.perf_counter() - start < min_time:
+        call_start = time.perf_counter_ns()
+        step()
+        durations.append(time.perf_counter_ns() - call_start)
+    durations = np.asarray(durations, dtype=np.float64) / 1_000  # microsecondi
+
+    alloc_calls = min(len(durations), 50)
+    return {
+        "calls": len(durations),
+        "spins_per_call": spins_per_call,
+        "spins_per_s": spins_per_call * len(durations) / (durations.sum() / 1e6),
+        "p50_us": float(np.percentile(durations, 50)),
+        "p99_us": float(np.percentile(durations, 99)),
+        "alloc_bytes_per_spin": _allocated_bytes_per_call(step, alloc_calls) / spins_per_call,
+    }
+
+
+def run_benchmarks(patterns: Optional[list] = None, min_time: float = DEFAULT_MIN_TIME) -> dict:
+    """Run the cases matching `patterns` (fnmatch; default: all but BROKEN_CASES), reporting broken engines with their error."""
+    results = {}
+    for name, setup in CASES.items():
+        if patterns is None and name in BROKEN_CASES:
+            continue
+        if patterns and not any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+            continue
+        try:
+            step, spins_per_call = setup()
+            results[name] = measure(step, spins_per_call, min_time)
+        except Exception as error:  # engine non funzionante: lo segnalo e continuo
+            results[name] = {"error": f"{type(error).__name__}: {error}"}
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """Regressions of `results` against a baseline ({case: metrics}); empty list if none."""
+    failures = []
+    for name, current in results.items():
+        reference = baseline.get(name)
+        if reference is None or "error" in reference:
+            continue
+        if "error" in current:
+            failures.append(f"{name}: now fails ({current['error']})")
+            continue
+        slowdown = reference["spins_per_s"] / current["spins_per_s"] - 1
+        if slowdown > threshold:
+            failures.append(f"{name}: throughput {current['spins_per_s']:.0f} spins/s vs {reference['spins_per_s']:.0f} ({slowdown:.0%} slower)")
+        latency = current["p50_us"] / reference["p50_us"] - 1
+        if latency > threshold:
+            failures.append(f"{name}: p50 {current['p50_us']:.1f}us vs {reference['p50_us']:.1f}us ({latency:.0%} slower)")
+    return failures
+
+
+def _print_results(results: dict) -> None:
+    print(f"{'case':<34}{'spins/s':>14}{'p50 us':>11}{'p99 us':>11}{'B/spin':>10}")
+    for name, metrics in results.items():
+        if "error" in metrics:
+            print(f"{name:<34}  ERROR {metrics['error']}")
+        else:
+            print(f"{name:<34}{metrics['spins_per_s']:>14,.0f}{metrics['p50_us']:>11.2f}"
+                  f"{metrics['p99_us']:>11.2f}{metrics['alloc_bytes_per_spin']:>10.1f}")
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark every slot engine (scalar and batch paths).")
+    parser.add_argument("--cases", nargs="+", default=None, help="fnmatch patterns, e.g. 'reel_strip.*'")
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME, help="Seconds of timed calls per case.")
+    parser.add_argument("--save", default=None, help="Write the results as a JSON baseline.")
+    parser.add_argument("--baseline", default=None, help="Compare against a JSON baseline.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown (0.2 = 20%%).")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.cases, args.min_time)
+    _print_results(results)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as baseline_file:
+            json.dump({"python": sys.version.split()[0], "platform": platform.platform(), "cases": results},
+                      baseline_file, indent=2)
+        print(f"[BENCHMARK] baseline saved to {args.save}")
+
+    if args.baseline and not os.path.exists(args.baseline):
+        print(f"[BENCHMARK] no baseline at {args.baseline}, comparison skipped (record one with --save {args.baseline})")
+    elif args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)["cases"]
+        failures = compare(results, baseline, args.threshold)
+        for failure in failures:
+            print(f"[BENCHMARK] REGRESSION {failure}")
+        if failures:
+            return 1
+        print(f"[BENCHMARK] no regression above {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Bet-strategy generators for the batch simulator.
+
+Every strategy produces the whole [N, T] bet array (integer cents) of N sessions in
+one call, so it plugs directly into simulate_batch / run_monte_carlo:
+
+    constant:1.0            always the same bet
+    uniform                 uniform in [MIN_BET, MAX_BET] with step BET_STEP (testing_statistics)
+    martingale:0.1          double after every lost bet, back to the base after a win
+    anti_martingale:0.1     double after every won bet, back to the base after a loss
+    empirical:data          alias-table sampler over the BET rows of real metrics*.csv files
+
+Outcomes of the deterministic engine do not depend on the bet amount: whether bet k
+wins is fixed by the condition's compiled schedule (CompiledSchedule.wins). The
+progressive strategies can therefore be computed from the win/loss pattern with
+array operations instead of a per-bet loop. Progressions are capped at MAX_BET.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Protocol
+
+import numpy as np
+
+from core.alias import AliasTable
+from core.constants import BET_STEP, MAX_BET, MIN_BET, TOTAL_SESSION_BETS, normalize_condition
+from core.money import to_cents
+from core.schedule import SCHEDULES
+
+
+class BetStrategy(Protocol):
+    """Interface shared by all strategies."""
+
+    def bets(self, rng: np.random.Generator, n_sessions: int, condition: str, n_bets: int = TOTAL_SESSION_BETS) -> np.ndarray:
+        """Returns the [n_sessions, n_bets] int64 bets in cents for sessions of `condition`."""
+
+
+def random_bets(rng: np.random.Generator, n_sessions: int, n_bets: int = TOTAL_SESSION_BETS) -> np.ndarray:
+    """Puntate casuali [N, n_bets] in centesimi tra MIN_BET e MAX_BET (step BET_STEP), come in testing_statistics."""
+    step = to_cents(BET_STEP)
+    steps = (to_cents(MAX_BET) - to_cents(MIN_BET)) // step
+    return rng.integers(0, steps + 1, size=(n_sessions, n_bets), dtype=np.int64) * step + to_cents(MIN_BET)
+
+
+def _streaks(outcomes: np.ndarray) -> np.ndarray:
+    """Per ogni bet, quante bet consecutive immediatamente precedenti hanno outcome True."""
+    previous = np.concatenate(([False], outcomes[:-1]))
+    index = np.arange(len(outcomes))
+    last_break = np.maximum.accumulate(np.where(previous, 0, index))
+    return index - last_break
+
+
+def _schedule_wins(condition: str, n_bets: int) -> np.ndarray:
+    """Esiti scriptati (vittoria sì/no) delle prime n_bets bet della condition.
+
+    Raises:
+        ValueError: Unknown condition.
+    """
+    condition = normalize_condition(condition)
+    if condition not in SCHEDULES:
+        raise ValueError(f"Unknown condition {condition!r}: use {', '.join(SCHEDULES)}")
+    return np.array(SCHEDULES[condition].wins[1:n_bets + 1], dtype=bool)
+
+
+@dataclass(frozen=True)
+class ConstantBets:
+    """Always bets `bet` coins."""
+
+    bet: float = MIN_BET
+
+    def bets(self, rng, n_sessions, condition, n_bets=TOTAL_SESSION_BETS):
+        return np.full((n_sessions, n_bets), to_cents(self.bet), dtype=np.int64)
+
+
+@dataclass(frozen=True)
+class UniformBets:
+    """Uniform bets in [MIN_BET, MAX_BET] with step BET_STEP, as in testing_statistics_v1/v2."""
+
+    def bets(self, rng, n_sessions, condition, n_bets=TOTAL_SESSION_BETS):
+        return random_bets(rng, n_sessions, n_bets)
+
+
+@dataclass(frozen=True)
+class MartingaleBets:
+    """Doubling progression on the schedule's outcomes, capped at MAX_BET.
+
+    Attributes:
+        base: Bet in coins after a reset.
+        anti: False: double after a loss, reset after a win (martingale);
+            True: double after a win, reset after a loss (anti-martingale).
+    """
+
+    base: float = MIN_BET
+    anti: bool = False
+
+    def bets(self, rng, n_sessions, condition, n_bets=TOTAL_SESSION_BETS):
+        wins = _schedule_wins(condition, n_bets)
+        streaks = _streaks(wins if self.anti else ~wins)
+        # 2**streak può traboccare su sessioni lunghe: il cap si applica già all'esponente
+        max_doublings = int(np.ceil(np.log2(max(to_cents(MAX_BET) / to_cents(self.base), 1))))
+        row = np.minimum(to_cents(self.base) << np.minimum(streaks, max_doublings), to_cents(MAX_BET))
+        return np.broadcast_to(row.astype(np.int64), (n_sessions, n_bets)).copy()
+
+
+@dataclass(frozen=True)
+class EmpiricalBets:
+    """Independent draws from the empirical bet distribution of real sessions.
+
+    Attributes:
+        values_cents: Distinct bet amounts in cents.
+        counts: Occurrences of each amount (see metrics_reader.bet_distribution).
+    """
+
+    values_cents: tuple
+    counts: tuple
+
+    @classmethod
+    def from_metrics(cls, path: str) -> "EmpiricalBets":
+        """Fit the sampler on the BET rows of a metrics CSV or of every metrics*.csv in a folder."""
+        from core.metrics_reader import bet_distribution, metrics_files
+
+        values, counts = bet_distribution(metrics_files(path))
+        return cls(tuple(values.tolist()), tuple(counts.tolist()))
+
+    def bets(self, rng, n_sessions, condition, n_bets=TOTAL_SESSION_BETS):
+        draws = AliasTable(self.counts).sample(rng, (n_sessions, n_bets))
+        return np.asarray(self.values_cents, dtype=np.int64)[draws]
+
+
+def parse_strategy(spec: Optional[str]) -> BetStrategy:
+    """Builds a strategy from "name[:argument]" (see module docstring); None -> uniform.
+
+    Raises:
+        ValueError: Unknown strategy name.
+    """
+    if spec is None:
+        return UniformBets()
+    name, _, argument = spec.partition(":")
+    name = name.strip().lower().replace("-", "_")
+    if name == "uniform":
+        return UniformBets()
+    if name == "constant":
+        return ConstantBets(float(argument or MIN_BET))
+    if name in ("martingale", "anti_martingale"):
+        return MartingaleBets(float(argument or MIN_BET), anti=name == "anti_martingale")
+    if name == "empirical":
+        return EmpiricalBets.from_metrics(argument or "data")
+    raise ValueError(f"Unknown bet strategy {name!r}: use constant, uniform, martingale, anti_martingale or empirical")
@@ -0,0 +1,200 @@
+"""
+Calibration solver for the percentage checkpoints of the DURING phase.
+
+Fits EXPECTED_PERCENTAGE_INCREASES (WIN) and EXPECTED_PERCENTAGE_DECREASES (LOSE)
+to target budget trajectories, e.g. "+40% by bet 40 under WIN":
+
+    python -m core.calibration --target WIN:40:0.40 --target LOSE:40:-0.20 --metrics data
+
+Targets are relative changes of the mean budget with respect to INITIAL_BUDGET at a
+given bet. Bets are drawn from the empirical bet-size distribution of real
+metrics_*.csv files (alias table over the logged BET amounts), or by any other
+strategy of core/bet_strategies.py (--bets); the same seeded bets are reused for
+every evaluation, so the objective is deterministic.
+
+The multiplier lookup makes the budget a step function of the checkpoints, so the
+solver is a derivative-free pattern search (coordinate moves with a shrinking step)
+on top of simulate_batch, with a small ridge term that keeps checkpoints without
+an active target near their current values. The residual of every target is
+reported after the fit.
+"""
+
+import argparse
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from core.batch_simulator import simulate_batch
+from core.bet_strategies import EmpiricalBets, parse_strategy
+from core.constants import (EXPECTED_PERCENTAGE_DECREASES, EXPECTED_PERCENTAGE_INCREASES, INITIAL_BUDGET,
+                            VALID_CONDITIONS, normalize_condition)
+from core.money import format_cents, to_cents
+from core.schedule import RULE_DECREASE, RULE_INCREASE, SCHEDULES, compile_schedule
+
+# condition -> (regola dei checkpoint, tabella di default, argomento di compile_schedule)
+_FITTED_TABLES = {
+    "WIN": (RULE_INCREASE, EXPECTED_PERCENTAGE_INCREASES, "increases"),
+    "LOSE": (RULE_DECREASE, EXPECTED_PERCENTAGE_DECREASES, "decreases"),
+}
+
+
+@dataclass(frozen=True)
+class CalibrationResult:
+    """Outcome of one calibrate() call.
+
+    Attributes:
+        condition: Calibrated condition.
+        initial: bet number -> checkpoint before the fit.
+        fitted: bet number -> fitted checkpoint.
+        residuals: (bet number, target change, achieved change) per target.
+        rms: Root mean square of the residuals.
+        evaluations: Simulations run by the solver.
+    """
+
+    condition: str
+    initial: dict
+    fitted: dict
+    residuals: list
+    rms: float
+    evaluations: int
+
+
+def _trajectory(condition: str, bets: np.ndarray, table_arg: str, table: dict) -> np.ndarray:
+    """Variazione relativa del budget medio dopo ogni bet (indice = numero di bet)."""
+    schedules = {**SCHEDULES, condition: compile_schedule(condition, **{table_arg: table})}
+    budgets = simulate_batch(condition, bets, schedules=schedules).budgets_cents
+    return budgets.mean(axis=0) / to_cents(INITIAL_BUDGET) - 1
+
+
+def calibrate(
+    condition: str,
+    targets: dict,
+    bets_cents: np.ndarray,
+    ridge: float = 0.1,
+    initial_step: float = 0.02,
+    min_step: float = 0.0005,
+    max_evaluations: int = 2_000,
+) -> CalibrationResult:
+    """Fit the checkpoints of one condition to target budget changes.
+
+    Args:
+        condition: "WIN" (fits EXPECTED_PERCENTAGE_INCREASES) or "LOSE" (EXPECTED_PERCENTAGE_DECREASES).
+        targets: bet number -> target relative change of the mean budget (0.40 = +40%).
+        bets_cents: [N, TOTAL_SESSION_BETS] bets reused for every evaluation.
+        ridge: Weight of the squared distance from the current checkpoints.
+        initial_step: First step of the pattern search.
+        min_step: The search stops when the step falls below this value.
+        max_evaluations: Upper bound on simulations.
+
+    Raises:
+        ValueError: Condition without checkpoints (EQUAL) or target beyond the simulated bets.
+    """
+    if condition not in _FITTED_TABLES:
+        raise ValueError(f"Condition {condition} has no percentage checkpoints to calibrate")
+    if max(targets) > bets_cents.shape[1]:
+        raise ValueError(f"Target bet {max(targets)} beyond the {bets_cents.shape[1]} simulated bets")
+    rule, defaults, table_arg = _FITTED_TABLES[condition]
+    schedule = SCHEDULES[condition]
+    checkpoints = [bet for bet in range(1, schedule.total_bets + 1) if schedule.rules[bet] == rule]
+    initial = np.array([schedule.percentages[bet] for bet in checkpoints], dtype=np.float64)
+    upper = 1.0 if condition == "LOSE" else np.inf  # una perdita attesa non può superare il budget
+    target_bets = sorted(targets)
+    target_values = np.array([targets[bet] for bet in target_bets], dtype=np.float64)
+
+    def evaluate(values: np.ndarray) -> tuple[float, np.ndarray]:
+        table = {**defaults, **dict(zip(checkpoints, values.tolist()))}
+        achieved = _trajectory(condition, bets_cents, table_arg, table)[target_bets]
+        loss = float(np.sum((achieved - target_values) ** 2) + ridge * np.sum((values - initial) ** 2))
+        return loss, achieved
+
+    values = initial.copy()
+    best, achieved = evaluate(values)
+    evaluations, step = 1, initial_step
+    while step >= min_step and evaluations < max_evaluations:
+        improved = False
+        for index in range(len(values)):
+            for direction in (1.0, -1.0):
+                candidate = values.copy()
+                candidate[index] = np.clip(candidate[index] + direction * step, 0.0, upper)
+                if candidate[index] == values[index]:
+                    continue
+                loss, candidate_achieved = evaluate(candidate)
+                evaluations += 1
+                if loss < best:
+                    values, best, achieved, improved = candidate, loss, candidate_achieved, True
+                    break
+        if not improved:
+            step /= 2
+
+    residuals = [(bet, float(target), float(value)) for bet, target, value in zip(target_bets, target_values, achieved)]
+    return CalibrationResult(
+        condition=condition,
+        initial=dict(zip(checkpoints, initial.round(6).tolist())),
+        fitted=dict(zip(checkpoints, values.round(6).tolist())),
+        residuals=residuals,
+        rms=float(np.sqrt(np.mean((achieved - target_values) ** 2))),
+        evaluations=evaluations,
+    )
+
+
+def _parse_target(text: str) -> tuple[str, int, float]:
+    """"WIN:40:0.40" -> ("WIN", 40, 0.40).
+
+    Raises:
+        argparse.ArgumentTypeError: Malformed target or unknown condition (argparse reports it as a usage error).
+    """
+    try:
+        condition, bet, change = text.split(":")
+        bet, change = int(bet), float(change)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{text!r} is not CONDITION:BET:CHANGE, e.g. WIN:40:0.40") from None
+    condition = normalize_condition(condition)
+    conditions = tuple(VALID_CONDITIONS.values())
+    if condition not in conditions:
+        raise argparse.ArgumentTypeError(f"unknown condition {condition!r} in {text!r}: use {', '.join(conditions)}")
+    return condition, bet, change
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Fit EXPECTED_PERCENTAGE checkpoints to target budget trajectories.")
+    parser.add_argument("--target", action="append", required=True, type=_parse_target,
+                        help="CONDITION:BET:CHANGE, e.g. WIN:40:0.40 (+40%% of INITIAL_BUDGET by bet 40). Repeatable.")
+    parser.add_argument("--metrics", default=None, help="metrics CSV file or folder for the empirical bet distribution.")
+    parser.add_argument("--bets", default=None, help="Bet strategy when --metrics is not given (default: uniform).")
+    parser.add_argument("--sessions", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ridge", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    strategy = EmpiricalBets.from_metrics(args.metrics) if args.metrics else parse_strategy(args.bets)
+    if isinstance(strategy, EmpiricalBets):
+        values, counts = np.asarray(strategy.values_cents), np.asarray(strategy.counts)
+        print(f"[CALIBRATION] empirical bets: {counts.sum()} rows, {len(values)} distinct amounts, "
+              f"mean {format_cents(int(round(float(values @ counts) / counts.sum())))}")
+
+    by_condition: dict[str, dict] = {}
+    for condition, bet, change in args.target:
+        by_condition.setdefault(condition, {})[bet] = change
+    for condition, targets in by_condition.items():
+        # stesso seed per ogni condition; le strategie progressive dipendono dallo schedule della condition
+        bets = strategy.bets(np.random.default_rng(args.seed), args.sessions, condition)
+        if condition not in _FITTED_TABLES:
+            # nessun parametro da stimare: riporto solo lo scostamento della traiettoria attuale
+            achieved = simulate_batch(condition, bets).budgets_cents.mean(axis=0) / to_cents(INITIAL_BUDGET) - 1
+            print(f"[CALIBRATION] {condition}: no checkpoints to fit, residuals of the current schedule")
+            for bet, target in sorted(targets.items()):
+                print(f"    bet {bet}: target {target:+.2%}  achieved {achieved[bet]:+.2%}  residual {achieved[bet] - target:+.2%}")
+            continue
+        result = calibrate(condition, targets, bets, ridge=args.ridge)
+        print(f"[CALIBRATION] {condition}: {result.evaluations} simulations, residual RMS {result.rms:.4f}")
+        for bet, target, achieved in result.residuals:
+            print(f"    bet {bet}: target {target:+.2%}  achieved {achieved:+.2%}  residual {achieved - target:+.2%}")
+        for bet, value in result.fitted.items():
+            if value != result.initial[bet]:
+                print(f"    checkpoint {bet}: {result.initial[bet]} -> {value}")
+        print(f"    {_FITTED_TABLES[condition][2]} table: {result.fitted}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 # Tutte le costanti condivise tra gui e core
-# Nessun import da altri moduli interni → nessun rischio di circolarità
+# Unico import interno: core/layout.py, che non importa altri moduli del progetto → nessuna circolarità
+from enum import IntEnum
+
+from core.layout import compile_layout
 
 # -----------------BUILD CONFIG-------------------
 # VARIANTE
@@ -10,6 +13,8 @@
 # None = manual mode / default fallback when no bundled build config is present
 # "W" / "L" / "E" can also be provided by bundled config/build.env in frozen builds
 BUILD_CONDITION: str | None = None
+# Engine di gioco (nome registrato in core/engines.py): "deterministic" | "reel_strip"
+SLOT_ENGINE: str = "deterministic"
 
 
 # -----------------GAME CONSTANTS-------------------
@@ -17,14 +22,36 @@ INITIAL_BUDGET: float = 100.0
 MIN_BET: float = 0.10
 MAX_BET: float = 2.0
 BET_STEP: float = 0.10
-TOTAL_SESSION_BETS: int = 60
-PHASE_LENGTH: int = 20
+PHASE_LENGTH: int = 20     # lunghezza delle fasi del layout di default (SESSION_SCHEDULE)
 TOTAL_TESTS: int = 50
-MESSAGE_COUNTER_POINT = 40  # punto in cui mostrare il messaggio a metà sessione (dopo 40 scommesse, all'inizio della fase AFTER)
+# TOTAL_SESSION_BETS e MESSAGE_COUNTER_POINT sono derivati da SESSION_SCHEDULE (in fondo al file)
 MESSAGE_TIMER = 30          # durata totale messaggio
 MESSAGE_TYPE: str = "MEX2"  # "MEX1" → immagine senza conto alla rovescia
                             # "MEX2" → conto alla rovescia negli ultimi 10 secondi
 
+# ---------------METRICS LOGGER CONSTANTS-----------------
+# Politica di flush del CSV (core/metrics_logger.py); SESSION_END e chiusura fanno sempre flush
+METRICS_FLUSH_ROWS: int = 1            # flush ogni N righe (1 = ogni evento, come la scrittura riga per riga)
+METRICS_FLUSH_INTERVAL_MS: int = 0     # flush se sono passati almeno T ms dall'ultimo (0 = disattivato)
+METRICS_FSYNC: bool = False            # os.fsync a ogni flush: le righe sopravvivono a un power loss, ~ms per flush
+METRICS_ASYNC: bool = True             # scrittura su un thread dedicato: l'I/O non blocca il thread della GUI
+METRICS_QUEUE_SIZE: int = 10_000       # righe massime in coda per il thread di scrittura
+METRICS_QUEUE_POLICY: str = "block"    # coda piena: "block" attende il thread, "drop" scarta BET/MEX e li conta
+METRICS_JOURNAL: bool = True           # write-ahead journal (core/metrics_journal.py): righe con CRC e numero di sequenza,
+                                       # recupero all'avvio dopo un power loss
+# Finestra di commit del journal (solo con METRICS_ASYNC): un fsync ogni T ms o N righe invece che a ogni flush;
+# un power loss perde al più le righe della finestra aperta. SESSION_END, flush() e close() sincronizzano sempre
+METRICS_JOURNAL_COMMIT_MS: int = 1000  # fsync al più T ms dopo la prima riga non sincronizzata (timer del thread)
+METRICS_JOURNAL_COMMIT_ROWS: int = 100 # ...o appena le righe non sincronizzate sono N (1 = fsync a ogni flush)
+METRICS_JOURNAL_CHECKPOINT_ROWS: int = 1000  # fsync del CSV e compattazione del journal ogni N righe
+METRICS_SQLITE: bool = False          # copia le righe anche in data/metrics.sqlite (WAL, un database per cartella dati)
+# Sink secondari (core/metrics_sinks.py): ogni sink ha coda, thread e batch propri e non rallenta mai il CSV
+METRICS_SINKS: tuple = ()               # es. ("jsonl", "ring:500", "socket:192.168.1.10:5005", "csv:E:/backup")
+METRICS_SINK_QUEUE_SIZE: int = 10_000   # eventi in coda per sink; oltre vengono scartati (contati in dropped)
+METRICS_SINK_BATCH_ROWS: int = 100      # scrittura a blocchi di N eventi...
+METRICS_SINK_FLUSH_INTERVAL_MS: int = 500  # ...o dopo T ms dal primo evento in attesa
+METRICS_SINK_CLOSE_TIMEOUT_S: float = 2.0  # attesa massima dei sink alla chiusura (tutti in parallelo)
+
 # ---------------REMOTE RESEARCHER CONSTANTS-----------------
 VALID_CONDITIONS = {
     "E": "EQUAL",
@@ -32,15 +59,38 @@ VALID_CONDITIONS = {
     "L": "LOSE"}
 
 
+def normalize_condition(text: str) -> str:
+    """Nome della condition scritto in un CSV delle metriche ("w" o " WIN" -> "WIN").
+
+    I CSV più vecchi possono avere la sigla ("W") al posto del nome; un testo non
+    riconosciuto viene restituito in maiuscolo, senza errori (lo valida chi lo usa).
+    """
+    text = text.strip().upper()
+    return VALID_CONDITIONS.get(text, text)
+
+
 # -----------------SLOT LOGIC CONSTANTS-------------------
-PHASES = {
-    "PHASE_BEFORE": range(1, PHASE_LENGTH + 1),
-    "PHASE_DURING": range(PHASE_LENGTH + 1, 2 * PHASE_LENGTH + 1),
-    "PHASE_AFTER": range(2 * PHASE_LENGTH + 1, TOTAL_SESSION_BETS + 1),
-}
+# Symbol IDs: interi piccoli (0-8) usati da tabelle di reward, spin_reels, log delle metriche e cache delle pixmap.
+# Gli array di simboli simulati si salvano come uint8; il nome minuscolo resta solo per gli asset (es. "cherry.png").
+class Symbol(IntEnum):
+    BANANA = 0
+    BAR = 1
+    BELL = 2
+    CHERRY = 3
+    DIAMOND = 4
+    GRAPE = 5
+    LEMON = 6
+    SEVEN = 7
+    STAR = 8
+
+    @property
+    def label(self) -> str:
+        """Nome minuscolo del simbolo, uguale al file dell'icona (es. Symbol.CHERRY -> "cherry")."""
+        return self.name.lower()
+
 
 # List of symbols
-SYMBOLS = ["banana", "bar", "bell", "cherry", "diamond", "grape", "lemon", "seven", "star"]
+SYMBOLS = list(Symbol)
 
 # Fixed parameters
 # valori percentuali attesi: salvo l'indice di vittoria e il valore
@@ -63,24 +113,24 @@ EXPECTED_PERCENTAGE_DECREASES = {25: 0.05, 30: 0.15, 35: 0.15}
 
 # mi serve una tabella per effettuare una ricerca partendo dal moltiplicatore calcolato e ottenre il simbolo da visualizzare e il numero di ccorrenze
 REWARD_TABLE_MUL = {
-    1: ("lemon", 2),
-    2: ("grape", 2),
-    3: ("banana", 2),
-    4: ("cherry", 2),
-    5: ("diamond", 2),
-    7: ("star", 2),
-    8.5: ("bell", 2),
-    10: ("bar", 2),
-    12: ("seven", 2),
-    15: ("lemon", 3),
-    20: ("grape", 3),
-    30: ("banana", 3),
-    40: ("cherry", 3),
-    50: ("diamond", 3),
-    75: ("star", 3),
-    100: ("bell", 3),
-    125: ("bar", 3),
-    150: ("seven", 3),
+    1: (Symbol.LEMON, 2),
+    2: (Symbol.GRAPE, 2),
+    3: (Symbol.BANANA, 2),
+    4: (Symbol.CHERRY, 2),
+    5: (Symbol.DIAMOND, 2),
+    7: (Symbol.STAR, 2),
+    8.5: (Symbol.BELL, 2),
+    10: (Symbol.BAR, 2),
+    12: (Symbol.SEVEN, 2),
+    15: (Symbol.LEMON, 3),
+    20: (Symbol.GRAPE, 3),
+    30: (Symbol.BANANA, 3),
+    40: (Symbol.CHERRY, 3),
+    50: (Symbol.DIAMOND, 3),
+    75: (Symbol.STAR, 3),
+    100: (Symbol.BELL, 3),
+    125: (Symbol.BAR, 3),
+    150: (Symbol.SEVEN, 3),
 }
 
 # Deterministic outcome maps: 1 = WIN, 0 = LOSS
@@ -192,6 +242,32 @@ DURING_PHASE_LOSE = {
 }
 
 
+# -----------------SESSION SCHEDULE-------------------
+# Layout dichiarativo della sessione: fasi in ordine, qualsiasi numero e lunghezza.
+# Per ogni fase:
+#   "outcomes": mappa degli esiti (bet -> vittoria), unica o un dict per condition
+#   "relative": True = chiavi 1..length relative alla fase, False = numero di bet globale
+#   "rule":     regola delle vincite ("recover" | "increase" | "decrease"), unica o per condition
+#   "message":  il messaggio del ricercatore compare dopo l'ultima bet della fase (al massimo una fase)
+# core/schedule.py lo compila in tabelle dense per bet lette da SessionEngine, simulate_batch e GUI.
+# Le percentuali di "increase"/"decrease" sono EXPECTED_PERCENTAGE_INCREASES / DECREASES (bet globali).
+SESSION_SCHEDULE = (
+    {"name": "PHASE_BEFORE", "length": PHASE_LENGTH, "outcomes": BEFORE_AFTER_PHASE, "relative": True, "rule": "recover"},
+    {"name": "PHASE_DURING", "length": PHASE_LENGTH,
+     "outcomes": {"EQUAL": DURING_PHASE_EQUAL, "WIN": DURING_PHASE_WIN, "LOSE": DURING_PHASE_LOSE}, "relative": False,
+     "rule": {"EQUAL": "recover", "WIN": "increase", "LOSE": "decrease"}, "message": True},
+    {"name": "PHASE_AFTER", "length": PHASE_LENGTH, "outcomes": BEFORE_AFTER_PHASE, "relative": True, "rule": "recover"},
+)
+
+
+# layout compilato (nomi e range delle fasi, punto del messaggio): lo stesso usato da core/schedule.py
+SESSION_LAYOUT = compile_layout(SESSION_SCHEDULE)
+PHASES = dict(zip(SESSION_LAYOUT.phase_names, SESSION_LAYOUT.phase_ranges))  # nome fase -> range delle bet globali
+TOTAL_SESSION_BETS: int = SESSION_LAYOUT.total_bets
+# punto in cui mostrare il messaggio: dopo l'ultima bet della fase con "message" (40 = fine DURING)
+MESSAGE_COUNTER_POINT = SESSION_LAYOUT.message_bet
+
+
 
 
 # ----------------UNUSED: OLD-------------------
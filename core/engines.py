@@ -0,0 +1,80 @@
+"""
+Registry of the slot engines available to the GUI and the simulation tools.
+
+Every engine exposes the same small interface (SlotEngine below), so the GUI and
+RemoteResearcher no longer import a specific engine module. Engines are registered
+as "module:attr" strings and imported only when selected, so the unused ones never
+load at startup and each engine can be benchmarked on its own.
+
+The engine is chosen by name: SLOT_ENGINE in core/constants.py, overridable per
+build with SLOT_ENGINE=... in config/build.env (see utils/build_config.py).
+"""
+
+import importlib
+from typing import NamedTuple, Optional, Protocol
+
+# nome -> "modulo:attributo"; l'attributo è una classe (istanziata senza argomenti) o un'istanza già pronta
+ENGINES = {
+    "deterministic": "core.slot_logic:default_engine",
+    "reel_strip": "core.reel_strip:ReelStripEngine",
+}
+
+# istanze già risolte: GUI e RemoteResearcher condividono lo stesso engine
+_instances: dict = {}
+
+
+class SpinOutcome(NamedTuple):
+    """Result of one spin: reward in integer cents (0 on a loss), multiplier (None on a loss) and 3 Symbol IDs."""
+
+    reward_cents: int
+    multiplier: Optional[float]
+    symbols: tuple
+
+
+class SlotEngine(Protocol):
+    """Interface shared by all registered engines."""
+
+    def update_condition(self, condition: str) -> None:
+        """Sets the condition ("EQUAL", "WIN", "LOSE"); engines that ignore it just store it."""
+
+    def reset(self) -> None:
+        """Starts a new session (e.g. between TEST MODE sessions)."""
+
+    def play_cents(self, budget_before_spin: int, bet_number: int, bet_cents: int, rng=None) -> SpinOutcome:
+        """Plays bet `bet_number` with the budget before the spin; the bet is already deducted by the caller."""
+
+
+def register_engine(name: str, spec: str) -> None:
+    """Registra (o sostituisce) un engine come "modulo:attributo"."""
+    if ":" not in spec:
+        raise ValueError(f"Engine spec must be 'module:attr', got {spec!r}")
+    ENGINES[name] = spec
+    _instances.pop(name, None)
+
+
+def available_engines() -> tuple:
+    return tuple(ENGINES)
+
+
+def load_engine(name: str) -> SlotEngine:
+    """Importa il modulo dell'engine e restituisce una nuova istanza (o l'istanza registrata).
+
+    Raises:
+        ValueError: Engine non registrato.
+    """
+    try:
+        module_name, attr = ENGINES[name].split(":", 1)
+    except KeyError:
+        raise ValueError(f"Unknown slot engine: {name} (available: {', '.join(ENGINES)})") from None
+    target = getattr(importlib.import_module(module_name), attr)
+    return target() if isinstance(target, type) else target
+
+
+def get_engine(name: Optional[str] = None) -> SlotEngine:
+    """Engine condiviso per nome; di default quello configurato (SLOT_ENGINE di utils/build_config.py)."""
+    if name is None:
+        from utils.build_config import SLOT_ENGINE  # import locale: build_config valida il nome su ENGINES
+        name = SLOT_ENGINE
+    if name not in _instances:
+        _instances[name] = load_engine(name)
+    return _instances[name]
@@ -0,0 +1,59 @@
+"""
+Phase layout of a session schedule (phase names, bet ranges, message point).
+
+Kept free of project imports so that core/constants.py can derive PHASES,
+TOTAL_SESSION_BETS and MESSAGE_COUNTER_POINT from SESSION_SCHEDULE with the same
+compiler used by core/schedule.py.
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class SessionLayout:
+    """Phase layout shared by every condition of a session.
+
+    Attributes:
+        phase_names: Phase names in session order.
+        phase_ranges: Global bet numbers of each phase.
+        message_bet: Bet after which the researcher message is shown (MESSAGE_COUNTER_POINT).
+    """
+
+    phase_names: tuple
+    phase_ranges: tuple
+    message_bet: int
+
+    @property
+    def total_bets(self) -> int:
+        return self.phase_ranges[-1][-1]
+
+    @property
+    def phase_ends(self) -> tuple:
+        """Ultima bet di ogni fase (es. 20, 40, 60)."""
+        return tuple(bet_range[-1] for bet_range in self.phase_ranges)
+
+
+def compile_layout(session_schedule) -> SessionLayout:
+    """Compile the phase layout of a session schedule.
+
+    Raises:
+        ValueError: Empty schedule, duplicate phase names, non-positive lengths or more
+            than one message phase.
+    """
+    if not session_schedule:
+        raise ValueError("Session schedule has no phases")
+    names, ranges, message_bets, start = [], [], [], 1
+    for phase in session_schedule:
+        if phase["length"] <= 0:
+            raise ValueError(f"Phase {phase['name']} must have a positive length, got {phase['length']}")
+        if phase["name"] in names:
+            raise ValueError(f"Duplicate phase name: {phase['name']}")
+        names.append(phase["name"])
+        ranges.append(range(start, start + phase["length"]))
+        start += phase["length"]
+        if phase.get("message"):
+            message_bets.append(ranges[-1][-1])
+    if len(message_bets) > 1:
+        raise ValueError(f"Only one phase can show the researcher message, got bets {message_bets}")
+    message_bet = message_bets[0] if message_bets else ranges[-1][-1]
+    return SessionLayout(phase_names=tuple(names), phase_ranges=tuple(ranges), message_bet=message_bet)
@@ -0,0 +1,259 @@
+"""
+Write-ahead journal for the metrics CSV files.
+
+Each CSV written by MetricsLogger in journaled mode gets a sidecar
+`<file>.csv.journal`. Every flush first appends the buffered rows to the journal as
+records `seq <TAB> crc32 <TAB> json row`, then writes the same rows to the CSV
+without syncing it. The journal is fsynced once per batch (group commit), or once
+per commit window: MetricsLogger appends with sync=False and calls sync() after N
+records or T ms, so a power loss loses at most the rows of the open window. A
+checkpoint (fsync of the CSV, then an atomic rewrite of the journal holding only
+`CHECKPOINT <TAB> csv size <TAB> next seq <TAB> crc32`) bounds the journal size; a
+clean close checkpoints and deletes the journal.
+
+After a crash the CSV may end with a torn row, or miss rows that were only in the
+OS cache, while the journal holds every committed row after the last checkpoint.
+recover() compares the CSV after the checkpoint size with the valid journal
+records, keeps the rows that are intact and rewrites the torn or missing ones from
+the journal. Whole CSV rows after the last journal record (written back by the OS
+before their window was synced) are kept. A journal record with a bad CRC or an
+out-of-order sequence number is a torn tail: it is dropped with everything after
+it and reported as lost.
+Recovery is idempotent: running it twice gives the same file.
+"""
+
+import csv
+import glob
+import io
+import json
+import os
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+
+JOURNAL_SUFFIX = ".journal"
+_CHECKPOINT = "CHECKPOINT"
+
+
+@dataclass(frozen=True)
+class RecoveryReport:
+    """Outcome of recover() on one CSV.
+
+    Attributes:
+        path: Recovered CSV file.
+        restored_rows: Rows missing or torn in the CSV and rewritten from the journal.
+        lost_records: Torn or corrupt journal records dropped (rows lost in the crash).
+        discarded_csv_bytes: Bytes cut from the end of the CSV (unsynced or torn rows).
+        next_seq: Sequence number of the next record.
+    """
+
+    path: str
+    restored_rows: int
+    lost_records: int
+    discarded_csv_bytes: int
+    next_seq: int
+
+    @property
+    def clean(self) -> bool:
+        return self.lost_records == 0 and self.discarded_csv_bytes == 0 and self.restored_rows == 0
+
+    def describe(self) -> str:
+        return (f"RECOVERY restored_rows={self.restored_rows} lost_records={self.lost_records} "
+                f"discarded_csv_bytes={self.discarded_csv_bytes}")
+
+
+def _crc(text: str) -> str:
+    return f"{zlib.crc32(text.encode('utf-8')):08x}"
+
+
+def _fsync_directory(path: str) -> None:
+    # rende durevole il rename del journal; non supportato su Windows
+    if os.name == "nt":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class MetricsJournal:
+    """Append-only journal of one CSV file (used by MetricsLogger from a single thread).
+
+    Args:
+        csv_path: The journaled CSV; the journal is csv_path + ".journal".
+        csv_size: Size of the CSV already on disk (first checkpoint).
+        next_seq: Sequence number of the first record.
+    """
+
+    def __init__(self, csv_path: str, csv_size: int, next_seq: int = 0) -> None:
+        self.path = csv_path + JOURNAL_SUFFIX
+        self.next_seq = next_seq
+        self.records_since_checkpoint = 0
+        self.unsynced_records = 0
+        self.unsynced_since: Optional[float] = None  # time.monotonic() del primo record non ancora fsync-ato
+        self._file = None
+        self.checkpoint(csv_size)
+
+    def append(self, rows: list, sync: bool = True) -> None:
+        """Journal a batch of rows with a single fsync (group commit).
+
+        Args:
+            rows: Rows as written to the CSV.
+            sync: False = write without fsync; the records become durable at the next sync().
+        """
+        lines = []
+        for row in rows:
+            payload = json.dumps(row, ensure_ascii=False, separators=(",", ":"))
+            record = f"{self.next_seq}\t{payload}"
+            lines.append(f"{self.next_seq}\t{_crc(record)}\t{payload}\n")
+            self.next_seq += 1
+        self._file.write("".join(lines))
+        self._file.flush()
+        self.records_since_checkpoint += len(rows)
+        if self.unsynced_since is None:
+            self.unsynced_since = time.monotonic()
+        self.unsynced_records += len(rows)
+        if sync:
+            self.sync()
+
+    def sync(self) -> None:
+        """Rende durevoli (fsync) i record scritti con sync=False."""
+        if self.unsynced_records:
+            os.fsync(self._file.fileno())
+        self.unsynced_records = 0
+        self.unsynced_since = None
+
+    def checkpoint(self, csv_size: int) -> None:
+        """Sostituisce atomicamente il journal con un solo checkpoint (il CSV deve essere già fsync-ato fino a csv_size)."""
+        if self._file is not None:
+            self._file.close()
+        header = f"{_CHECKPOINT}\t{csv_size}\t{self.next_seq}"
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8", newline="") as journal_file:
+            journal_file.write(f"{header}\t{_crc(header)}\n")
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+        os.replace(temporary, self.path)
+        _fsync_directory(self.path)
+        self._file = open(self.path, "a", encoding="utf-8", newline="")
+        self.records_since_checkpoint = 0
+        # i record della finestra aperta sono già nel CSV fsync-ato fino a csv_size
+        self.unsynced_records = 0
+        self.unsynced_since = None
+
+    def remove(self) -> None:
+        """Chiusura pulita: il CSV è già fsync-ato, il journal non serve più."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _read_journal(journal_path: str) -> tuple[Optional[int], int, list, int]:
+    """(csv size del checkpoint, next seq, righe valide, record persi) di un journal."""
+    with open(journal_path, "r", encoding="utf-8", newline="") as journal_file:
+        lines = journal_file.read().split("\n")
+    header = lines[0].split("\t") if lines else []
+    if len(header) != 4 or header[0] != _CHECKPOINT or _crc("\t".join(header[:3])) != header[3]:
+        # checkpoint illeggibile: non si sa quale parte del CSV è durevole
+        return None, 0, [], max(len([line for line in lines if line]) - 1, 0)
+    csv_size, seq = int(header[1]), int(header[2])
+
+    rows, lost = [], 0
+    records = lines[1:]
+    # l'ultimo elemento è "" se il file termina con "\n"; altrimenti è un record troncato
+    for index, line in enumerate(records):
+        if not line and index == len(records) - 1:
+            break
+        parts = line.split("\t", 2)
+        valid = (len(parts) == 3 and parts[0].isdigit() and int(parts[0]) == seq
+                 and _crc(f"{parts[0]}\t{parts[2]}") == parts[1] and index < len(records) - 1)
+        if not valid:
+            lost = len([rest for rest in records[index:] if rest])
+            break
+        rows.append(json.loads(parts[2]))
+        seq += 1
+    return csv_size, seq, rows, lost
+
+
+def _truncate_torn_tail(csv_path: str) -> int:
+    """Taglia un'eventuale riga incompleta in fondo al CSV (senza "\\n" finale); restituisce i byte tolti."""
+    if not os.path.exists(csv_path):
+        return 0
+    with open(csv_path, "rb+") as csv_file:
+        data = csv_file.read()
+        if not data or data.endswith(b"\n"):
+            return 0
+        keep = data.rfind(b"\n") + 1
+        csv_file.truncate(keep)
+        return len(data) - keep
+
+
+def _encode_rows(rows: list) -> list[bytes]:
+    encoded = []
+    for row in rows:
+        buffer = io.StringIO(newline="")
+        csv.writer(buffer).writerow(row)
+        encoded.append(buffer.getvalue().encode("utf-8"))
+    return encoded
+
+
+def recover(csv_path: str) -> RecoveryReport:
+    """Repair a CSV after an unclean shutdown and delete its journal.
+
+    A missing CSV is created only when the journal holds rows to restore.
+
+    Args:
+        csv_path: The metrics CSV.
+
+    Returns:
+        The RecoveryReport; its next_seq continues the sequence of the old journal.
+    """
+    journal_path = csv_path + JOURNAL_SUFFIX
+    if not os.path.exists(journal_path):
+        return RecoveryReport(csv_path, 0, 0, _truncate_torn_tail(csv_path), 0)
+
+    csv_size, next_seq, rows, lost = _read_journal(journal_path)
+    if not os.path.exists(csv_path):
+        if not rows:
+            os.remove(journal_path)
+            return RecoveryReport(csv_path, 0, lost, 0, next_seq)
+        open(csv_path, "a", encoding="utf-8").close()
+    restored, discarded = 0, 0
+    with open(csv_path, "rb+") as csv_file:
+        data = csv_file.read()
+        if csv_size is None or len(data) < csv_size:
+            # checkpoint illeggibile o CSV più corto del checkpoint: si conserva il CSV così com'è
+            csv_size = len(data)
+        tail = data[csv_size:]
+        encoded = _encode_rows(rows)
+        # righe del journal già presenti e intatte nel CSV
+        intact, offset = 0, 0
+        while intact < len(encoded) and tail.startswith(encoded[intact], offset):
+            offset += len(encoded[intact])
+            intact += 1
+        if intact == len(encoded) and b"\0" not in tail[offset:]:
+            # CSV più avanti del journal (finestra di commit non ancora sincronizzata):
+            # le righe intere si tengono, un'eventuale riga troncata la taglia _truncate_torn_tail
+            offset = len(tail)
+        if offset != len(tail) or intact != len(encoded):
+            restored, discarded = len(encoded) - intact, len(tail) - offset
+            csv_file.truncate(csv_size + offset)
+            csv_file.seek(csv_size + offset)
+            csv_file.write(b"".join(encoded[intact:]))
+            csv_file.flush()
+            os.fsync(csv_file.fileno())
+    discarded += _truncate_torn_tail(csv_path)
+    os.remove(journal_path)
+    return RecoveryReport(csv_path, restored, lost, discarded, next_seq)
+
+
+def recover_folder(folder: str) -> list[RecoveryReport]:
+    """Recover every journaled CSV left in `folder` by an unclean shutdown."""
+    reports = []
+    for journal_path in sorted(glob.glob(os.path.join(folder, "*.csv" + JOURNAL_SUFFIX))):
+        reports.append(recover(journal_path[:-len(JOURNAL_SUFFIX)]))
+    return reports
@@ -2,19 +2,69 @@
 CSV-based metrics logger for the Slot Machine application.
 
 Handles session lifecycle and gameplay event logging.
-All writes are append-only and execute on the GUI thread.
+All writes are append-only; rows are formatted on the calling (GUI) thread.
+
+The CSV file stays open for the lifetime of the logger. Rows are buffered and
+written in one go when the flush policy triggers: every `flush_rows` rows, when
+`flush_interval_ms` have passed since the last flush, on SESSION_END, and on
+flush()/close(). With `fsync=True` every flush is also forced to disk (os.fsync):
+rows survive a power loss, at the cost of a disk sync per flush.
+
+With `async_writes=True` the calling thread only formats the row (timestamp
+included) and puts it on a bounded queue; a dedicated writer thread appends it to
+the file, so a slow disk never stalls the Qt event loop. When the queue is full
+the policy decides: "block" waits for the writer (no row is ever lost), "drop"
+discards BET/MEX rows and counts them in `dropped_rows` (session lifecycle rows
+always block). log_session_end() and close() wait until the queue is drained and
+flushed, so no row is lost at sys.exit(). An error never stops the writer thread:
+it is re-raised by the next flush()/close(). I/O errors keep the rows for the next
+flush; the rows of a flush that failed otherwise (e.g. a malformed row) are
+discarded and counted in `failed_rows`.
+
+With `journal=True` every flush first appends its rows to a write-ahead journal
+(core/metrics_journal.py) and only then to the CSV. The writer thread commits all
+the rows already waiting in the queue together (group commit), and fsyncs the
+journal once per commit window: after `journal_commit_rows` rows or at most
+`journal_commit_ms` after the first unsynced row (the queue timeout is the timer,
+so a quiet session is synced too). SESSION_END, flush() and close() always sync;
+a power loss loses at most the rows of the open window. Without the writer thread
+the journal is synced at every flush. At startup an unclean previous run of the same
+file is recovered (torn tail cut, missing rows rewritten) and reported as a MEX row.
+
+Every event is also fanned out, as a MetricsEvent, to the secondary sinks
+(core/metrics_sinks.py: mirror CSV, JSON Lines, SQLite, ring buffer, socket). Each
+sink has its own queue, thread and batching, and its failures are isolated: the
+CSV above stays the primary record and never waits for them. `sqlite=True` adds
+the SQLite sink of the data directory (core/metrics_sqlite.py).
+
+Defaults come from the METRICS_* constants in core/constants.py.
 """
 
+import atexit
 import csv
 import os
+import queue
+import threading
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Sequence
+from core.constants import METRICS_ASYNC, METRICS_FLUSH_INTERVAL_MS, METRICS_FLUSH_ROWS, METRICS_FSYNC
+from core.constants import METRICS_JOURNAL, METRICS_JOURNAL_CHECKPOINT_ROWS, METRICS_JOURNAL_COMMIT_MS
+from core.constants import METRICS_JOURNAL_COMMIT_ROWS, METRICS_QUEUE_POLICY, METRICS_QUEUE_SIZE
+from core.constants import METRICS_SINK_CLOSE_TIMEOUT_S, METRICS_SINKS, METRICS_SQLITE
+from core.metrics_journal import MetricsJournal, RecoveryReport, recover
+from core.metrics_sinks import CSV_COLUMNS, MetricsEvent, SinkWorker, SqliteSink, parse_sink
+from core.money import format_cents
 from utils.build_config import BUILD_CONDITION, MESSAGE_TYPE
 from utils.file_manager import get_writable_path
 
-# CSV column headers (updated schema)
-# TIMESTAMP | EVENT | BET_NUMBER | BET | CONDITION | RESULT | COIN | MESSAGE
-_CSV_COLUMNS = ["TIMESTAMP", "EVENT", "BET_NUMBER", "BET", "CONDITION", "RESULT", "COIN", "MESSAGE"]
+# colonne del CSV: CSV_COLUMNS in core/metrics_sinks.py
+
+# eventi che non vengono mai scartati con la policy "drop"
+_LIFECYCLE_EVENTS = ("SESSION_START", "START_METRICS", "SESSION_END")
+# comandi per il thread di scrittura
+_FLUSH = object()
+_STOP = object()
 
 
 def _build_metrics_csv_path() -> str:
@@ -56,9 +106,44 @@ class MetricsLogger:
 
     Args:
         csv_path: Path to the output CSV file. Created if it does not exist.
+        flush_rows: Flush after this many buffered rows (1 = every event).
+        flush_interval_ms: Flush when a row is logged at least this many ms after the
+            last flush (0 = disabled).
+        fsync: Also os.fsync the file at every flush.
+        async_writes: Write from a background thread through a bounded queue.
+        queue_size: Maximum rows waiting for the writer thread.
+        queue_policy: "block" or "drop" when the queue is full.
+        journal: Write-ahead journal the rows and recover the file at startup.
+        checkpoint_rows: Journaled rows between two checkpoints (CSV fsync + journal reset).
+        journal_commit_ms: Async mode: fsync the journal at most this many ms after its
+            first unsynced row.
+        journal_commit_rows: Async mode: fsync the journal once this many rows are unsynced.
+        sqlite: Also insert the rows into the data directory's SQLite database.
+        sinks: Secondary sinks (objects or "name[:argument]" specs, see parse_sink);
+            None = METRICS_SINKS.
+
+    Raises:
+        ValueError: Unknown queue_policy, or invalid sink spec.
     """
 
-    def __init__(self, csv_path: str = None) -> None:
+    def __init__(
+        self,
+        csv_path: str = None,
+        flush_rows: int = METRICS_FLUSH_ROWS,
+        flush_interval_ms: int = METRICS_FLUSH_INTERVAL_MS,
+        fsync: bool = METRICS_FSYNC,
+        async_writes: bool = METRICS_ASYNC,
+        queue_size: int = METRICS_QUEUE_SIZE,
+        queue_policy: str = METRICS_QUEUE_POLICY,
+        journal: bool = METRICS_JOURNAL,
+        checkpoint_rows: int = METRICS_JOURNAL_CHECKPOINT_ROWS,
+        journal_commit_ms: int = METRICS_JOURNAL_COMMIT_MS,
+        journal_commit_rows: int = METRICS_JOURNAL_COMMIT_ROWS,
+        sqlite: bool = METRICS_SQLITE,
+        sinks: Optional[Sequence] = None,
+    ) -> None:
+        if queue_policy not in ("block", "drop"):
+            raise ValueError(f"queue_policy must be 'block' or 'drop', got {queue_policy!r}")
         if csv_path is None:
             # csv_path = get_writable_path("data", "metrics.csv") # OLD: fixed path, now dynamic per build/condition/message
             csv_path = _build_metrics_csv_path()
@@ -67,11 +152,52 @@ class MetricsLogger:
         # Ensure the dist/data/ directory exists
         os.makedirs(os.path.dirname(self._csv_path), exist_ok=True) # crea la cartella data se non esiste, anche per le build in cui il csv è salvato in dist/data/metrics.csv
         
+        # sink secondari: ognuno con coda e thread propri (SinkWorker);
+        # costruiti per primi: una spec errata fallisce prima di aprire CSV e journal
+        sinks = list(METRICS_SINKS if sinks is None else sinks)
+        if sqlite and not any(isinstance(sink, SqliteSink) or str(sink).startswith("sqlite") for sink in sinks):
+            sinks.append("sqlite")
+        self.sinks = [SinkWorker(parse_sink(sink, self._csv_path) if isinstance(sink, str) else sink) for sink in sinks]
+
         self._metrics_enabled: bool = False
         self._current_condition: Optional[str] = None
-        # Create file with headers if it does not exist
-        if not os.path.exists(self._csv_path):
-            self._write_row(_CSV_COLUMNS)
+
+        # politica di flush
+        self._flush_rows = max(1, flush_rows)
+        self._flush_interval = flush_interval_ms / 1000
+        self._fsync = fsync
+        self._pending: list = []  # righe in attesa del prossimo flush
+        self._last_flush = time.monotonic()
+        self._file = None
+        self._writer = None
+
+        # journal: recupero di un'eventuale chiusura non pulita prima di riaprire il file
+        self._journaled = journal
+        self._checkpoint_rows = max(1, checkpoint_rows)
+        self._commit_interval = max(journal_commit_ms, 0) / 1000
+        self._commit_rows = max(1, journal_commit_rows)
+        self._journal: Optional[MetricsJournal] = None
+        self.recovery_report: Optional[RecoveryReport] = recover(self._csv_path) if journal else None
+        # il nuovo journal prosegue la numerazione di quello recuperato (e di quelli chiusi in seguito)
+        self._journal_seq = self.recovery_report.next_seq if self.recovery_report is not None else 0
+        self._open()
+
+        # scrittura asincrona: coda limitata + thread dedicato (avviato al primo evento)
+        self._queue: Optional[queue.Queue] = queue.Queue(maxsize=max(1, queue_size)) if async_writes else None
+        self._queue_policy = queue_policy
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._writer_error: Optional[BaseException] = None
+        self.dropped_rows = 0
+        self.failed_rows = 0  # righe scartate dal thread di scrittura dopo un errore non di I/O
+        self._exit_hook = False
+
+        if self.recovery_report is not None and not self.recovery_report.clean:
+            print(f"[METRICS] {self._csv_path}: {self.recovery_report.describe()}")
+            self._log(event_type="MEX", message=self.recovery_report.describe())
+        # righe ancora nel buffer all'uscita dell'interprete (es. sys.exit senza closeEvent);
+        # registrato solo a logger completo, così un __init__ fallito non lascia un close() rotto
+        self._register_exit_hook()
 
     # ------------------------------------------------------------------
     # Public API
@@ -109,20 +235,121 @@ class MetricsLogger:
         self._log(event_type="SESSION_START")
 
     def log_session_end(self) -> None:
-        """Logs the SESSION_END event. Always executed regardless of metrics_enabled."""
+        """Logs the SESSION_END event and flushes it (waits for the writer queue to drain).
+
+        Always executed regardless of metrics_enabled.
+        """
         self._log(event_type="SESSION_END")
+        self.flush()
+
+    def flush(self) -> None:
+        """Writes the buffered rows to the file (and fsyncs it if enabled).
+
+        In async mode waits until every row queued so far has been written.
+
+        Raises:
+            OSError: The writer thread failed to write (async mode).
+            Exception: Any other error raised by a write on the writer thread (e.g. a
+                malformed row); the rows of that flush are discarded (`failed_rows`).
+            RuntimeError: The writer thread is no longer running.
+        """
+        for worker in self.sinks:
+            worker.flush()
+        if self._queue is None:
+            self._flush_now()
+            return
+        thread = self._thread
+        if thread is not None:
+            if not thread.is_alive():
+                # join() non terminerebbe mai: nessuno consuma più la coda
+                self._raise_writer_error()
+                raise RuntimeError("Metrics writer thread is not running; close() writes the queued rows")
+            self._queue.put(_FLUSH)
+            self._queue.join()
+        self._raise_writer_error()
+
+    def close(self) -> None:
+        """Drains the queue, flushes the buffered rows and closes the file; a later event reopens it."""
+        if self._exit_hook:
+            # logger chiuso: l'interprete non deve più tenerlo in vita (un evento successivo lo riregistra)
+            atexit.unregister(self.close)
+            self._exit_hook = False
+        with self._thread_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            if thread.is_alive():
+                self._queue.put(_STOP)
+                thread.join()
+            self._drain_queue()  # righe rimaste in coda se il thread si era fermato
+        self._flush_now()
+        if self._file is not None:
+            if self._journal is not None:
+                # chiusura pulita: CSV durevole, il journal non serve più
+                os.fsync(self._file.fileno())
+                self._journal.remove()
+                self._journal_seq = self._journal.next_seq
+                self._journal = None
+            self._file.close()
+            self._file = None
+            self._writer = None
+        # sink secondari chiusi in parallelo, con un'unica attesa massima
+        deadline = time.monotonic() + METRICS_SINK_CLOSE_TIMEOUT_S
+        for worker, thread in [(worker, worker.stop(deadline)) for worker in self.sinks]:
+            worker.join(thread, deadline)
+        self._raise_writer_error()
+
+    def _flush_now(self, commit: bool = False) -> None:
+        """Scrive il buffer; con commit=True il journal viene sincronizzato anche a finestra aperta."""
+        if self._pending:
+            if self._file is None:
+                self._open()
+            rows = self._pending
+            if self._journal is not None:
+                self._journal.append(rows, sync=False)  # prima il journal, poi il CSV
+            self._writer.writerows(rows)
+            self._pending = []
+        if self._file is not None:
+            self._file.flush()
+            if self._fsync:
+                os.fsync(self._file.fileno())
+            if self._journal is not None:
+                if self._journal.records_since_checkpoint >= self._checkpoint_rows:
+                    self._checkpoint()  # CSV fsync-ato: la finestra aperta è già durevole
+                elif commit or self._queue is None or self._commit_due():
+                    self._journal.sync()
+        self._last_flush = time.monotonic()
+
+    def _commit_due(self) -> bool:
+        """Finestra di commit del journal scaduta (N righe o T ms dalla prima riga non sincronizzata)."""
+        journal = self._journal
+        return journal.unsynced_records > 0 and (
+            journal.unsynced_records >= self._commit_rows
+            or time.monotonic() - journal.unsynced_since >= self._commit_interval)
+
+    def _checkpoint(self) -> None:
+        """Rende durevole il CSV e riparte con un journal vuoto."""
+        os.fsync(self._file.fileno())
+        self._journal.checkpoint(os.fstat(self._file.fileno()).st_size)
 
     # OLD: BET e RESULT erano separati in due eventi diversi
     # NEW: BET e RESULT sono accorpati: il salvataggio unico avviene nel momento in cui il risultato compare allo user
-    def log_bet(self, bet_number: int, bet: float, result_gain: float, current_coin: float) -> None:
+    def log_bet(
+        self,
+        bet_number: int,
+        bet_cents: int,
+        result_gain_cents: int,
+        current_coin_cents: int,
+        symbols: Optional[Sequence[int]] = None,
+    ) -> None:
         """Logs a BET event. Only written when metrics_enabled is True.
         after the user made a bet, the result appears and just this log is called
         
         Args:
             bet_number: Current bet number.
-            bet: The bet amount placed by the user.
-            result_gain: The Gain of the spin (positive for wins = +reward, negative for losses = -bet).
-            current_coin: Coin balance after the spin result is applied.
+            bet_cents: The bet amount placed by the user, in integer cents.
+            result_gain_cents: The Gain of the spin in cents (positive for wins = +reward, negative for losses = -bet).
+            current_coin_cents: Coin balance in cents after the spin result is applied.
+            symbols: Symbol IDs shown on the 3 reels (optional).
         """
         if not self._metrics_enabled:
             return
@@ -130,9 +357,10 @@ class MetricsLogger:
         self._log(
             event_type="BET",
             bet_number=bet_number,
-            bet=bet,
-            result_gain=result_gain,
-            coin=current_coin,
+            bet_cents=bet_cents,
+            result_gain_cents=result_gain_cents,
+            coin_cents=current_coin_cents,
+            symbols=symbols,
         )
 
     # ------------------------------------------------------------------
@@ -155,10 +383,15 @@ class MetricsLogger:
         # FIX: method was missing → remote_researcher.remote_change_condition() would crash.
         self._log(event_type="MEX", message=f"CHANGE_CONDITION={new_condition}")
 
-    def log_remote_charge_coin(self, amount: float, coin_after: float) -> None:
-        """Logs a coin charge triggered remotely."""
+    def log_remote_charge_coin(self, amount_cents: int, coin_after_cents: int) -> None:
+        """Logs a coin charge triggered remotely.
+
+        Args:
+            amount_cents: Charged amount in cents.
+            coin_after_cents: Coin balance after the charge, in cents.
+        """
         # FIX: method was missing → remote_researcher.remote_charge_coin() would crash.
-        self._log(event_type="MEX", coin=coin_after, message=f"CHARGE_COIN added={amount:.2f}")
+        self._log(event_type="MEX", coin_cents=coin_after_cents, message=f"CHARGE_COIN added={format_cents(amount_cents)}")
 
 
     # ------------------------------------------------------------------
@@ -168,46 +401,156 @@ class MetricsLogger:
         self,
         event_type: str,
         bet_number: Optional[int] = None,
-        bet: Optional[float] = None,
+        bet_cents: Optional[int] = None,
         condition: Optional[str] = None,
-        result_gain: Optional[float] = None,
-        coin: Optional[float] = None,
+        result_gain_cents: Optional[int] = None,
+        coin_cents: Optional[int] = None,
         message: Optional[str] = None,
+        symbols: Optional[Sequence[int]] = None,
     ) -> None:
-        """Writes a single row to the CSV file.
+        """Builds the event, buffers its CSV row and hands it to the secondary sinks.
 
         Args:
             event_type: The type of event being logged.
             bet_number: Current bet number (optional).
-            bet: Bet amount (optional).
+            bet_cents: Bet amount in cents (optional).
             condition: Current condition (optional).
-            result_gain: The gain or loss of the spin (optional).
-            coin: Coin balance at time of event (optional).
+            result_gain_cents: The gain or loss of the spin in cents (optional).
+            coin_cents: Coin balance in cents at time of event (optional).
             message: Additional message string (optional).
+            symbols: Symbol IDs of the 3 reels (optional).
         """
         # mantieni fino ai centesimi
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-4]
 
-        row = [
-            timestamp,
-            event_type,
-            f"{bet_number}" if bet_number is not None else "",
-            f"{bet:.2f}" if bet is not None else "",
-            f"{condition}" if condition is not None else "",
-            f"{result_gain:.2f}" if result_gain is not None else "",
-            f"{coin:.2f}" if coin is not None else "",
-            message or "",
-        ]
+        event = MetricsEvent(
+            timestamp=timestamp,
+            event=event_type,
+            bet_number=bet_number,
+            bet_cents=bet_cents,
+            condition=condition,
+            result_cents=result_gain_cents,
+            coin_cents=coin_cents,
+            message=message,
+            symbols=tuple(int(symbol) for symbol in symbols) if symbols is not None else None,
+        )
 
-        self._write_row(row)
+        self._write_row(event.csv_row())
+        for worker in self.sinks:
+            worker.put(event)
+
+    def _open(self) -> None:
+        """Apre (o crea) il CSV in append e scrive l'header se il file è vuoto."""
+        self._file = open(self._csv_path, "a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        if self._file.tell() == 0:
+            self._writer.writerow(CSV_COLUMNS)
+            self._file.flush()
+        if self._journaled:
+            # il primo checkpoint richiede che il CSV sia già durevole fino alla sua dimensione
+            os.fsync(self._file.fileno())
+            self._journal = MetricsJournal(self._csv_path, os.fstat(self._file.fileno()).st_size,
+                                           self._journal_seq)
+
+    def _register_exit_hook(self) -> None:
+        if not self._exit_hook:
+            atexit.register(self.close)
+            self._exit_hook = True
 
     def _write_row(self, row: list) -> None:
-        """Appends a single row to the CSV file.
+        """Buffers a single row (or queues it for the writer thread in async mode).
 
         Args:
             row: List of values to write.
         """
-        #apre + crea il file
-        with open(self._csv_path, "a", newline="", encoding="utf-8") as csv_file:
-            writer = csv.writer(csv_file)
-            writer.writerow(row)
\ No newline at end of file
+        self._register_exit_hook()  # dopo close() un nuovo evento riapre il file
+        if self._queue is None:
+            self._buffer_row(row)
+            return
+        self._start_writer()
+        if self._queue_policy == "drop" and row[1] not in _LIFECYCLE_EVENTS:
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self.dropped_rows += 1
+            return
+        self._queue.put(row)
+
+    def _buffer_row(self, row: list, defer: bool = False) -> None:
+        """Aggiunge la riga al buffer e fa flush secondo la politica (N righe / T ms).
+
+        Con defer=True (altre righe già in coda) il flush per numero di righe è rimandato,
+        così le righe arrivate insieme finiscono in un solo flush (group commit).
+        """
+        self._pending.append(row)
+        if ((not defer and len(self._pending) >= self._flush_rows)
+                or (self._flush_interval and time.monotonic() - self._last_flush >= self._flush_interval)):
+            self._flush_now()
+
+    def _start_writer(self) -> None:
+        with self._thread_lock:
+            if self._thread is None:
+                # daemon: all'uscita l'hook atexit (close) svuota la coda prima che il thread venga fermato
+                self._thread = threading.Thread(target=self._writer_loop, name="MetricsLoggerWriter", daemon=True)
+                self._thread.start()
+
+    def _writer_loop(self) -> None:
+        """Thread di scrittura: unico proprietario di buffer e file finché è attivo."""
+        while True:
+            timeout = self._flush_interval or None
+            journal = self._journal
+            if journal is not None and journal.unsynced_since is not None:
+                # timer della finestra di commit: una sessione inattiva viene comunque sincronizzata
+                remaining = max(journal.unsynced_since + self._commit_interval - time.monotonic(), 0)
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                # coda inattiva: flush per tempo anche senza nuove righe
+                self._guarded(self._flush_now)
+                continue
+            try:
+                if item is _STOP:
+                    return
+                if item is _FLUSH:
+                    self._guarded(self._flush_now, True)
+                else:
+                    self._guarded(self._buffer_queued_row, item)
+            finally:
+                self._queue.task_done()
+
+    def _buffer_queued_row(self, row: list) -> None:
+        # group commit: se altre righe sono già in coda il flush aspetta l'ultima
+        defer = (self._journal is not None and not self._queue.empty()
+                 and len(self._pending) < self._queue.maxsize)
+        self._buffer_row(row, defer)
+
+    def _drain_queue(self) -> None:
+        """Scrive dal thread chiamante le righe rimaste in coda (thread di scrittura fermo)."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _FLUSH and item is not _STOP:
+                self._guarded(self._buffer_row, item)
+            self._queue.task_done()
+
+    def _guarded(self, function, *args) -> None:
+        # nessun errore deve fermare il thread (flush() e close() attenderebbero per sempre la coda):
+        # viene conservato e rilanciato al prossimo flush()/close()
+        try:
+            function(*args)
+        except OSError as error:
+            self._writer_error = error  # I/O: le righe restano nel buffer e il prossimo flush riprova
+        except Exception as error:
+            # riga malformata o errore inatteso: il batch viene scartato, altrimenti
+            # ogni flush successivo fallirebbe di nuovo sulla stessa riga
+            self.failed_rows += len(self._pending)
+            self._pending = []
+            self._writer_error = error
+
+    def _raise_writer_error(self) -> None:
+        error, self._writer_error = self._writer_error, None
+        if error is not None:
+            raise error
\ No newline at end of file
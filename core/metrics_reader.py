@@ -0,0 +1,117 @@
+"""
+Streaming reader for the metrics CSV files written by MetricsLogger.
+
+Splits a file into sessions (SESSION_START ... next SESSION_START / end of file),
+keeping the condition from START_METRICS, every BET row with its amounts in integer
+cents, and the researcher MEX events (CHANGE_CONDITION, CHARGE_COIN) at their
+position in the bet sequence. Amounts are parsed from their decimal text without
+going through float, so they round-trip exactly with format_cents.
+
+Used by the calibration, replay and verification tools; works on files with or
+without the SYMBOLS column.
+"""
+
+import csv
+import glob
+import os
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+import numpy as np
+
+from core.constants import normalize_condition
+from core.money import parse_cents
+
+
+@dataclass
+class SessionEvent:
+    """A MEX row inside a session.
+
+    Attributes:
+        position: Number of BET rows logged before the event (0 = before the first bet).
+        kind: "CHANGE_CONDITION", "CHARGE_COIN" or "MEX" (free text message).
+        value: New condition, charged amount in cents, or the raw message.
+        coin_cents: COIN column of the row, if logged.
+        line: Line number in the CSV file.
+    """
+
+    position: int
+    kind: str
+    value: object
+    coin_cents: Optional[int]
+    line: int
+
+
+@dataclass
+class SessionLog:
+    """One session of a metrics CSV (BET columns as parallel lists)."""
+
+    path: str
+    line: int
+    condition: Optional[str] = None
+    bet_numbers: list = field(default_factory=list)
+    bets_cents: list = field(default_factory=list)
+    results_cents: list = field(default_factory=list)
+    coins_cents: list = field(default_factory=list)
+    lines: list = field(default_factory=list)
+    events: list = field(default_factory=list)
+    ended: bool = False
+
+    @property
+    def n_bets(self) -> int:
+        return len(self.bets_cents)
+
+
+def _event(position: int, message: str, coin_cents: Optional[int], line: int) -> SessionEvent:
+    # formati di MetricsLogger: "CHANGE_CONDITION=WIN", "CHARGE_COIN added=5.00"
+    if message.startswith("CHANGE_CONDITION="):
+        condition = normalize_condition(message.split("=", 1)[1])
+        return SessionEvent(position, "CHANGE_CONDITION", condition, coin_cents, line)
+    if message.startswith("CHARGE_COIN"):
+        amount = parse_cents(message.split("=", 1)[1]) if "=" in message else None
+        return SessionEvent(position, "CHARGE_COIN", amount, coin_cents, line)
+    return SessionEvent(position, "MEX", message, coin_cents, line)
+
+
+def iter_sessions(path: str) -> Iterator[SessionLog]:
+    """Yield the sessions of one metrics CSV in file order (rows before the first SESSION_START are skipped)."""
+    session = None
+    with open(path, "r", newline="", encoding="utf-8") as csv_file:
+        for line, row in enumerate(csv.DictReader(csv_file), start=2):
+            event = row.get("EVENT", "")
+            if event == "SESSION_START":
+                if session is not None:
+                    yield session
+                session = SessionLog(path=path, line=line)
+            elif session is None:
+                continue
+            elif event == "START_METRICS":
+                session.condition = normalize_condition(row.get("CONDITION", ""))
+            elif event == "BET":
+                session.bet_numbers.append(int(row["BET_NUMBER"]))
+                session.bets_cents.append(parse_cents(row["BET"]))
+                session.results_cents.append(parse_cents(row["RESULT"]))
+                session.coins_cents.append(parse_cents(row["COIN"]))
+                session.lines.append(line)
+            elif event == "MEX":
+                session.events.append(_event(session.n_bets, row.get("MESSAGE", ""), parse_cents(row.get("COIN", "")), line))
+            elif event == "SESSION_END":
+                session.ended = True
+    if session is not None:
+        yield session
+
+
+def metrics_files(folder: str) -> list[str]:
+    """File metrics*.csv di una cartella (ordinati per nome), oppure il file stesso se `folder` è un CSV."""
+    if os.path.isfile(folder):
+        return [folder]
+    return sorted(glob.glob(os.path.join(folder, "metrics*.csv")))
+
+
+def bet_distribution(paths: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Distribuzione empirica delle puntate (BET rows) dei file: (importi distinti in centesimi, conteggi)."""
+    bets = [bet for path in paths for session in iter_sessions(path) for bet in session.bets_cents]
+    if not bets:
+        raise ValueError(f"No BET rows found in {len(paths)} metrics file(s)")
+    values, counts = np.unique(np.asarray(bets, dtype=np.int64), return_counts=True)
+    return values, counts
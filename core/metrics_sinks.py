@@ -0,0 +1,373 @@
+"""
+Secondary sinks for the metrics events.
+
+MetricsLogger builds one MetricsEvent per logged event (raw values, amounts in
+integer cents) and fans it out: the per-participant CSV stays the primary record
+(flush policy, journal, recovery in core/metrics_logger.py), and every secondary
+sink gets the same event through its own SinkWorker:
+
+    CsvSink         mirror CSV (e.g. on a USB stick or a network share)
+    JsonLinesSink   one JSON object per event
+    SqliteSink      data/metrics.sqlite (core/metrics_sqlite.py)
+    RingBufferSink  last N events in memory (live view, debugging)
+    SocketSink      JSON lines over TCP (e.g. to the researcher's machine)
+
+Each worker has its own bounded queue, thread and batching (every `batch_rows`
+events or `flush_interval_ms`). The logger only does a put_nowait: when a worker's
+queue is full the event is dropped for that sink and counted in `dropped`, and an
+exception raised by a sink is caught, counted in `errors` and printed once per
+failure streak. A slow or broken secondary sink never delays the primary CSV or
+the other sinks.
+
+Sinks are configured with METRICS_SINKS in core/constants.py as "name[:argument]"
+specs (see parse_sink), or passed to MetricsLogger(sinks=[...]).
+"""
+
+import csv
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from collections import deque
+from typing import NamedTuple, Optional, Protocol
+
+from core.constants import METRICS_SINK_BATCH_ROWS, METRICS_SINK_CLOSE_TIMEOUT_S, METRICS_SINK_FLUSH_INTERVAL_MS
+from core.constants import METRICS_SINK_QUEUE_SIZE
+from core.metrics_sqlite import MetricsDatabase, database_path
+from core.money import format_cents
+
+# CSV column headers (updated schema)
+# TIMESTAMP | EVENT | BET_NUMBER | BET | CONDITION | RESULT | COIN | MESSAGE | SYMBOLS
+# SYMBOLS: Symbol ID dei 3 rulli di una BET, es. "3-3-6" (vuoto negli altri eventi e nei CSV precedenti)
+CSV_COLUMNS = ["TIMESTAMP", "EVENT", "BET_NUMBER", "BET", "CONDITION", "RESULT", "COIN", "MESSAGE", "SYMBOLS"]
+
+# comandi per il thread di un sink
+_FLUSH = object()
+_STOP = object()
+
+
+class MetricsEvent(NamedTuple):
+    """One logged event with raw values (amounts in integer cents, None = empty)."""
+
+    timestamp: str
+    event: str
+    bet_number: Optional[int] = None
+    bet_cents: Optional[int] = None
+    condition: Optional[str] = None
+    result_cents: Optional[int] = None
+    coin_cents: Optional[int] = None
+    message: Optional[str] = None
+    symbols: Optional[tuple] = None
+
+    def csv_row(self) -> list:
+        """Riga nel formato del CSV delle metriche (CSV_COLUMNS)."""
+        return [
+            self.timestamp,
+            self.event,
+            f"{self.bet_number}" if self.bet_number is not None else "",
+            format_cents(self.bet_cents) if self.bet_cents is not None else "",
+            f"{self.condition}" if self.condition is not None else "",
+            format_cents(self.result_cents) if self.result_cents is not None else "",
+            format_cents(self.coin_cents) if self.coin_cents is not None else "",
+            self.message or "",
+            "-".join(str(symbol) for symbol in self.symbols) if self.symbols is not None else "",
+        ]
+
+    def json_line(self) -> str:
+        return json.dumps(self._asdict(), ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+class MetricsSink(Protocol):
+    """A secondary destination of the metrics events (called from its SinkWorker thread only)."""
+
+    def write_batch(self, events: list) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class CsvSink:
+    """Mirror CSV with the same columns as the primary file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = None
+        self._writer = None
+
+    def write_batch(self, events: list) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", newline="", encoding="utf-8")
+            self._writer = csv.writer(self._file)
+            if self._file.tell() == 0:
+                self._writer.writerow(CSV_COLUMNS)
+        self._writer.writerows(event.csv_row() for event in events)
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class JsonLinesSink:
+    """One JSON object per event, with the raw values (cents as integers)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = None
+
+    def write_batch(self, events: list) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write("".join(event.json_line() for event in events))
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SqliteSink:
+    """Rows of one CSV file inserted into the SQLite database of its data directory."""
+
+    def __init__(self, database: str, file: str) -> None:
+        self._database = MetricsDatabase(database)
+        self._file = file
+
+    def write_batch(self, events: list) -> None:
+        self._database.write(self._file, [event.csv_row() for event in events])
+
+    def close(self) -> None:
+        self._database.close()
+
+
+class RingBufferSink:
+    """Keeps the last `capacity` events in memory; snapshot() can be read from any thread."""
+
+    def __init__(self, capacity: int = 1000) -> None:
+        self._events = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def write_batch(self, events: list) -> None:
+        with self._lock:
+            self._events.extend(events)
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return list(self._events)
+
+    def close(self) -> None:
+        pass
+
+
+class SocketSink:
+    """Sends the events as JSON lines over TCP; reconnects on the next batch after an error.
+
+    Args:
+        host: Receiver host.
+        port: Receiver TCP port.
+        timeout: Connect/send timeout in seconds.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float = 2.0) -> None:
+        self.address = (host, port)
+        self._timeout = timeout
+        self._socket: Optional[socket.socket] = None
+
+    def write_batch(self, events: list) -> None:
+        if self._socket is None:
+            self._socket = socket.create_connection(self.address, timeout=self._timeout)
+        try:
+            self._socket.sendall("".join(event.json_line() for event in events).encode("utf-8"))
+        except OSError:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+class SinkWorker:
+    """Own queue, thread and batching of one secondary sink; never blocks nor raises to the caller.
+
+    Args:
+        sink: The secondary sink.
+        queue_size: Events waiting for the sink; further events are dropped (`dropped`).
+        batch_rows: Write a batch every this many events.
+        flush_interval_ms: Write the pending events after this many ms without a full batch.
+    """
+
+    def __init__(
+        self,
+        sink: MetricsSink,
+        queue_size: int = METRICS_SINK_QUEUE_SIZE,
+        batch_rows: int = METRICS_SINK_BATCH_ROWS,
+        flush_interval_ms: int = METRICS_SINK_FLUSH_INTERVAL_MS,
+    ) -> None:
+        self.sink = sink
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._batch_rows = max(1, batch_rows)
+        self._flush_interval = max(flush_interval_ms, 1) / 1000
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        # contatori aggiornati sia dal thread del logger (put) sia da quello del sink (_write)
+        self._stats_lock = threading.Lock()
+        self._dropped = 0
+        self._errors = 0
+        self._last_error: Optional[BaseException] = None
+
+    @property
+    def name(self) -> str:
+        return type(self.sink).__name__
+
+    @property
+    def dropped(self) -> int:
+        """Events not written to the sink (queue full, or lost in a failed batch)."""
+        with self._stats_lock:
+            return self._dropped
+
+    @property
+    def errors(self) -> int:
+        """Exceptions raised by the sink."""
+        with self._stats_lock:
+            return self._errors
+
+    @property
+    def last_error(self) -> Optional[BaseException]:
+        """Exception of the current failure streak (None once the sink writes again)."""
+        with self._stats_lock:
+            return self._last_error
+
+    def put(self, event: MetricsEvent) -> None:
+        """Accoda l'evento senza mai attendere (coda piena -> evento scartato per questo sink)."""
+        self._start()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            with self._stats_lock:
+                self._dropped += 1
+
+    def flush(self) -> None:
+        """Chiede al thread di scrivere gli eventi in attesa (senza attendere)."""
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._queue.put_nowait(_FLUSH)
+            except queue.Full:
+                pass  # il thread scrive comunque a ogni batch completo
+
+    def close(self, timeout: float = METRICS_SINK_CLOSE_TIMEOUT_S) -> None:
+        """Writes the queued events and closes the sink, waiting at most `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        self.join(self.stop(deadline), deadline)
+
+    def stop(self, deadline: float) -> Optional[threading.Thread]:
+        """Chiede al thread di scrivere la coda e chiudere il sink; restituisce il thread da attendere.
+
+        Con la coda piena attende un posto per il comando di stop fino a `deadline` (time.monotonic()).
+        """
+        with self._thread_lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                return None
+            try:
+                self._queue.put(_STOP, timeout=max(deadline - time.monotonic(), 0))
+            except queue.Full:
+                # sink bloccato: il thread (daemon) resta attivo con gli eventi in coda
+                print(f"[METRICS] sink {self.name} is stuck with a full queue: "
+                      f"{self._queue.qsize()} events will not be written")
+                return None
+        return thread
+
+    def join(self, thread: Optional[threading.Thread], deadline: float) -> None:
+        """Attende il thread restituito da stop() fino a `deadline` (time.monotonic())."""
+        if thread is None:
+            return
+        thread.join(max(deadline - time.monotonic(), 0))
+        if thread.is_alive():
+            print(f"[METRICS] sink {self.name} did not close in time ({self._queue.qsize()} events still queued)")
+
+    def _start(self) -> None:
+        # un solo thread per sink: il successivo parte solo quando il precedente è terminato
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name=f"MetricsSink-{self.name}", daemon=True)
+                self._thread.start()
+
+    def _loop(self) -> None:
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = _FLUSH
+            if item is _STOP:
+                self._write(batch)
+                self._guarded(self.sink.close)
+                return
+            if item is not _FLUSH:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self._flush_interval
+                if len(batch) < self._batch_rows:
+                    continue
+            self._write(batch)
+            batch, deadline = [], None
+
+    def _write(self, batch: list) -> None:
+        if batch and not self._guarded(self.sink.write_batch, batch):
+            with self._stats_lock:
+                self._dropped += len(batch)
+
+    def _guarded(self, function, *args) -> bool:
+        # isolamento: un sink secondario che fallisce non ferma né il logger né gli altri sink
+        try:
+            function(*args)
+        except Exception as error:
+            with self._stats_lock:
+                first = self._last_error is None
+                self._errors += 1
+                self._last_error = error
+            if first:
+                print(f"[METRICS] sink {self.name} failed: {error!r} (events are dropped until it recovers)")
+            return False
+        with self._stats_lock:
+            self._last_error = None
+        return True
+
+
+def parse_sink(spec: str, csv_path: str) -> MetricsSink:
+    """Builds a secondary sink of the CSV `csv_path` from "name[:argument]".
+
+    Names: "csv:folder" (copy of the CSV with the same name in another folder),
+    "jsonl[:path]" (default <file>.jsonl),
+    "sqlite[:path]" (default metrics.sqlite in the CSV folder), "ring[:capacity]",
+    "socket:host:port".
+
+    Raises:
+        ValueError: Unknown sink name, or missing mirror folder or socket address.
+    """
+    name, _, argument = spec.partition(":")
+    name = name.strip().lower()
+    stem = os.path.splitext(csv_path)[0]
+    if name == "csv":
+        if not argument:
+            raise ValueError("CSV sink needs a folder, e.g. csv:/media/usb/data")
+        return CsvSink(os.path.join(argument, os.path.basename(csv_path)))
+    if name == "jsonl":
+        return JsonLinesSink(argument or stem + ".jsonl")
+    if name == "sqlite":
+        return SqliteSink(argument or database_path(os.path.dirname(csv_path)), os.path.basename(csv_path))
+    if name == "ring":
+        return RingBufferSink(int(argument or 1000))
+    if name == "socket":
+        host, _, port = argument.rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f"Socket sink needs host:port, got {argument!r}")
+        return SocketSink(host, int(port))
+    raise ValueError(f"Unknown metrics sink {name!r}: use csv, jsonl, sqlite, ring or socket")
@@ -0,0 +1,208 @@
+"""
+SQLite sink for the metrics rows.
+
+One database per data directory (data/metrics.sqlite) collects the rows of every
+metrics CSV written there, so cross-participant questions become one query instead
+of parsing hundreds of files:
+
+    SELECT condition, bet_number, AVG(coin_cents) FROM events
+    WHERE event = 'BET' GROUP BY condition, bet_number
+
+The database runs in WAL mode: readers (analysis scripts, a second kiosk) never
+block the writer and always see whole transactions, even while a session is being
+logged. The SqliteSink of MetricsLogger (core/metrics_sinks.py) hands over its
+batches and each one is inserted in a single transaction with executemany (one
+prepared statement per batch).
+
+Tables:
+    sessions(id, file, started, condition)   one row per SESSION_START
+    events(id, session, file, timestamp, event, bet_number, bet_cents, condition,
+           result_cents, coin_cents, message, symbols)
+
+events.condition is the condition in force when the row was logged (START_METRICS,
+then every CHANGE_CONDITION), so BET rows can be filtered by condition directly.
+Amounts are integer cents, as everywhere else.
+
+Existing CSV files can be imported (files already in the database are skipped):
+
+    python -m core.metrics_sqlite data
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+from typing import Optional
+
+from core.constants import normalize_condition
+from core.money import parse_cents
+
+DATABASE_NAME = "metrics.sqlite"
+
+# stesso ordine di CSV_COLUMNS in core/metrics_sinks.py
+_COLUMNS = ("TIMESTAMP", "EVENT", "BET_NUMBER", "BET", "CONDITION", "RESULT", "COIN", "MESSAGE", "SYMBOLS")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    started TEXT,
+    condition TEXT
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    session INTEGER REFERENCES sessions(id),
+    file TEXT NOT NULL,
+    timestamp TEXT,
+    event TEXT NOT NULL,
+    bet_number INTEGER,
+    bet_cents INTEGER,
+    condition TEXT,
+    result_cents INTEGER,
+    coin_cents INTEGER,
+    message TEXT,
+    symbols TEXT
+);
+CREATE INDEX IF NOT EXISTS events_session_condition_bet ON events(session, condition, bet_number);
+CREATE INDEX IF NOT EXISTS events_condition_bet ON events(condition, bet_number);
+CREATE INDEX IF NOT EXISTS sessions_file ON sessions(file);
+"""
+
+_INSERT_EVENT = """
+INSERT INTO events (session, file, timestamp, event, bet_number, bet_cents, condition,
+                    result_cents, coin_cents, message, symbols)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def database_path(folder: str) -> str:
+    """Database della cartella dati (es. data/metrics.sqlite)."""
+    return os.path.join(folder, DATABASE_NAME)
+
+
+class MetricsDatabase:
+    """Batched writer of metrics rows into the SQLite database of a data directory.
+
+    Used from one thread at a time (the SqliteSink worker thread, or the import CLI);
+    the connection is opened on the first write.
+
+    Args:
+        path: Database file; created with its schema if missing.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        # file -> (id della sessione corrente, condition corrente)
+        self._state: dict = {}
+
+    def write(self, file: str, rows: list) -> None:
+        """Insert the rows of one CSV file in a single transaction.
+
+        Args:
+            file: CSV file name the rows belong to (stored as given, e.g. "metrics_W_MEX2_3.csv").
+            rows: Rows as written to the CSV, in MetricsLogger column order (SYMBOLS optional).
+
+        Raises:
+            sqlite3.Error: The database cannot be written.
+        """
+        connection = self._connect()
+        session, condition = self._state.get(file) or self._last_session(file)
+        params = []
+        with connection:
+            for row in rows:
+                row = list(row) + [""] * (len(_COLUMNS) - len(row))
+                timestamp, event, bet_number, bet, row_condition, result, coin, message, symbols = row[:len(_COLUMNS)]
+                if event == "SESSION_START":
+                    # la riga della sessione serve subito per l'id: prima si inseriscono le righe precedenti
+                    connection.executemany(_INSERT_EVENT, params)
+                    params = []
+                    session = connection.execute("INSERT INTO sessions (file, started) VALUES (?, ?)",
+                                                 (file, timestamp)).lastrowid
+                    condition = None
+                elif event == "START_METRICS" and row_condition:
+                    condition = normalize_condition(row_condition)
+                    if session is not None:
+                        connection.execute("UPDATE sessions SET condition = ? WHERE id = ? AND condition IS NULL",
+                                           (condition, session))
+                elif event == "MEX" and message.startswith("CHANGE_CONDITION="):
+                    condition = normalize_condition(message.split("=", 1)[1])
+                params.append((session, file, timestamp, event, int(bet_number) if bet_number else None,
+                               parse_cents(bet), condition, parse_cents(result), parse_cents(coin),
+                               message or None, symbols or None))
+            connection.executemany(_INSERT_EVENT, params)
+        self._state[file] = (session, condition)
+
+    def has_file(self, file: str) -> bool:
+        return self.execute("SELECT 1 FROM events WHERE file = ? LIMIT 1", (file,)).fetchone() is not None
+
+    def execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        """Query di lettura sul database (es. analisi tra partecipanti)."""
+        return self._connect().execute(sql, params)
+
+    def close(self) -> None:
+        """Chiude la connessione (la prossima write la riapre)."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            # check_same_thread=False: creato sul thread della GUI, usato dal thread del sink
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")  # in WAL: durevole a ogni checkpoint, mai corrotto
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def _last_session(self, file: str) -> tuple[Optional[int], Optional[str]]:
+        # logger riaperto sullo stesso file: le righe proseguono l'ultima sessione registrata
+        last = self._connection.execute("SELECT id FROM sessions WHERE file = ? ORDER BY id DESC LIMIT 1",
+                                        (file,)).fetchone()
+        if last is None:
+            return None, None
+        condition = self._connection.execute(
+            "SELECT condition FROM events WHERE session = ? ORDER BY id DESC LIMIT 1", last).fetchone()
+        return last[0], condition[0] if condition else None
+
+
+def import_csv(database: MetricsDatabase, path: str, batch_rows: int = 10_000) -> int:
+    """Import one metrics CSV (skipped if its file name is already in the database); returns the rows imported."""
+    file = os.path.basename(path)
+    if database.has_file(file):
+        return 0
+    imported, batch = 0, []
+    with open(path, "r", newline="", encoding="utf-8") as csv_file:
+        for row in csv.DictReader(csv_file):
+            batch.append([row.get(column) or "" for column in _COLUMNS])
+            if len(batch) >= batch_rows:
+                database.write(file, batch)
+                imported, batch = imported + len(batch), []
+    if batch:
+        database.write(file, batch)
+        imported += len(batch)
+    return imported
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Import metrics CSV files into the SQLite database of a data folder.")
+    parser.add_argument("path", nargs="?", default="data", help="metrics CSV file or folder of metrics*.csv (default: data).")
+    parser.add_argument("--database", default=None, help=f"Database file (default: {DATABASE_NAME} in the CSV folder).")
+    args = parser.parse_args(argv)
+    from core.metrics_reader import metrics_files  # import locale: il logger usa questo modulo senza numpy
+
+    folder = args.path if os.path.isdir(args.path) else os.path.dirname(args.path)
+    database = MetricsDatabase(args.database or database_path(folder))
+    for path in metrics_files(args.path):
+        print(f"[SQLITE] {path}: {import_csv(database, path)} rows imported")
+    rows = database.execute(
+        "SELECT condition, COUNT(DISTINCT session), COUNT(*) FROM events WHERE event = 'BET' GROUP BY condition"
+    ).fetchall()
+    for condition, sessions, bets in rows:
+        print(f"[SQLITE] {condition or '?'}: {sessions} sessions, {bets} bets")
+    database.close()
+
+
+if __name__ == "__main__":
+    main()
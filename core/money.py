@@ -0,0 +1,63 @@
+"""
+Integer-cents money helpers.
+
+Budgets, bets and rewards travel through the reward pipeline, the coin balance
+and MetricsLogger as integer cents. Floats only appear at the edges: the bet
+typed in the GUI, the amounts shown on screen and the constants in constants.py.
+
+The rounding steps of the reward pipeline (percentages, multiplied rewards, the
+ideal multiplier) reproduce the original float engine bit for bit: the amounts
+are converted to coins and rounded with round(x, 2) exactly as before, so the
+metrics already collected replay identically. Exact half-cent results therefore
+follow the float value (e.g. 0.05 * 8.5 -> 0.43), not a half-even rule on cents.
+"""
+
+from typing import Optional
+
+CENTS_PER_UNIT = 100
+
+
+def to_cents(amount: float) -> int:
+    """Converte un importo (es. 97.2) in centesimi interi (9720), arrotondando al centesimo."""
+    return int(round(amount * CENTS_PER_UNIT))
+
+
+def from_cents(cents: int) -> float:
+    """Converte centesimi interi in un importo float (solo per visualizzazione)."""
+    return cents / CENTS_PER_UNIT
+
+
+def format_cents(cents: int) -> str:
+    """Formatta centesimi come stringa a 2 decimali senza passare dai float (es. -40 -> "-0.40")."""
+    sign = "-" if cents < 0 else ""
+    units, rest = divmod(abs(cents), CENTS_PER_UNIT)
+    return f"{sign}{units}.{rest:02d}"
+
+
+def parse_cents(text: str) -> Optional[int]:
+    """Converte un importo testuale ("1.70", "-0.4", "12") in centesimi interi senza float; "" -> None."""
+    text = text.strip()
+    if not text:
+        return None
+    sign = -1 if text.startswith("-") else 1
+    units, _, decimals = text.lstrip("+-").partition(".")
+    decimals = (decimals + "00")[:2]
+    return sign * (int(units or "0") * CENTS_PER_UNIT + int(decimals))
+
+
+def round_coins(amount: float) -> int:
+    """round(amount, 2) del motore originale in float, restituito in centesimi interi."""
+    return to_cents(round(amount, 2))
+
+
+def percent_of_cents(percentage: float, cents: int, plus_cents: int = 0) -> int:
+    """Quota percentuale di un importo (+ plus_cents), arrotondata al centesimo come il motore in float.
+
+    Es. 0.05 di 10020 -> 501; equivale a round(percentage * coins + plus, 2) sugli importi in coin.
+    """
+    return round_coins(percentage * from_cents(cents) + from_cents(plus_cents))
+
+
+def multiply_cents(cents: int, multiplier: float) -> int:
+    """Importo in centesimi moltiplicato per un moltiplicatore della tabella (es. 8.5x), arrotondato come round(bet * m, 2)."""
+    return round_coins(from_cents(cents) * multiplier)
@@ -0,0 +1,129 @@
+"""
+Process-pool Monte Carlo harness for the deterministic reward pipeline.
+
+Sessions are split into a fixed list of chunks that depends only on the
+requested conditions and session count, never on the number of workers.
+Each chunk receives its own child of `np.random.SeedSequence(seed).spawn`,
+so every chunk draws from an independent RNG stream and the merged
+summaries of a multi-process run match a single-process run with the same
+seed bit for bit.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from core.batch_simulator import simulate_batch
+from core.bet_strategies import BetStrategy, UniformBets
+from core.money import CENTS_PER_UNIT
+from core.schedule import LAYOUT
+from core.symbol_tables import spin_reels_batch
+
+# sessioni simulate per chunk: limita la memoria di ogni worker (~60 * 8 byte * 4 array per sessione)
+CHUNK_SESSIONS = 10_000
+
+
+def plan_chunks(conditions: list[str], n_sessions: int, chunk_sessions: int = CHUNK_SESSIONS) -> list[tuple[str, int]]:
+    """Lista deterministica di (condition, sessioni) indipendente dal numero di worker."""
+    jobs = []
+    for condition in conditions:
+        remaining = n_sessions
+        while remaining > 0:
+            size = min(chunk_sessions, remaining)
+            jobs.append((condition, size))
+            remaining -= size
+    return jobs
+
+
+def run_chunk(condition: str, n_sessions: int, seed: np.random.SeedSequence, keep_sessions: bool = False,
+              strategy: Optional[BetStrategy] = None) -> dict:
+    """Simula un chunk di sessioni con il proprio stream RNG e restituisce le statistiche parziali.
+
+    Args:
+        condition: Condition delle sessioni del chunk.
+        n_sessions: Numero di sessioni.
+        seed: SeedSequence figlia assegnata al chunk.
+        keep_sessions: Se True include anche gli array in centesimi bets/rewards/budgets e i
+            Symbol ID uint8 [N, T, 3] dei rulli (es. per il log CSV).
+        strategy: Generatore delle puntate (core/bet_strategies.py); default uniforme come in testing_statistics.
+    """
+    rng = np.random.default_rng(seed)
+    bets = (strategy or UniformBets()).bets(rng, n_sessions, condition)
+    result = simulate_batch(condition, bets)
+    budgets = result.budgets_cents / CENTS_PER_UNIT  # statistiche in coin
+    phase_ends = budgets[:, list(LAYOUT.phase_ends)]  # budget a fine di ogni fase (bet 20, 40, 60)
+    final = budgets[:, -1]
+    summary = {
+        "condition": condition,
+        "sessions": n_sessions,
+        "wins": int(np.count_nonzero(result.rewards_cents)),
+        "final_sum": float(final.sum()),
+        "final_sumsq": float(np.square(final).sum()),
+        "final_min": float(final.min()),
+        "final_max": float(final.max()),
+        "phase_end_sum": phase_ends.sum(axis=0).tolist(),
+    }
+    if keep_sessions:
+        summary["bets_cents"] = bets
+        summary["rewards_cents"] = result.rewards_cents
+        summary["budgets_cents"] = result.budgets_cents
+        # simboli estratti dopo le puntate sullo stesso stream: le bet non cambiano rispetto a keep_sessions=False
+        summary["symbols"] = spin_reels_batch(result.rewards_cents, result.multipliers, rng)
+    return summary
+
+
+def merge_summaries(summaries: list[dict]) -> dict:
+    """Unisce le statistiche parziali dei chunk (nell'ordine del piano) in un riepilogo per condition."""
+    merged: dict[str, dict] = {}
+    for part in summaries:
+        total = merged.setdefault(part["condition"], {
+            "sessions": 0, "wins": 0, "final_sum": 0.0, "final_sumsq": 0.0,
+            "final_min": float("inf"), "final_max": float("-inf"),
+            "phase_end_sum": [0.0] * len(part["phase_end_sum"]),
+        })
+        total["sessions"] += part["sessions"]
+        total["wins"] += part["wins"]
+        total["final_sum"] += part["final_sum"]
+        total["final_sumsq"] += part["final_sumsq"]
+        total["final_min"] = min(total["final_min"], part["final_min"])
+        total["final_max"] = max(total["final_max"], part["final_max"])
+        total["phase_end_sum"] = [a + b for a, b in zip(total["phase_end_sum"], part["phase_end_sum"])]
+    return merged
+
+
+def run_monte_carlo(
+    conditions: list[str],
+    n_sessions: int,
+    workers: int = 1,
+    seed: Optional[int] = None,
+    keep_sessions: bool = False,
+    chunk_sessions: int = CHUNK_SESSIONS,
+    strategy: Optional[BetStrategy] = None,
+) -> tuple[dict, list[dict], int]:
+    """Run n_sessions sessions per condition across a process pool.
+
+    Args:
+        conditions: Conditions to simulate ("EQUAL", "WIN", "LOSE").
+        n_sessions: Sessions per condition.
+        workers: Worker processes; 1 runs every chunk in the calling process.
+        seed: Root seed. None draws fresh OS entropy (returned so the run can be repeated).
+        keep_sessions: Keep the per-session arrays in each chunk result.
+        chunk_sessions: Sessions per chunk.
+        strategy: Bet strategy of every session (core/bet_strategies.py); None -> uniform bets.
+
+    Returns:
+        (merged per-condition summaries, chunk results in plan order, root entropy).
+    """
+    jobs = plan_chunks(conditions, n_sessions, chunk_sessions)
+    root = np.random.SeedSequence(seed)
+    seeds = root.spawn(len(jobs))
+
+    if workers <= 1:
+        parts = [run_chunk(condition, size, child, keep_sessions, strategy) for (condition, size), child in zip(jobs, seeds)]
+    else:
+        conditions_, sizes = zip(*jobs) if jobs else ((), ())
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # pool.map preserva l'ordine del piano → merge identico al run single-process
+            parts = list(pool.map(run_chunk, conditions_, sizes, seeds, [keep_sessions] * len(jobs), [strategy] * len(jobs)))
+    return merge_summaries(parts), parts, root.entropy
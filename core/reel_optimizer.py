@@ -0,0 +1,233 @@
+"""
+Reel-strip and pay-table optimizer.
+
+Searches symbol counts per reel and 2/3-of-a-kind payouts that meet a target RTP,
+hit rate and near-miss rate, starting from REEL_STRIPS / REEL_PAYTABLE in
+core/reel_strip.py:
+
+    python -m core.reel_optimizer --rtp 0.92 --hit-rate 0.35 --near-miss 0.12 --seed 1
+
+Every candidate is scored with the exact enumeration of core/reel_strip.py, batched:
+a whole neighbourhood of candidates is one einsum over [B, 9^3] combinations, so
+thousands of candidates are scored per second without sampling noise. Payline
+statistics depend only on how many stops each symbol has on each reel, so the
+search works on counts and `strips_from_counts` lays the stops out afterwards.
+"""
+
+import argparse
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from core.constants import Symbol
+from core.reel_strip import (
+    COMBINATION_OCCURRENCES, COMBINATION_WINNER, NEAR_MISS, N_SYMBOLS, REEL_PAYTABLE, REEL_STRIPS,
+    ReelStats, exact_stats, paytable_arrays, symbol_weights,
+)
+
+# passi delle mosse sulla paytable: 2-of-a-kind, 3-of-a-kind
+PAY_STEPS = (1, 5)
+
+
+@dataclass(frozen=True)
+class Targets:
+    """Target statistics and the weight of each relative error in the loss."""
+
+    rtp: float = 0.92
+    hit_rate: float = 0.35
+    near_miss: float = 0.12
+    weights: tuple = (10.0, 1.0, 1.0)
+
+
+@dataclass(frozen=True)
+class OptimizationResult:
+    """Best candidate found by optimize().
+
+    Attributes:
+        counts: [3, 9] stops per Symbol ID on each reel.
+        strips: Strip layout built from counts (see strips_from_counts).
+        paytable: Symbol -> {occurrences: multiplier}.
+        stats: Exact statistics of the candidate.
+        loss: Weighted squared relative error against the targets.
+        evaluated: Number of candidates scored.
+        history: Best loss after every iteration.
+    """
+
+    counts: np.ndarray
+    strips: tuple
+    paytable: dict
+    stats: ReelStats
+    loss: float
+    evaluated: int
+    history: list = field(default_factory=list)
+
+
+def counts_from_strips(strips) -> np.ndarray:
+    """Numero di stop per simbolo su ogni rullo [3, 9] (int64)."""
+    return symbol_weights(strips).astype(np.int64)
+
+
+def strips_from_counts(counts: np.ndarray) -> tuple:
+    """Dispone gli stop di ogni rullo distribuendo ogni simbolo in modo uniforme lungo il nastro.
+
+    Le statistiche sulla payline non dipendono dall'ordine degli stop; la disposizione
+    a intervalli regolari evita solo blocchi di simboli uguali visibili sul rullo.
+    """
+    strips = []
+    for reel_counts in np.asarray(counts):
+        stops = [((index + 0.5) / count, int(symbol))
+                 for symbol, count in enumerate(reel_counts.tolist()) for index in range(count)]
+        strips.append(tuple(Symbol(symbol) for _, symbol in sorted(stops)))
+    return tuple(strips)
+
+
+def paytable_from_arrays(pays: np.ndarray) -> dict:
+    """Inverso di paytable_arrays: [4, 9] -> Symbol -> {3: pay3, 2: pay2}.
+
+    Raises:
+        ValueError: A payout is not a whole number (int() lo troncherebbe in silenzio, 2.9 -> 2).
+    """
+    fractional = [(symbol.name, occurrences, float(pays[occurrences, symbol]))
+                  for symbol in Symbol for occurrences in (3, 2) if pays[occurrences, symbol] % 1]
+    if fractional:
+        raise ValueError(f"Payouts must be whole numbers, got {fractional}")
+    return {symbol: {3: int(pays[3, symbol]), 2: int(pays[2, symbol])} for symbol in Symbol}
+
+
+def batch_stats(counts: np.ndarray, pays: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Exact RTP, hit rate and near-miss rate of B candidates at once.
+
+    Args:
+        counts: [B, 3, 9] stops per symbol on each reel.
+        pays: [B, 4, 9] paytables as returned by paytable_arrays (rows = occurrences).
+
+    Returns:
+        (rtp[B], hit_rate[B], near_miss[B]).
+    """
+    probabilities = counts / counts.sum(axis=2, keepdims=True)
+    combinations = np.einsum("bi,bj,bk->bijk", probabilities[:, 0], probabilities[:, 1], probabilities[:, 2])
+    combinations = combinations.reshape(len(counts), -1)
+    payouts = pays[:, COMBINATION_OCCURRENCES, COMBINATION_WINNER]
+    rtp = (combinations * payouts).sum(axis=1)
+    hit_rate = (combinations * (payouts > 0)).sum(axis=1)
+    near_miss = combinations[:, NEAR_MISS].sum(axis=1)
+    return rtp, hit_rate, near_miss
+
+
+def batch_loss(counts: np.ndarray, pays: np.ndarray, targets: Targets) -> np.ndarray:
+    """Somma pesata degli errori relativi al quadrato rispetto ai target, per ogni candidato."""
+    values = batch_stats(counts, pays)
+    goals = (targets.rtp, targets.hit_rate, targets.near_miss)
+    return sum(weight * ((value - goal) / goal) ** 2 for value, goal, weight in zip(values, goals, targets.weights))
+
+
+def _neighbours(counts: np.ndarray, pays: np.ndarray, size: int, rng: np.random.Generator,
+                tune_paytable: bool) -> tuple[np.ndarray, np.ndarray]:
+    """size candidati vicini: sposta uno stop tra due simboli di un rullo oppure modifica un payout."""
+    new_counts = np.repeat(counts[None], size, axis=0)
+    new_pays = np.repeat(pays[None], size, axis=0)
+    rows = np.arange(size)
+    pay_move = rng.random(size) < (0.5 if tune_paytable else 0.0)
+
+    # mosse sul nastro: ogni simbolo mantiene almeno uno stop per rullo
+    reel = rng.integers(0, 3, size=size)
+    source = rng.integers(0, N_SYMBOLS, size=size)
+    target = rng.integers(0, N_SYMBOLS, size=size)
+    strip_move = ~pay_move & (source != target) & (counts[reel, source] > 1)
+    new_counts[rows[strip_move], reel[strip_move], source[strip_move]] -= 1
+    new_counts[rows[strip_move], reel[strip_move], target[strip_move]] += 1
+
+    # mosse sulla paytable: payout non negativi e tris sempre più ricco della coppia
+    occurrence = rng.integers(2, 4, size=size)
+    symbol = rng.integers(0, N_SYMBOLS, size=size)
+    step = np.where(occurrence == 2, PAY_STEPS[0], PAY_STEPS[1]) * rng.choice((-1, 1), size=size)
+    new_pays[rows[pay_move], occurrence[pay_move], symbol[pay_move]] += step[pay_move]
+    invalid = (new_pays < 0).any(axis=(1, 2)) | (new_pays[:, 3] <= new_pays[:, 2]).any(axis=1)
+    new_pays[invalid] = pays
+    return new_counts, new_pays
+
+
+def optimize(
+    targets: Targets = Targets(),
+    strips=REEL_STRIPS,
+    paytable: Optional[dict] = None,
+    iterations: int = 300,
+    neighbours: int = 512,
+    tune_paytable: bool = True,
+    seed: Optional[int] = None,
+) -> OptimizationResult:
+    """Local search over strip counts and payouts, scored by exact enumeration.
+
+    Each iteration scores `neighbours` random one-step moves of the current candidate in
+    one batch and moves to the best one when it lowers the loss.
+
+    Args:
+        targets: Target RTP, hit rate and near-miss rate.
+        strips: Starting strips (Symbol IDs per reel); only the counts per symbol matter.
+        paytable: Starting paytable; defaults to REEL_PAYTABLE.
+        iterations: Search iterations.
+        neighbours: Candidates scored per iteration.
+        tune_paytable: If False only the strips change.
+        seed: Seed of the move generator.
+    """
+    rng = np.random.default_rng(seed)
+    counts = counts_from_strips(strips)
+    pays = paytable_arrays(paytable)
+    loss = float(batch_loss(counts[None], pays[None], targets)[0])
+    evaluated, history = 1, []
+
+    for _ in range(iterations):
+        candidate_counts, candidate_pays = _neighbours(counts, pays, neighbours, rng, tune_paytable)
+        losses = batch_loss(candidate_counts, candidate_pays, targets)
+        evaluated += neighbours
+        best = int(np.argmin(losses))
+        if losses[best] < loss:
+            counts, pays, loss = candidate_counts[best], candidate_pays[best], float(losses[best])
+        history.append(loss)
+
+    best_strips = strips_from_counts(counts)
+    best_paytable = paytable_from_arrays(pays)
+    return OptimizationResult(
+        counts=counts,
+        strips=best_strips,
+        paytable=best_paytable,
+        stats=exact_stats(best_strips, best_paytable),
+        loss=loss,
+        evaluated=evaluated,
+        history=history,
+    )
+
+
+def _print_result(result: OptimizationResult, elapsed: float) -> None:
+    stats = result.stats
+    print(f"[OPTIMIZER] {result.evaluated} candidates in {elapsed:.2f}s ({result.evaluated / elapsed:.0f}/s), loss={result.loss:.3g}")
+    print(f"[OPTIMIZER] RTP={stats.rtp:.4%} hit_rate={stats.hit_rate:.4%} near_miss={stats.near_miss:.4%}")
+    print("  Simbolo  │ R1 │ R2 │ R3 │ pay3 │ pay2")
+    for symbol in Symbol:
+        reels = " │ ".join(f"{count:2d}" for count in result.counts[:, symbol])
+        pays = result.paytable[symbol]
+        print(f"  {symbol.label:<8} │ {reels} │ {pays[3]:4d} │ {pays[2]:4d}")
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Optimize reel strips and paytable for target RTP / hit rate / near-miss rate.")
+    parser.add_argument("--rtp", type=float, default=Targets.rtp)
+    parser.add_argument("--hit-rate", type=float, default=Targets.hit_rate)
+    parser.add_argument("--near-miss", type=float, default=Targets.near_miss)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--neighbours", type=int, default=512)
+    parser.add_argument("--strips-only", action="store_true", help="Keep REEL_PAYTABLE fixed and only move stops.")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    targets = Targets(rtp=args.rtp, hit_rate=args.hit_rate, near_miss=args.near_miss)
+    start = time.perf_counter()
+    result = optimize(targets, iterations=args.iterations, neighbours=args.neighbours,
+                      tune_paytable=not args.strips_only, seed=args.seed)
+    _print_result(result, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
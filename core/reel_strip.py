@@ -0,0 +1,236 @@
+"""
+Reel-strip slot engine (maintained version of core/OLD/RealVersion/slot_logic_real.py).
+
+Each reel is a fixed strip of stops and the three reels are sampled independently,
+so the outcome emerges from the symbol distribution on the strips instead of being
+decided up front like in the deterministic engine (core/slot_logic.py).
+
+    - sampling: one AliasTable per reel over the symbol weights of its strip, O(1)
+      per reel and per spin whatever the strip length (non-uniform stop weights,
+      i.e. "virtual reels", are supported through `stop_weights`)
+    - exact statistics: RTP, hit rate, near-miss rate and per-symbol 2/3-of-a-kind probabilities are
+      computed by enumerating every strip combination (20^3 stops, grouped by symbol
+      into a vectorized 9^3 product of per-reel probabilities), no Monte Carlo needed
+
+Payouts are multipliers of the total bet, as in the OLD calculate_reward; rewards in
+integer cents use the same rounding as the rest of the pipeline (multiply_cents).
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+from core.alias import AliasTable
+from core.constants import Symbol
+from core.engines import SpinOutcome
+from core.money import multiply_cents
+
+N_SYMBOLS = len(Symbol)
+
+# Nastri dei 3 rulli (20 stop ciascuno), stessa disposizione di slot_logic_real.py
+#
+#  Simbolo  │ R1 │ R2 │ R3
+#  ─────────┼────┼────┼────
+#  seven    │  1 │  1 │  1
+#  bar      │  1 │  1 │  1
+#  bell     │  2 │  1 │  1
+#  star     │  1 │  1 │  1
+#  diamond  │  1 │  1 │  1
+#  cherry   │  4 │  4 │  1   near-miss: R3 più avaro
+#  banana   │  3 │  3 │  7   filler abbondante sul 3° rullo
+#  grape    │  3 │  4 │  3
+#  lemon    │  4 │  4 │  4
+#
+#  exact_stats(): RTP 90.7625%, hit rate 38.625% (il commento OLD "~87.5%" era una stima da simulazione)
+_S = Symbol
+REEL_STRIPS = (
+    (_S.LEMON, _S.CHERRY, _S.GRAPE, _S.BANANA, _S.BELL,
+     _S.LEMON, _S.CHERRY, _S.GRAPE, _S.STAR, _S.BANANA,
+     _S.LEMON, _S.CHERRY, _S.BELL, _S.DIAMOND, _S.BANANA,
+     _S.LEMON, _S.GRAPE, _S.BAR, _S.CHERRY, _S.SEVEN),
+    (_S.GRAPE, _S.LEMON, _S.CHERRY, _S.BANANA, _S.BELL,
+     _S.GRAPE, _S.LEMON, _S.CHERRY, _S.STAR, _S.BANANA,
+     _S.GRAPE, _S.LEMON, _S.CHERRY, _S.DIAMOND, _S.BANANA,
+     _S.GRAPE, _S.LEMON, _S.BAR, _S.CHERRY, _S.SEVEN),
+    (_S.BANANA, _S.LEMON, _S.GRAPE, _S.BANANA, _S.BELL,
+     _S.BANANA, _S.LEMON, _S.GRAPE, _S.STAR, _S.BANANA,
+     _S.BANANA, _S.LEMON, _S.GRAPE, _S.DIAMOND, _S.BANANA,
+     _S.BANANA, _S.LEMON, _S.BAR, _S.CHERRY, _S.SEVEN),
+)
+del _S
+
+# Paytable: Symbol -> {occorrenze: moltiplicatore della puntata totale}
+REEL_PAYTABLE = {
+    Symbol.SEVEN:   {3: 100, 2: 10},
+    Symbol.BAR:     {3: 50,  2: 5},
+    Symbol.BELL:    {3: 40,  2: 4},
+    Symbol.STAR:    {3: 30,  2: 3},
+    Symbol.DIAMOND: {3: 25,  2: 2},
+    Symbol.CHERRY:  {3: 20,  2: 2},
+    Symbol.BANANA:  {3: 15,  2: 1},
+    Symbol.GRAPE:   {3: 15,  2: 1},
+    Symbol.LEMON:   {3: 10,  2: 1},
+}
+
+
+# ---------------COMBINATION TABLES---------
+# Tutte le 9^3 terne di simboli, indice = s1 * 81 + s2 * 9 + s3; dipendono solo dal numero di simboli.
+def _combination_tables() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    s1, s2, s3 = (axis.ravel() for axis in np.indices((N_SYMBOLS,) * 3))
+    three = (s1 == s2) & (s2 == s3)
+    two = ~three & ((s1 == s2) | (s2 == s3) | (s1 == s3))
+    occurrences = np.where(three, 3, np.where(two, 2, 0)).astype(np.int8)
+    # simbolo vincente di una coppia: s1 se compare anche su R2 o R3, altrimenti s2 (come calculate_reward OLD)
+    winner = np.where((s1 == s2) | (s1 == s3), s1, s2).astype(np.int8)
+    return np.stack([s1, s2, s3], axis=1).astype(np.uint8), occurrences, winner
+
+
+COMBINATIONS, COMBINATION_OCCURRENCES, COMBINATION_WINNER = _combination_tables()
+# near-miss: R1 e R2 allineati, R3 diverso (il tris "mancato per un rullo", es. cherry-cherry-banana)
+NEAR_MISS = (COMBINATIONS[:, 0] == COMBINATIONS[:, 1]) & (COMBINATIONS[:, 1] != COMBINATIONS[:, 2])
+
+
+def combination_index(symbols: np.ndarray) -> np.ndarray:
+    """Indice in COMBINATIONS di array di terne [..., 3] di Symbol ID."""
+    symbols = np.asarray(symbols, dtype=np.int64)
+    return (symbols[..., 0] * N_SYMBOLS + symbols[..., 1]) * N_SYMBOLS + symbols[..., 2]
+
+
+def paytable_arrays(paytable: dict = None) -> np.ndarray:
+    """Paytable come array [4, 9] (righe = occorrenze 0..3), comodo per le operazioni vettoriali."""
+    paytable = REEL_PAYTABLE if paytable is None else paytable
+    pays = np.zeros((4, N_SYMBOLS), dtype=np.float64)
+    for symbol, payouts in paytable.items():
+        for occurrence, payout in payouts.items():
+            pays[occurrence, int(symbol)] = payout
+    return pays
+
+
+def combination_payouts(paytable: dict = None) -> np.ndarray:
+    """Moltiplicatore pagato da ognuna delle 9^3 terne (0 se perdente)."""
+    return paytable_arrays(paytable)[COMBINATION_OCCURRENCES, COMBINATION_WINNER]
+
+
+def symbol_weights(strips: Sequence[Sequence[int]], stop_weights: Optional[Sequence[Sequence[float]]] = None) -> np.ndarray:
+    """Peso di ogni simbolo su ogni rullo [reels, 9]: numero di stop (o somma dei pesi degli stop)."""
+    weights = np.zeros((len(strips), N_SYMBOLS), dtype=np.float64)
+    for reel, strip in enumerate(strips):
+        stops = np.ones(len(strip)) if stop_weights is None else np.asarray(stop_weights[reel], dtype=np.float64)
+        np.add.at(weights[reel], np.asarray(strip, dtype=np.int64), stops)
+    return weights
+
+
+# ---------------EXACT STATISTICS---------
+@dataclass(frozen=True)
+class ReelStats:
+    """Exact statistics of a strip set + paytable (probabilities per spin).
+
+    Attributes:
+        rtp: Expected payout per unit bet.
+        hit_rate: Probability of a paying spin (any 2 or 3 of a kind with a non-zero payout).
+        near_miss: Probability of a near miss (reels 1 and 2 match, reel 3 differs; see NEAR_MISS).
+        p_three: [9] probability of three of a kind per Symbol ID.
+        p_two: [9] probability of two of a kind per Symbol ID (winning symbol as in calculate_reward).
+    """
+
+    rtp: float
+    hit_rate: float
+    near_miss: float
+    p_three: np.ndarray
+    p_two: np.ndarray
+
+
+def combination_probabilities(reel_probabilities: np.ndarray) -> np.ndarray:
+    """Probabilità delle 9^3 terne dato [3, 9] probabilità per rullo (prodotto esterno, rulli indipendenti)."""
+    p1, p2, p3 = reel_probabilities
+    return np.einsum("i,j,k->ijk", p1, p2, p3).ravel()
+
+
+def exact_stats(strips: Sequence[Sequence[int]] = REEL_STRIPS, paytable: dict = None,
+                stop_weights: Optional[Sequence[Sequence[float]]] = None) -> ReelStats:
+    """Compute RTP, hit rate, near-miss rate and per-symbol 2/3-of-a-kind probabilities by full enumeration.
+
+    Every combination of stops (20^3 for the default strips) is accounted for exactly:
+    stops are grouped by symbol per reel, then the 9^3 symbol triples are weighted by
+    the product of their per-reel probabilities.
+
+    Args:
+        strips: One sequence of Symbol IDs per reel (3 reels).
+        paytable: Symbol -> {occurrences: multiplier}; defaults to REEL_PAYTABLE.
+        stop_weights: Optional per-stop weights (virtual reels); uniform by default.
+    """
+    weights = symbol_weights(strips, stop_weights)
+    probabilities = combination_probabilities(weights / weights.sum(axis=1, keepdims=True))
+    payouts = combination_payouts(paytable)
+    p_three = np.bincount(COMBINATION_WINNER, weights=probabilities * (COMBINATION_OCCURRENCES == 3), minlength=N_SYMBOLS)
+    p_two = np.bincount(COMBINATION_WINNER, weights=probabilities * (COMBINATION_OCCURRENCES == 2), minlength=N_SYMBOLS)
+    return ReelStats(
+        rtp=float(probabilities @ payouts),
+        hit_rate=float(probabilities[payouts > 0].sum()),
+        near_miss=float(probabilities[NEAR_MISS].sum()),
+        p_three=p_three,
+        p_two=p_two,
+    )
+
+
+# ----------------ENGINE---------------
+class ReelStripEngine:
+    """Reel-strip engine: independent reels sampled through per-reel alias tables.
+
+    Args:
+        strips: One sequence of Symbol IDs per reel; defaults to REEL_STRIPS.
+        paytable: Symbol -> {occurrences: multiplier}; defaults to REEL_PAYTABLE.
+        stop_weights: Optional per-stop weights (virtual reels); uniform by default.
+    """
+
+    def __init__(self, strips: Sequence[Sequence[int]] = REEL_STRIPS, paytable: dict = None,
+                 stop_weights: Optional[Sequence[Sequence[float]]] = None) -> None:
+        if len(strips) != 3:
+            raise ValueError(f"Expected 3 reels, got {len(strips)}")
+        self.strips = tuple(tuple(Symbol(symbol) for symbol in strip) for strip in strips)
+        self.paytable = REEL_PAYTABLE if paytable is None else paytable
+        self._stop_weights = stop_weights
+        self._reels = [AliasTable(weights) for weights in symbol_weights(self.strips, stop_weights)]
+        self._payouts = combination_payouts(self.paytable)
+        self.condition = None
+
+    def stats(self) -> ReelStats:
+        """Statistiche esatte di questo engine (vedi exact_stats)."""
+        return exact_stats(self.strips, self.paytable, self._stop_weights)
+
+    def spin(self, rng: random.Random = random) -> tuple:
+        """Un giro: tupla di 3 Symbol, come spin_reels."""
+        return tuple(Symbol(reel.draw(rng)) for reel in self._reels)
+
+    def spin_batch(self, n_spins: int, rng: np.random.Generator = None) -> np.ndarray:
+        """n_spins giri in blocco: Symbol ID uint8 [n_spins, 3]."""
+        if rng is None:
+            rng = np.random.default_rng()
+        return np.stack([reel.sample(rng, n_spins) for reel in self._reels], axis=1).astype(np.uint8)
+
+    def payout(self, symbols: Sequence[int]) -> float:
+        """Moltiplicatore pagato da una terna (0 se perdente)."""
+        s1, s2, s3 = (int(symbol) for symbol in symbols)
+        return float(self._payouts[(s1 * N_SYMBOLS + s2) * N_SYMBOLS + s3])
+
+    def payouts(self, symbols: np.ndarray) -> np.ndarray:
+        """Versione vettoriale di payout per array [..., 3]."""
+        return self._payouts[combination_index(symbols)]
+
+    # interfaccia comune degli engine (core/engines.py)
+    def update_condition(self, condition: str) -> None:
+        """L'esito dipende solo dai nastri: la condition viene solo memorizzata."""
+        self.condition = condition
+
+    def reset(self) -> None:
+        """Nessuno stato di sessione: ogni giro è indipendente."""
+
+    def play_cents(self, budget_before_spin: int, bet_number: int, bet_cents: int, rng: random.Random = None) -> SpinOutcome:
+        """Un giro con puntata in centesimi: SpinOutcome(reward in centesimi, moltiplicatore o None, simboli)."""
+        symbols = self.spin(random if rng is None else rng)
+        multiplier = self.payout(symbols)
+        if multiplier == 0:
+            return SpinOutcome(0, None, symbols)
+        return SpinOutcome(multiply_cents(bet_cents, multiplier), multiplier, symbols)
@@ -1,6 +1,6 @@
 # FIX: removed 'from core import metrics_logger' — the module was never used directly
 # and the bare import shadows the constructor parameter of the same name, causing confusion.
-from core.slot_logic import update_condition
+from core.engines import get_engine
 from core.constants import VALID_CONDITIONS
 
 class RemoteResearcher:
@@ -96,7 +96,7 @@ class RemoteResearcher:
             self._current_condition = VALID_CONDITIONS[input_data.upper()]
         else: # è direttamente la condition in forma estesa (es. "EQUAL")
             self._current_condition = input_data.upper()  # accetta anche la forma completa (es. "EQUAL")
-        update_condition(self._current_condition)  # UNICA chiamata autorizzata: update_condition ha il ruolo di impostare i parametri interni in base alla CONDITION ricevuta
+        get_engine().update_condition(self._current_condition)  # UNICA chiamata autorizzata: update_condition ha il ruolo di impostare i parametri interni in base alla CONDITION ricevuta
 
 
     def get_current_condition(self) -> str:
@@ -112,9 +112,9 @@ class RemoteResearcher:
         self.set_condition(new_condition)  # passa dal metodo autorizzato
         self._metrics_logger.log_remote_change_condition(new_condition)
 
-    def remote_charge_coin(self, amount: float, current_coins: float) -> None:
-        """Stub: aggiunge coins da remoto (es. via TCP)."""
-        self._metrics_logger.log_remote_charge_coin(amount=amount, coin_after=current_coins)
+    def remote_charge_coin(self, amount_cents: int, coins_cents: int) -> None:
+        """Stub: aggiunge coins da remoto (es. via TCP); importi in centesimi come il saldo della GUI."""
+        self._metrics_logger.log_remote_charge_coin(amount_cents=amount_cents, coin_after_cents=coins_cents)
 
     def remote_send_message(self, message: str) -> None:
         """Stub: invia un messaggio da remoto (es. via TCP)."""
@@ -0,0 +1,152 @@
+"""
+Counterfactual replay of recorded sessions under every condition.
+
+Takes the exact BET sequence of each session in one or more metrics*.csv files and
+runs it through the reward pipeline under EQUAL, WIN and LOSE at once:
+
+    python -m core.replay data --output data/counterfactual.csv
+
+Each bet is replayed under its logged BET_NUMBER. Sessions that start at the
+same bet number (1 for a full session, e.g. 39 or 40 for a session started in the
+middle of the schedule) go through one simulate_batch call with that first_bet,
+all x 3 conditions at once, so a whole study folder is replayed in about the time
+it takes to parse the CSVs. Shorter sessions are padded with MIN_BET after their
+last bet: the budget of bet k only depends on the bets before it, so the padding
+never changes the replayed columns and is cut off afterwards. Sessions whose bet
+numbers are not consecutive (or fall outside the schedule) cannot be replayed and
+are skipped and listed, as in core/verify.py.
+
+Every replay starts from INITIAL_BUDGET at its first logged bet, with the logged
+bets only: researcher events (CHARGE_COIN, CHANGE_CONDITION) are not applied, and
+such sessions are flagged in the output.
+"""
+
+import argparse
+import csv
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from core.batch_simulator import CONDITION_CODES, simulate_batch
+from core.constants import MIN_BET, TOTAL_SESSION_BETS
+from core.metrics_reader import SessionLog, iter_sessions, metrics_files
+from core.money import format_cents, to_cents
+
+CONDITIONS = tuple(CONDITION_CODES)  # EQUAL, WIN, LOSE
+
+
+@dataclass(frozen=True)
+class Counterfactual:
+    """Replayed trajectories of S sessions.
+
+    Attributes:
+        sessions: The replayed SessionLog objects (sessions without bets are left out).
+        n_bets: [S] bets replayed per session.
+        budgets_cents: [S, 3, T + 1] coins in cents before the first logged bet and after
+            every bet, per condition in CONDITIONS order; columns past n_bets are padding.
+        skipped: "path:line reason" of every session with bets that could not be replayed.
+    """
+
+    sessions: list
+    n_bets: np.ndarray
+    budgets_cents: np.ndarray
+    skipped: list = field(default_factory=list)
+
+    def final_cents(self) -> np.ndarray:
+        """[S, 3] coins after the last replayed bet of each session."""
+        return self.budgets_cents[np.arange(len(self.sessions)), :, self.n_bets]
+
+
+def replay_sessions(sessions: list[SessionLog], schedules: Optional[dict] = None) -> Counterfactual:
+    """Replay the bet sequences of `sessions` under every condition (one vectorized batch).
+
+    Args:
+        sessions: Sessions read with core.metrics_reader.iter_sessions.
+        schedules: Optional compiled schedule overrides, as in simulate_batch.
+    """
+    replayed, skipped = [], []
+    for session in sessions:
+        if session.n_bets == 0:
+            continue
+        first = session.bet_numbers[0]
+        if session.bet_numbers != list(range(first, first + session.n_bets)):
+            skipped.append(f"{session.path}:{session.line} bet numbers are not consecutive")
+        elif first < 1 or first + session.n_bets - 1 > TOTAL_SESSION_BETS:
+            skipped.append(f"{session.path}:{session.line} bet numbers outside 1-{TOTAL_SESSION_BETS}")
+        else:
+            replayed.append(session)
+
+    n_bets = np.array([session.n_bets for session in replayed], dtype=np.int64)
+    width = int(n_bets.max()) if len(replayed) else 0
+    budgets = np.zeros((len(replayed), len(CONDITIONS), width + 1), dtype=np.int64)
+    # un batch per numero della prima bet: la colonna j è la bet first_bet + j
+    groups: dict = {}
+    for row, session in enumerate(replayed):
+        groups.setdefault(session.bet_numbers[0], []).append(row)
+    for first_bet, rows in groups.items():
+        group_width = int(n_bets[rows].max())
+        bets = np.full((len(rows), group_width), to_cents(MIN_BET), dtype=np.int64)
+        for index, row in enumerate(rows):
+            bets[index, :n_bets[row]] = replayed[row].bets_cents
+        # riga s * 3 + c = sessione s sotto la condition c
+        stacked = np.repeat(bets, len(CONDITIONS), axis=0)
+        conditions = list(CONDITIONS) * len(rows)
+        result = simulate_batch(conditions, stacked, schedules=schedules, first_bet=first_bet)
+        budgets[rows, :, :group_width + 1] = result.budgets_cents.reshape(len(rows), len(CONDITIONS), group_width + 1)
+    return Counterfactual(sessions=replayed, n_bets=n_bets, budgets_cents=budgets, skipped=skipped)
+
+
+def replay_folder(path: str, schedules: Optional[dict] = None) -> Counterfactual:
+    """Replay every session of a metrics CSV, or of every metrics*.csv in a folder."""
+    sessions = [session for file_path in metrics_files(path) for session in iter_sessions(file_path)]
+    return replay_sessions(sessions, schedules)
+
+
+def write_trajectories(counterfactual: Counterfactual, path: str) -> None:
+    """Scrive le traiettorie in formato lungo: una riga per sessione, condition controfattuale e bet."""
+    with open(path, "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["FILE", "LINE", "LOGGED_CONDITION", "HAS_EVENTS", "CONDITION",
+                         "BET_NUMBER", "BET", "LOGGED_COIN", "COIN"])
+        for row, session in enumerate(counterfactual.sessions):
+            has_events = int(any(event.kind != "MEX" for event in session.events))
+            for code, condition in enumerate(CONDITIONS):
+                trajectory = counterfactual.budgets_cents[row, code]
+                for index in range(counterfactual.n_bets[row]):
+                    writer.writerow([session.path, session.line, session.condition or "", has_events, condition,
+                                     session.bet_numbers[index], format_cents(session.bets_cents[index]),
+                                     format_cents(session.coins_cents[index]), format_cents(int(trajectory[index + 1]))])
+
+
+def _print_summary(counterfactual: Counterfactual) -> None:
+    final = counterfactual.final_cents() / 100
+    logged = np.array([session.condition or "?" for session in counterfactual.sessions])
+    print(f"[REPLAY] {len(counterfactual.sessions)} sessions, {int(counterfactual.n_bets.sum())} bets")
+    print(f"[REPLAY] {'logged condition':<18}{'sessions':>9}" + "".join(f"{condition:>10}" for condition in CONDITIONS))
+    for condition in sorted(set(logged.tolist())):
+        rows = logged == condition
+        means = "".join(f"{value:>10.2f}" for value in final[rows].mean(axis=0))
+        print(f"[REPLAY] {condition:<18}{int(rows.sum()):>9}{means}")
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded bet sequences under EQUAL, WIN and LOSE.")
+    parser.add_argument("path", nargs="?", default="data", help="metrics CSV file or folder of metrics*.csv (default: data).")
+    parser.add_argument("--output", default=None, help="Write the counterfactual trajectories to this CSV.")
+    args = parser.parse_args(argv)
+
+    counterfactual = replay_folder(args.path)
+    for skipped in counterfactual.skipped:
+        print(f"[REPLAY] session skipped, {skipped}")
+    if not counterfactual.sessions:
+        print(f"[REPLAY] no sessions with bets in {args.path}")
+        return
+    _print_summary(counterfactual)
+    if args.output:
+        write_trajectories(counterfactual, args.output)
+        print(f"[REPLAY] trajectories written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
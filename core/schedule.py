@@ -0,0 +1,172 @@
+"""
+Compiler for the per-condition outcome schedules.
+
+Turns the declarative session layout (SESSION_SCHEDULE in core/constants.py: any
+number of phases, each with its length, outcome map and win rule per condition)
+into one dense table per condition, indexed directly by bet number (index 0 unused):
+
+    rules[bet]        -> RULE_LOSS / RULE_RECOVER / RULE_INCREASE / RULE_DECREASE
+    percentages[bet]  -> EXPECTED_PERCENTAGE_INCREASES / DECREASES value for that bet
+    phases[bet]       -> index of the phase in the layout (0 = BEFORE, 1 = DURING, 2 = AFTER by default)
+
+SessionEngine reads one entry per bet (O(1) whatever the session length, no range
+membership tests and no index shifts), the batch simulator stacks the same tables
+into NumPy arrays and the GUI reads the session length and the message point from
+the compiled layout. Bets missing from an outcome map are compiled as losses.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from core.constants import SESSION_LAYOUT, SESSION_SCHEDULE, VALID_CONDITIONS
+from core.constants import EXPECTED_PERCENTAGE_INCREASES, EXPECTED_PERCENTAGE_DECREASES
+from core.layout import SessionLayout, compile_layout
+
+# Regole di reward (una per ogni ramo della logica deterministica)
+RULE_LOSS = 0       # nessuna vincita
+RULE_RECOVER = 1    # loss_recover: BEFORE, AFTER, DURING-EQUAL
+RULE_INCREASE = 2   # win_increase: DURING-WIN
+RULE_DECREASE = 3   # lose_increase: DURING-LOSE
+
+# nomi delle regole usati in SESSION_SCHEDULE
+RULE_NAMES = {"loss": RULE_LOSS, "recover": RULE_RECOVER, "increase": RULE_INCREASE, "decrease": RULE_DECREASE}
+
+
+def _is_per_condition(value) -> bool:
+    """In SESSION_SCHEDULE i dict con chiavi stringa ("EQUAL", ...) sono valori per condition."""
+    return isinstance(value, dict) and bool(value) and all(isinstance(key, str) for key in value)
+
+
+def _per_condition(value, condition: str):
+    return value.get(condition) if _is_per_condition(value) else value
+
+
+LAYOUT = SESSION_LAYOUT
+PHASE_NAMES = LAYOUT.phase_names
+
+
+@dataclass(frozen=True)
+class CompiledSchedule:
+    """Dense per-bet tables of one condition (index = bet number, entry 0 unused)."""
+
+    condition: str
+    rules: tuple
+    percentages: tuple
+    phases: tuple
+    layout: SessionLayout = LAYOUT
+
+    @property
+    def total_bets(self) -> int:
+        return len(self.rules) - 1
+
+    @property
+    def wins(self) -> tuple:
+        """True per le bet vincenti (qualsiasi regola diversa da RULE_LOSS)."""
+        return tuple(rule != RULE_LOSS for rule in self.rules)
+
+
+def check_during_maps(during_maps: dict, session_schedule=None) -> None:
+    """Validate per-condition outcome maps (the `during_maps` override of compile_schedule).
+
+    Keys must be valid condition names and bet keys of the per-condition phases, as the
+    phase reads them (1..length for relative phases, global bet numbers otherwise).
+
+    Raises:
+        ValueError: Unknown condition, or a bet key outside every per-condition phase.
+    """
+    session_schedule = SESSION_SCHEDULE if session_schedule is None else session_schedule
+    layout = LAYOUT if session_schedule is SESSION_SCHEDULE else compile_layout(session_schedule)
+    valid_keys = set()
+    for phase, bet_range in zip(session_schedule, layout.phase_ranges):
+        if _is_per_condition(phase["outcomes"]):
+            valid_keys.update(range(1, len(bet_range) + 1) if phase.get("relative", False) else bet_range)
+    conditions = tuple(VALID_CONDITIONS.values())
+    for condition, outcomes in during_maps.items():
+        if condition not in conditions:
+            raise ValueError(f"Unknown condition {condition!r} in the outcome maps: use {', '.join(conditions)}")
+        outside = sorted(key for key in outcomes if key not in valid_keys)
+        if outside:
+            raise ValueError(f"Bets {outside} of {condition} are outside the per-condition phases "
+                             f"({min(valid_keys, default=0)}-{max(valid_keys, default=0)})")
+
+
+def compile_schedule(
+    condition: str,
+    before_after: Optional[dict] = None,
+    during_maps: Optional[dict] = None,
+    increases: Optional[dict] = None,
+    decreases: Optional[dict] = None,
+    session_schedule=None,
+) -> CompiledSchedule:
+    """Compile the outcome schedule of one condition.
+
+    Every table defaults to the one in core/constants.py; overrides are used by the
+    simulation tools to evaluate alternative tables without editing constants.
+
+    Args:
+        condition: "EQUAL", "WIN" or "LOSE".
+        before_after: Replaces the outcome map of the phases whose map is shared by all
+            conditions (BEFORE/AFTER), keyed as in the phase (1-based index for relative phases).
+        during_maps: condition -> outcome map replacing the per-condition maps (DURING).
+        increases: EXPECTED_PERCENTAGE_INCREASES ("increase" wins), keyed by global bet number.
+        decreases: EXPECTED_PERCENTAGE_DECREASES ("decrease" wins), keyed by global bet number.
+        session_schedule: Phase layout in the SESSION_SCHEDULE format; defaults to SESSION_SCHEDULE.
+
+    Raises:
+        ValueError: Unknown condition or rule, invalid layout, a during_maps entry outside the
+            per-condition phases (see check_during_maps), or a "decrease" win without a
+            decrease checkpoint.
+    """
+    if condition not in VALID_CONDITIONS.values():
+        raise ValueError(f"Invalid condition: {condition}")
+    session_schedule = SESSION_SCHEDULE if session_schedule is None else session_schedule
+    layout = LAYOUT if session_schedule is SESSION_SCHEDULE else compile_layout(session_schedule)
+    if during_maps is not None:
+        check_during_maps(during_maps, session_schedule)
+    increases = EXPECTED_PERCENTAGE_INCREASES if increases is None else increases
+    decreases = EXPECTED_PERCENTAGE_DECREASES if decreases is None else decreases
+
+    total_bets = layout.total_bets
+    rules = [RULE_LOSS] * (total_bets + 1)
+    percentages = [0.0] * (total_bets + 1)
+    phases = [0] * (total_bets + 1)
+
+    for phase_index, (phase, bet_range) in enumerate(zip(session_schedule, layout.phase_ranges)):
+        outcomes = phase["outcomes"]
+        if _is_per_condition(outcomes):
+            outcomes = (during_maps if during_maps is not None else outcomes).get(condition, {})
+        elif before_after is not None:
+            outcomes = before_after
+        rule_name = _per_condition(phase.get("rule", "recover"), condition) or "loss"
+        if rule_name not in RULE_NAMES:
+            raise ValueError(f"Unknown rule {rule_name!r} in phase {phase['name']}: use {', '.join(RULE_NAMES)}")
+        rule = RULE_NAMES[rule_name]
+
+        for offset, bet_number in enumerate(bet_range):
+            phases[bet_number] = phase_index
+            key = offset + 1 if phase.get("relative", False) else bet_number
+            if not outcomes.get(key, False):
+                continue
+            rules[bet_number] = rule
+            if rule == RULE_INCREASE:
+                # default 0 if bet not in map: expected_reward = current_bet (minimal win)
+                percentages[bet_number] = increases.get(bet_number, 0)
+            elif rule == RULE_DECREASE:
+                if bet_number not in decreases:
+                    raise ValueError(f"Expected percentage decrease not defined for bet number {bet_number}. Check EXPECTED_PERCENTAGE_DECREASES map.")
+                percentages[bet_number] = decreases[bet_number]
+
+    return CompiledSchedule(condition=condition, rules=tuple(rules), percentages=tuple(percentages),
+                            phases=tuple(phases), layout=layout)
+
+
+# schedule compilati una sola volta per le condition valide
+SCHEDULES = {condition: compile_schedule(condition) for condition in VALID_CONDITIONS.values()}
+
+
+def get_schedule(condition: str) -> CompiledSchedule:
+    """Schedule precompilato della condition (ValueError se non valida)."""
+    try:
+        return SCHEDULES[condition]
+    except KeyError:
+        raise ValueError(f"Invalid condition: {condition}") from None
@@ -0,0 +1,109 @@
+"""
+Headless simulation entry point.
+
+Runs complete sessions of the deterministic reward pipeline without Qt or pygame:
+
+    python -m core.simulate --condition W --sessions 100000 --workers 8
+
+Only core modules and MetricsLogger are imported, so it starts in milliseconds and
+runs on headless CI boxes and batch nodes. By default bets are drawn uniformly in
+[MIN_BET, MAX_BET] with step BET_STEP, exactly like testing_statistics_v1/v2;
+--bets selects another strategy of core/bet_strategies.py, e.g. the empirical
+distribution of real sessions:
+
+    python -m core.simulate --sessions 100000 --bets empirical:data
+    python -m core.simulate --condition L --bets martingale:0.1
+
+Bets are drawn from per-chunk seeded RNG streams (see core/monte_carlo.py).
+"""
+
+import argparse
+import os
+
+from core.bet_strategies import BetStrategy, parse_strategy
+from core.constants import TOTAL_SESSION_BETS, VALID_CONDITIONS
+from core.metrics_logger import MetricsLogger
+from core.monte_carlo import run_monte_carlo
+
+
+def _log_sessions(metrics_logger: MetricsLogger, condition: str, part: dict) -> None:
+    """Scrive le sessioni simulate nel CSV con lo stesso ordine di eventi del TEST MODE."""
+    sessions = zip(part["bets_cents"], part["rewards_cents"], part["budgets_cents"], part["symbols"])
+    for bets, rewards, budgets, symbols in sessions:
+        metrics_logger.log_session_start()
+        metrics_logger.enable_metrics(condition=condition)
+        for index, (bet, reward, reels) in enumerate(zip(bets.tolist(), rewards.tolist(), symbols.tolist())):
+            metrics_logger.log_bet(
+                bet_number=index + 1,
+                bet_cents=bet,
+                result_gain_cents=reward if reward > 0 else -bet,
+                current_coin_cents=int(budgets[index + 1]),
+                symbols=reels,
+            )
+        metrics_logger.log_session_end()
+
+
+def run(conditions: list[str], n_sessions: int, workers: int, metrics_logger: MetricsLogger = None, seed: int = None,
+        strategy: BetStrategy = None) -> tuple[dict, int]:
+    """Simula n_sessions sessioni per ogni condition, distribuite su `workers` processi.
+
+    Returns:
+        (condition -> statistiche aggregate (vedi merge_summaries), seed radice usato per ripetere il run).
+    """
+    merged, parts, entropy = run_monte_carlo(
+        conditions, n_sessions, workers=workers, seed=seed, keep_sessions=metrics_logger is not None, strategy=strategy
+    )
+    if metrics_logger is not None:
+        for part in parts:
+            _log_sessions(metrics_logger, part["condition"], part)
+    return merged, entropy
+
+
+def _print_summary(merged: dict, seed: int) -> None:
+    print(f"[SIMULATE] seed={seed}")
+    for condition, total in merged.items():
+        sessions = total["sessions"]
+        mean = total["final_sum"] / sessions
+        std = max(total["final_sumsq"] / sessions - mean ** 2, 0.0) ** 0.5
+        phase_means = ", ".join(f"{value / sessions:.2f}" for value in total["phase_end_sum"])
+        win_rate = total["wins"] / (sessions * TOTAL_SESSION_BETS)
+        print(f"[SIMULATE] {condition}: sessions={sessions} win_rate={win_rate:.3f} "
+              f"final mean={mean:.2f} std={std:.2f} min={total['final_min']:.2f} max={total['final_max']:.2f} "
+              f"phase_end_means=[{phase_means}]")
+
+
+def _parse_condition(value: str) -> str:
+    condition = VALID_CONDITIONS.get(value.upper(), value.upper())
+    if condition not in VALID_CONDITIONS.values():
+        raise argparse.ArgumentTypeError(f"condition '{value}' non valida. Valori consentiti: {VALID_CONDITIONS}")
+    return condition
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m core.simulate", description="Headless Slot Machine session simulator.")
+    parser.add_argument("--condition", type=_parse_condition, nargs="+", default=list(VALID_CONDITIONS.values()),
+                        help="E/W/L or EQUAL/WIN/LOSE (default: all three)")
+    parser.add_argument("--sessions", type=int, default=1000, help="sessions per condition")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--seed", type=int, default=None, help="root seed; the same seed gives the same results for any --workers")
+    parser.add_argument("--bets", default=None,
+                        help="bet strategy: uniform (default), constant:X, martingale:X, anti_martingale:X, empirical:PATH")
+    parser.add_argument("--log", action="store_true", help="write every simulated session to a metrics CSV")
+    parser.add_argument("--output", default=None, help="metrics CSV path used with --log (default: next data/metrics_*.csv)")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output) if args.output else None
+    # nessun flush per riga: il logger scrive a blocchi e a ogni SESSION_END
+    metrics_logger = MetricsLogger(csv_path=output, flush_rows=10_000) if args.log else None
+    try:
+        strategy = parse_strategy(args.bets)
+    except ValueError as error:
+        parser.error(str(error))
+    merged, seed = run(args.condition, args.sessions, args.workers, metrics_logger, seed=args.seed, strategy=strategy)
+    if metrics_logger is not None:
+        metrics_logger.close()
+    _print_summary(merged, seed)
+
+
+if __name__ == "__main__":
+    main()
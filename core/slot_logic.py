@@ -1,189 +1,270 @@
 import random
-from core.constants import INITIAL_BUDGET, TOTAL_SESSION_BETS, PHASE_LENGTH
-from core.constants import PHASES, SYMBOLS, EXPECTED_PERCENTAGE_INCREASES, EXPECTED_PERCENTAGE_DECREASES, REWARD_TABLE_MUL, BEFORE_AFTER_PHASE, DURING_PHASE_EQUAL, DURING_PHASE_WIN, DURING_PHASE_LOSE
+from bisect import bisect_right
+from typing import Optional
+from core.constants import INITIAL_BUDGET
+from core.constants import SYMBOLS, REWARD_TABLE_MUL
+from core import trace as _trace
+from core.engines import SpinOutcome
+from core.money import from_cents, multiply_cents, percent_of_cents, to_cents
+from core.schedule import get_schedule
+from core.trace import TraceRecord
 # updated: import from constants.py, or repeat constants to avoid circular imports
 
 
-# ---------------GLOBAL VARIABLE---------
-initial_budget_before, initial_budget_during, initial_budget_after = None, None, None
-condition = "EQUAL"  # default condition, can be updated by researcher input
+# ----------------SESSION ENGINE---------------
+class SessionEngine:
+    """Stato per-sessione della logica deterministica di reward.
+
+    Ogni istanza possiede la propria condition e i budget iniziali delle fasi,
+    quindi più sessioni possono girare in parallelo (thread o processi) senza
+    interferire tra loro. Le funzioni di modulo delegano a `default_engine`.
+    Esito e regola di ogni bet vengono letti dallo schedule compilato della
+    condition (core/schedule.py), indicizzato direttamente per numero di bet.
+    Tutti gli importi (budget, bet, reward) sono in centesimi interi (core/money.py).
+
+    Args:
+        condition: Condition della sessione ("EQUAL", "WIN" o "LOSE").
+        schedules: Override opzionale condition -> CompiledSchedule (es. layout a N fasi
+            compilato con compile_schedule(..., session_schedule=...)), come in simulate_batch.
+    """
+
+    def __init__(self, condition: str = "EQUAL", schedules: Optional[dict] = None) -> None:
+        self._schedules = schedules
+        self._schedule = None
+        self.update_condition(condition)
+        self.initial_budgets = [None] * len(self._schedule.layout.phase_names)  # budget iniziale (centesimi) di ogni fase del layout
+        # dispatch per regola: indice = RULE_LOSS, RULE_RECOVER, RULE_INCREASE, RULE_DECREASE
+        self._rule_handlers = (self._loss, self._recover, self._increase, self._decrease)
+
+    def update_condition(self, input_condition: str) -> None:
+        if self._schedules is not None and input_condition in self._schedules:
+            schedule = self._schedules[input_condition]
+        else:
+            schedule = get_schedule(input_condition)  # ValueError se la condition non è valida
+        current = self._schedule
+        if current is not None and schedule.layout != current.layout:
+            # cambio condition a metà sessione: i budget iniziali di fase restano validi solo con lo stesso layout
+            raise ValueError(f"Condition {input_condition} uses a different phase layout")
+        self._schedule = schedule
+        self.condition = input_condition
+
+    def reset(self) -> None:
+        """Azzera i budget iniziali di fase per iniziare una nuova sessione (la condition resta invariata)."""
+        self.initial_budgets = [None] * len(self._schedule.layout.phase_names)
+
+    @property
+    def initial_budget_during(self):
+        phase_names = self._schedule.layout.phase_names
+        return self.initial_budgets[phase_names.index("PHASE_DURING")] if "PHASE_DURING" in phase_names else None
+
+    def calculate_reward(self, budget_before_spin, current_bet_counter, current_bet):
+        """Versione in float di calculate_reward_cents: (reward, multiplier) con importi in coin."""
+        reward, multiplier = self.calculate_reward_cents(to_cents(budget_before_spin), current_bet_counter, to_cents(current_bet))
+        return from_cents(reward), multiplier
+
+    def calculate_reward_cents(self, budget_before_spin, current_bet_counter, current_bet):
+        '''
+            input/output in centesimi interi: budget prima dello spin, bet → (reward, multiplier)
+            Ad ogni bet:
+            - leggo dallo schedule compilato la fase e la regola della bet
+            - al primo bet della fase salvo il budget iniziale della fase:
+              INITIAL_BUDGET per la prima fase, altrimenti il budget prima dello spin
+            - se la regola è una vittoria calcolo sia la reward che il moltiplicatore usato per calcolarla
+            - altrimenti: (0, None)
+            Se un trace sink è attivo (core/trace.py) scrive un TraceRecord per bet.
+        '''
+        schedule = self._schedule
+        if not 1 <= current_bet_counter <= schedule.total_bets:
+            raise ValueError(f"Invalid bet number: {current_bet_counter} (1-{schedule.total_bets})")
+        phase = schedule.phases[current_bet_counter]
+        if self.initial_budgets[phase] is None:
+            # il budget iniziale di DURING / AFTER è quello ottenuto alla fine della fase precedente
+            self.initial_budgets[phase] = to_cents(INITIAL_BUDGET) if phase == 0 else budget_before_spin
+        initial_budget_phase = self.initial_budgets[phase]
+
+        rule = schedule.rules[current_bet_counter]
+        reward, multiplier, expected_reward = self._rule_handlers[rule](initial_budget_phase, budget_before_spin, current_bet_counter, current_bet)
+        # trace disabilitato di default: un solo confronto per bet, nessuna stringa formattata
+        sink = _trace.active_sink
+        if sink is not None:
+            sink.write(TraceRecord(current_bet_counter, schedule.layout.phase_names[phase], self.condition, initial_budget_phase,
+                                   budget_before_spin, current_bet, expected_reward, multiplier, reward))
+        return reward, multiplier
+
+    def play_cents(self, budget_before_spin, current_bet_counter, current_bet, rng=None):
+        """Interfaccia comune degli engine (core/engines.py): reward deterministica + simboli da visualizzare."""
+        reward, multiplier = self.calculate_reward_cents(budget_before_spin, current_bet_counter, current_bet)
+        return SpinOutcome(reward, multiplier, spin_reels(reward, multiplier, rng))
+
+    # handler delle regole: (reward, multiplier, importo passato a calculate_multiplier)
+    def _loss(self, initial_budget_phase, budget_before_spin, current_bet_counter, current_bet):
+        return (0, None, 0)
+
+    def _recover(self, initial_budget_phase, budget_before_spin, current_bet_counter, current_bet):
+        # BEFORE / AFTER / DURING-EQUAL: vince tutto ciò che ha perso dall'inizio della fase
+        return _recover_reward(initial_budget_phase, budget_before_spin, current_bet)
+
+    # increase / decrease sono relativi al budget iniziale della fase corrente (DURING nel layout di default)
+    def _increase(self, initial_budget_phase, budget_before_spin, current_bet_counter, current_bet):
+        return self._win_increase(initial_budget_phase, current_bet_counter, current_bet)
+
+    def _decrease(self, initial_budget_phase, budget_before_spin, current_bet_counter, current_bet):
+        return self._lose_increase(initial_budget_phase, budget_before_spin, current_bet_counter, current_bet)
+
+    # PER DURING_WIN
+    def win_increase(self, current_bet_counter, current_bet):
+        reward, multiplier, _ = self._win_increase(self.initial_budget_during, current_bet_counter, current_bet)
+        return reward, multiplier
+
+    # PER DURING_LOSE
+    def lose_increase(self, budget_before_spin, current_bet_counter, current_bet):
+        reward, multiplier, _ = self._lose_increase(self.initial_budget_during, budget_before_spin, current_bet_counter, current_bet)
+        return reward, multiplier
+
+    def _win_increase(self, initial_budget_phase, current_bet_counter, current_bet):
+        # incremento percentuale atteso per questa bet (EXPECTED_PERCENTAGE_INCREASES compilato nello schedule)
+        # default 0 if bet not in map: expected_reward = current_bet (minimal win)
+        expected_percentage_increase = self._schedule.percentages[current_bet_counter]
+        # arrotondamento unico di percentuale + bet, come round(pct * budget + bet, 2) nel motore in float
+        expected_reward = percent_of_cents(expected_percentage_increase, initial_budget_phase, current_bet)
+        multiplier = calculate_multiplier(expected_reward, current_bet)
+        reward = multiply_cents(current_bet, multiplier)
+        return reward, multiplier, expected_reward
+
+    def _lose_increase(self, initial_budget_phase, budget_before_spin, current_bet_counter, current_bet):
+        # Evito di sommare la puntata nei calcoli, tanto ho una differenza che la eliminerebbe
+        lose_value = initial_budget_phase - budget_before_spin # calcolo la perdita effettiva cumulata fino ad ora, includendo la bet corrente
+        # i checkpoints sono fissi: lo schedule compilato garantisce un valore per ogni vittoria DURING-LOSE
+        expected_percentage_decrease = self._schedule.percentages[current_bet_counter]
+
+        expected_lose_value = percent_of_cents(expected_percentage_decrease, initial_budget_phase) # calcolo la perdita attesa per questa bet
+        lose_difference = lose_value - expected_lose_value # calcolo la differenza tra perdita effettiva e perdita attesa
+
+        # se la perdita effettiva è maggiore di quella attesa, allora do contentino
+        if lose_difference > 0: # lose_value > expected_lose_value
+            # differenza calcolata in coin come nel motore in float (decide i casi di parità del rapporto)
+            multiplier = _multiplier_of_ratio((from_cents(lose_value) - from_cents(expected_lose_value)) / from_cents(current_bet))
+            reward = multiply_cents(current_bet, multiplier)
+            return reward, multiplier, lose_difference
+        # altrimenti non hai perso abbastanza
+        else: # lose_value < expected_lose_value
+            multiplier = 1 # il minimo per dare una ricompensa più piccola possibile al checkpoint
+            reward = multiply_cents(current_bet, multiplier)
+            return reward, multiplier, 0
+
+
+# ---------------COMPILED TABLES---------
+# chiavi di REWARD_TABLE_MUL ordinate una sola volta: calculate_multiplier usa la ricerca binaria
+MULTIPLIER_KEYS = tuple(sorted(REWARD_TABLE_MUL.keys()))
+
+
+# ---------------DEFAULT ENGINE---------
+# istanza condivisa usata dalla GUI e da RemoteResearcher tramite le funzioni di modulo
+default_engine = SessionEngine()
 
 
 # ----------------FUNCTIOS---------------
 def update_condition(input_condition: str) -> None:
-    global condition
-    condition = input_condition
-        
+    default_engine.update_condition(input_condition)
+
+
+def reset_session() -> None:
+    """Azzera i budget iniziali di fase del default_engine (nuova sessione, es. in TEST MODE)."""
+    default_engine.reset()
+
 
 def calculate_reward(budget_before_spin, current_bet_counter, current_bet):
-    ''' 
-        Ogni volta che entriamo nella fase
-        - verifico se la bet corrisponde ad una vincita/perdita di quella fase
-            - se vittoria: 
-              calcolo l'initial budget della fase e lo salvo in una variabile globale: initial_budget_before, initial_budget_during, initial_budget_after
-              valuto la vittoria: calcola sia la reward che il moltiplicatore usato per calcolarla
-            - altrimenti: pass
-
-        - 
-    '''
-    global initial_budget_before, initial_budget_during, initial_budget_after
-    # FASI: da 1-20 -> PHASE_BEFORE, da 21-40 -> PHASE_DURING, da 41-60 -> PHASE_AFTER
-    
-    # ----------FASE BEFORE----------
-    if current_bet_counter in PHASES["PHASE_BEFORE"]:
-        if initial_budget_before is None:
-            initial_budget_before = INITIAL_BUDGET
-        print(f"FASE BEFORE {current_bet_counter}: initial budget: {initial_budget_before:.2f}, budget: {budget_before_spin:.2f}, bet: {current_bet}")
-
-        win = BEFORE_AFTER_PHASE[current_bet_counter]
-        if win:
-            # calcolo reward attesa di questa fase: vince tutto ciò che ha perso fino ad ora
-            reward, multiplier = loss_recover(initial_budget_before, budget_before_spin, current_bet_counter, current_bet)
-            return (reward, multiplier)
-        return (0, None)
-
-
-    # ----------FASE DURING----------
-    if current_bet_counter in PHASES["PHASE_DURING"]:
-        if initial_budget_during is None:
-            initial_budget_during = budget_before_spin # il budget iniziale della fase during è quello ottenuto alla fine della fase before
-        print(f"FASE DURING E/W/L {current_bet_counter}: initial budget: {initial_budget_during:.2f}, condizione {condition}, budget: {budget_before_spin:.2f}, bet: {current_bet}")
-        # EQUAL
-        if condition == "EQUAL":
-            win = DURING_PHASE_EQUAL[current_bet_counter]
-            if win:
-                reward, multiplier = loss_recover(initial_budget_during, budget_before_spin, current_bet_counter, current_bet)
-                return reward, multiplier
-            return 0, None
-        # WIN
-        elif condition == "WIN":
-            win = DURING_PHASE_WIN[current_bet_counter]
-            if win:
-                reward, multiplier = win_increase(current_bet_counter, current_bet)
-                return reward, multiplier
-            return 0, None
-        # LOSE
-        elif condition == "LOSE":
-            win = DURING_PHASE_LOSE[current_bet_counter]
-            if win:
-                reward, multiplier = lose_increase(budget_before_spin, current_bet_counter, current_bet)
-                return reward, multiplier
-            return 0, None
-        else:
-            raise ValueError(f"Invalid condition: {condition}")
-    
-    
-    # ----------FASE AFTER----------
-    if current_bet_counter in PHASES["PHASE_AFTER"]:
-        # uguale alla fase before: arrivo alla 41 inclusa
-        if initial_budget_after is None:
-            initial_budget_after = budget_before_spin # il budget iniziale della fase after è quello ottenuto alla fine della fase during
-        print(f"FASE AFTER {current_bet_counter}: initial budget: {initial_budget_after:.2f}, budget: {budget_before_spin:.2f}, bet: {current_bet}")
-        
-        win = BEFORE_AFTER_PHASE[current_bet_counter - 40]  # usa la stessa mappa della fase before, ma con indice corretto (1-20)
-        if win:
-            reward, multiplier = loss_recover(initial_budget_after, budget_before_spin, current_bet_counter, current_bet)
-            return (reward, multiplier)
-        return (0, None)
+    """Calcola (reward, multiplier) della bet corrente usando il default_engine (importi in coin)."""
+    return default_engine.calculate_reward(budget_before_spin, current_bet_counter, current_bet)
+
+
+def calculate_reward_cents(budget_before_spin, current_bet_counter, current_bet):
+    """Calcola (reward, multiplier) della bet corrente usando il default_engine (importi in centesimi interi)."""
+    return default_engine.calculate_reward_cents(budget_before_spin, current_bet_counter, current_bet)
 
 
 def loss_recover(initial_budget_phase, budget_before_spin, current_bet_counter, current_bet):
     """
     Logica condivisa per BEFORE, AFTER e DURING-EQUAL:
     la reward recupera esattamente la perdita cumulata dalla fase + la bet corrente.
+    Importi in centesimi interi.
     """
+    reward, multiplier, _ = _recover_reward(initial_budget_phase, budget_before_spin, current_bet)
+    return reward, multiplier
+
+
+def _recover_reward(initial_budget_phase, budget_before_spin, current_bet):
+    """loss_recover che restituisce anche l'expected_reward (per il trace)."""
     # diversamente dall'excell: bisogna ritornare la reward effettiva (e visualizzata)
-    # ovvero il valore totale inclusa la bet (che ho già tolto dai coins non appena si clicca spin) 
+    # ovvero il valore totale inclusa la bet (che ho già tolto dai coins non appena si clicca spin)
     if initial_budget_phase - budget_before_spin < 0:
         difference = 0
     else:
         difference = initial_budget_phase - budget_before_spin
-    expected_reward = round(difference + current_bet, 2)
+    expected_reward = difference + current_bet
     multiplier = calculate_multiplier(expected_reward, current_bet)
-    reward = round(current_bet * multiplier, 2)
-    # differenza tra due float -> periodica -> come gestirla ? implementa una soluzione
-    print(f"VITTORIA! Bet n° {current_bet_counter}, expected_reward: {expected_reward}, moltiplicatore: {multiplier}x, gain reale: {round(reward - current_bet, 2)}, reward: {reward}")
-    return reward, multiplier
+    # centesimi interi: nessuna differenza tra float periodici da arrotondare
+    reward = multiply_cents(current_bet, multiplier)
+    return reward, multiplier, expected_reward
 
 
 # PER DURING_WIN
 def win_increase(current_bet_counter, current_bet):
-    # estraggo l'incremento percentuale atteso per questa bet, in base alla mappa EXPECTED_PERCENTAGE_INCREASES
-    # default 0 if bet not in map: expected_reward = current_bet (minimal win)
-    expected_percentage_increase = EXPECTED_PERCENTAGE_INCREASES.get(current_bet_counter, 0)
-    expected_reward = round(expected_percentage_increase * initial_budget_during + current_bet, 2)
-    multiplier = calculate_multiplier(expected_reward, current_bet)
-    reward = round(current_bet * multiplier, 2)
-    print(f"VITTORIA! Bet n° {current_bet_counter}, expected_reward: {expected_reward}, expected_%_WIN: {expected_percentage_increase}, moltiplicatore: {multiplier}x, gain reale: {round(reward - current_bet, 2)}, reward: {reward}")
-    return reward, multiplier
+    return default_engine.win_increase(current_bet_counter, current_bet)
 
 
 # PER DURING_LOSE
 def lose_increase(budget_before_spin, current_bet_counter, current_bet):
-    # Evito di sommare la puntata nei calcoli, tanto ho una differenza che la eliminerebbe
-    lose_value = round(initial_budget_during - budget_before_spin, 2) # calcolo la perdita effettiva cumulata fino ad ora, includendo la bet corrente
-    # in questo caso avrò sempre un valore perchè i checkpoints sono fissi
-    if current_bet_counter in EXPECTED_PERCENTAGE_DECREASES:
-        expected_percentage_decrease = EXPECTED_PERCENTAGE_DECREASES[current_bet_counter]
-    else:
-        raise ValueError(f"Expected percentage decrease not defined for bet number {current_bet_counter}. Check EXPECTED_PERCENTAGE_DECREASES map.")
-
-    expected_lose_value = round(expected_percentage_decrease * initial_budget_during, 2) # calcolo la perdita attesa per questa bet
-    lose_difference = lose_value - expected_lose_value # calcolo la differenza tra perdita effettiva e perdita attesa
-    
-    # se la perdita effettiva è maggiore di quella attesa, allora do contentino
-    if lose_difference > 0: # lose_value > expected_lose_value
-        multiplier = calculate_multiplier(lose_difference, current_bet)
-        reward = round(current_bet * multiplier, 2)
-        print(f"CHECKPOINT CONTENTINO! Bet n° {current_bet_counter}, lose_value: {lose_value}, expected_lose_value: {expected_lose_value}, lose_difference: {round(lose_difference, 2)}, multiplier: {multiplier}x, gain reale: {round(reward - current_bet, 2)}, reward: {reward}")
-        return reward, multiplier
-    # altrimenti non hai perso abbastanza
-    else: # lose_value < expected_lose_value
-        multiplier = 1 # il minimo per dare una ricompensa più piccola possibile al checkpoint
-        reward = round(current_bet * multiplier, 2)
-        print(f"CHECKPOINT MINIMO! Bet n° {current_bet_counter}, lose_value: {lose_value}, expected_lose_value: {expected_lose_value}, lose_difference: {round(lose_difference, 2)}, multiplier: {multiplier}x, gain reale: {round(reward - current_bet, 2)}, reward: {reward}")
-        return reward, multiplier
+    return default_engine.lose_increase(budget_before_spin, current_bet_counter, current_bet)
 
 
 def calculate_multiplier(expected_reward, current_bet):
-    ideal_multiplier = round(expected_reward / current_bet, 0) 
+    """Moltiplicatore reale di expected_reward / current_bet (importi in centesimi interi)."""
+    # rapporto calcolato in coin come nel motore originale: 3.8 / 0.4 = 9.4999... -> 9 (non il pareggio 380 / 40 = 9.5)
+    return _multiplier_of_ratio(from_cents(expected_reward) / from_cents(current_bet))
+
+
+def _multiplier_of_ratio(ratio):
+    ideal_multiplier = round(ratio, 0)
     # NOTE per WIN e LOSE: se non trovo gli expected_percentage-> WIN: expected_reward = current_bet -> multplier = 1 ; LOSE: non avviene mai
-    if ideal_multiplier in REWARD_TABLE_MUL:
-        multiplier = ideal_multiplier
-    else : # REAL_MULTIPLIER
-        real_multiplier = max([m for m in REWARD_TABLE_MUL.keys() if m <= ideal_multiplier], default=min(REWARD_TABLE_MUL.keys())) # default è il min perchè unico caso è quando ho tra 0 e 1
-        multiplier = real_multiplier
-    return multiplier
-
-
-def spin_reels(reward, multiplier):
-    ''' 
-    input: reward attesa, moltiplicatore ideale
-    output: simboli da visualizzare (in base alla reward attesa e al moltiplicatore ideale/reale che dipendono dalla tabella REWARD_TABLE_MUL)
-    '''    
+    # REAL_MULTIPLIER: chiave più grande <= ideal_multiplier (uguale se presente in tabella), ricerca binaria O(log n)
+    index = bisect_right(MULTIPLIER_KEYS, ideal_multiplier)
+    if index == 0:
+        return MULTIPLIER_KEYS[0] # default è il min perchè unico caso è quando ho tra 0 e 1
+    return MULTIPLIER_KEYS[index - 1]
+
+
+def spin_reels(reward, multiplier, rng=None):
+    '''
+    input: reward attesa, moltiplicatore ideale, rng opzionale (es. random.Random(seed)) per risultati riproducibili
+    output: simboli da visualizzare (in base alla reward attesa e al moltiplicatore ideale/reale che dipendono dalla tabella REWARD_TABLE_MUL),
+            tupla di 3 Symbol (IntEnum, es. (Symbol.CHERRY, Symbol.CHERRY, Symbol.LEMON))
+    '''
+    if rng is None:
+        rng = random  # default: modulo random globale, come nella GUI
     # LOSS: prendi simboli diversi a caso dalla lista SYMBOLS
     if reward == 0:
-        symbols = random.sample(SYMBOLS, 3) # prendo 3 simboli diversi dalla lista SYMBOLS
+        symbols = rng.sample(SYMBOLS, 3) # prendo 3 simboli diversi dalla lista SYMBOLS
         return tuple(symbols)
-    
+
     # WIN: vittoria a 3 o a 2
     if reward > 0:
-        if multiplier == None: 
-            raise ValueError("Multiplier cannot be None for a win.") 
+        if multiplier == None:
+            raise ValueError("Multiplier cannot be None for a win.")
         symbol, occurrence = REWARD_TABLE_MUL[multiplier]
         # vittoria a 3
         if occurrence == 3:
             return (symbol, symbol, symbol)
         # vittoria a 2
-        else: 
+        else:
             # gestione 2 simboli si vincita uguali
-            positions = random.sample([0, 1, 2], 2)  # prendi 2 valori casuali dalla lista, saranno le posizioni (indici)
+            positions = rng.sample([0, 1, 2], 2)  # prendi 2 valori casuali dalla lista, saranno le posizioni (indici)
             result = [None, None, None]
             result[positions[0]] = symbol
             result[positions[1]] = symbol
             # gestione simbolo diverso
             other_pos = [i for i in [0,1,2] if i not in positions][0]
             available_symbols = [s for s in SYMBOLS if s != symbol]
-            result[other_pos] = random.choice(available_symbols)
+            result[other_pos] = rng.choice(available_symbols)
             return tuple(result)
-            
+
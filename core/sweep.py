@@ -0,0 +1,324 @@
+"""
+Parameter sweep over the EXPECTED_PERCENTAGE tables and the DURING outcome maps.
+
+A search space lists candidate values per entry; every configuration is compiled
+into schedules (core.schedule.compile_schedule overrides) and simulated with
+simulate_batch, giving per-condition distributions of the end-of-phase budget:
+
+    python -m core.sweep space.json --sessions 20000 --workers 8
+    python -m core.sweep space.json --random 50 --seed 3
+
+space.json (bet numbers are global, as in constants.py):
+
+    {
+      "increases":   {"24": [0.05, 0.08, 0.12], "40": [0.10, 0.15]},
+      "decreases":   {"30": [0.10, 0.15, 0.20]},
+      "during_maps": {"WIN": {"22": [false, true]}}
+    }
+
+Configurations run in parallel across processes. Each result is cached on disk as
+JSON, keyed by a hash of everything the simulation reads: the compiled per-bet
+schedules (SESSION_SCHEDULE layout, rules and relative maps, defaults + overrides),
+REWARD_TABLE_MUL, INITIAL_BUDGET and the bet range, the session count and the
+seed. Re-running a sweep after a small edit recomputes only the points it affects.
+Cache files are replaced atomically, so an interrupted or concurrent sweep never
+leaves a truncated entry. All points share the same seeded bets (common random
+numbers), so differences between points are not sampling noise.
+
+Unknown conditions and bets outside the DURING phase in "during_maps" are rejected
+with a ValueError before anything is simulated.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from core.batch_simulator import simulate_batch
+from core.bet_strategies import random_bets
+from core.constants import EXPECTED_PERCENTAGE_DECREASES, EXPECTED_PERCENTAGE_INCREASES, PHASES
+from core.constants import DURING_PHASE_EQUAL, DURING_PHASE_WIN, DURING_PHASE_LOSE
+from core.constants import BET_STEP, INITIAL_BUDGET, MAX_BET, MIN_BET, REWARD_TABLE_MUL
+from core.money import CENTS_PER_UNIT, to_cents
+from core.schedule import check_during_maps, compile_schedule
+from utils.file_manager import get_writable_path
+
+# incrementare se cambia il formato dei risultati o la logica di simulazione: invalida la cache
+CACHE_VERSION = 1
+DEFAULT_CONDITIONS = ("EQUAL", "WIN", "LOSE")
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+# ---------------SEARCH SPACE---------
+def _dimensions(space: dict) -> list[tuple[tuple, list]]:
+    """Appiattisce lo spazio in [(percorso, valori)], es. (("during_maps", "WIN", 22), [False, True])."""
+    dimensions = []
+    for field in ("increases", "decreases"):
+        for bet, values in space.get(field, {}).items():
+            dimensions.append(((field, int(bet)), list(values)))
+    for condition, entries in space.get("during_maps", {}).items():
+        for bet, values in entries.items():
+            dimensions.append((("during_maps", condition, int(bet)), list(values)))
+    return dimensions
+
+
+def _point(paths_values) -> dict:
+    point = {"increases": {}, "decreases": {}, "during_maps": {}}
+    for path, value in paths_values:
+        if path[0] == "during_maps":
+            point["during_maps"].setdefault(path[1], {})[path[2]] = value
+        else:
+            point[path[0]][path[1]] = value
+    return point
+
+
+def expand_grid(space: dict) -> list[dict]:
+    """Tutte le combinazioni dello spazio (prodotto cartesiano) come override per configurazione."""
+    dimensions = _dimensions(space)
+    paths = [path for path, _ in dimensions]
+    return [_point(zip(paths, values)) for values in itertools.product(*(values for _, values in dimensions))]
+
+
+def sample_space(space: dict, n_points: int, seed: Optional[int] = None) -> list[dict]:
+    """n_points configurazioni distinte estratte a caso dalla griglia (ricerca random)."""
+    rng = np.random.default_rng(seed)
+    dimensions = _dimensions(space)
+    total = int(np.prod([len(values) for _, values in dimensions])) if dimensions else 1
+    seen, points = set(), []
+    while len(points) < min(n_points, total):
+        choice = tuple(int(rng.integers(len(values))) for _, values in dimensions)
+        if choice in seen:
+            continue
+        seen.add(choice)
+        points.append(_point((path, values[index]) for (path, values), index in zip(dimensions, choice)))
+    return points
+
+
+def effective_config(point: dict) -> dict:
+    """Tabelle complete (default di constants.py + override del punto).
+
+    Raises:
+        ValueError: during_maps with an unknown condition or a bet outside the DURING phase
+            (sarebbe ignorato in simulazione ma cambierebbe la chiave della cache).
+    """
+    check_during_maps(point.get("during_maps", {}))
+    during = {"EQUAL": DURING_PHASE_EQUAL, "WIN": DURING_PHASE_WIN, "LOSE": DURING_PHASE_LOSE}
+    return {
+        "increases": {**EXPECTED_PERCENTAGE_INCREASES, **point.get("increases", {})},
+        "decreases": {**EXPECTED_PERCENTAGE_DECREASES, **point.get("decreases", {})},
+        "during_maps": {condition: {**table, **point.get("during_maps", {}).get(condition, {})}
+                        for condition, table in during.items()},
+    }
+
+
+def compile_config(config: dict) -> dict:
+    """Schedule compilati di ogni condition per una configurazione effettiva.
+
+    Raises:
+        ValueError: Invalid configuration (see compile_schedule).
+    """
+    return {condition: compile_schedule(condition, during_maps=config["during_maps"],
+                                        increases=config["increases"], decreases=config["decreases"])
+            for condition in DEFAULT_CONDITIONS}
+
+
+def config_hash(config: dict, n_sessions: int, seed: int) -> str:
+    """Hash stabile di tutto ciò che la simulazione legge (chiave della cache).
+
+    Usa gli schedule compilati per bet (layout, regole, percentuali: anche rule/relative di
+    SESSION_SCHEDULE), la tabella dei moltiplicatori, il budget iniziale e le puntate.
+    """
+    try:
+        schedules = {
+            condition: {
+                "rules": schedule.rules,
+                "percentages": schedule.percentages,
+                "phases": schedule.phases,
+                "phase_ranges": [[bet_range.start, bet_range.stop] for bet_range in schedule.layout.phase_ranges],
+                "message_bet": schedule.layout.message_bet,
+            }
+            for condition, schedule in compile_config(config).items()
+        }
+    except ValueError as error:
+        # configurazione non valida: il risultato è l'errore, la chiave usa le tabelle grezze
+        schedules = {
+            "error": str(error),
+            "tables": {name: sorted((int(bet), value) for bet, value in config[name].items())
+                       for name in ("increases", "decreases")},
+            "during_maps": {condition: sorted((int(bet), value) for bet, value in table.items())
+                            for condition, table in sorted(config["during_maps"].items())},
+        }
+    payload = {
+        "version": CACHE_VERSION,
+        "sessions": n_sessions,
+        "seed": seed,
+        "schedules": schedules,
+        "multipliers": [[float(multiplier), int(symbol), count]
+                        for multiplier, (symbol, count) in sorted(REWARD_TABLE_MUL.items())],
+        "budget_cents": to_cents(INITIAL_BUDGET),
+        "bets_cents": [to_cents(MIN_BET), to_cents(MAX_BET), to_cents(BET_STEP)],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:20]
+
+
+# ---------------EVALUATION---------
+def _distribution(values: np.ndarray) -> dict:
+    quantiles = np.quantile(values, QUANTILES)
+    return {
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        **{f"p{int(q * 100)}": float(value) for q, value in zip(QUANTILES, quantiles)},
+    }
+
+
+def evaluate_config(config: dict, conditions=DEFAULT_CONDITIONS, n_sessions: int = 10_000, seed: int = 0) -> dict:
+    """Simula una configurazione e restituisce, per condition, la distribuzione del budget a fine fase (in coin).
+
+    Returns:
+        {"phases": {condition: [distribution per phase]}} or {"error": message} for an invalid configuration.
+    """
+    try:
+        schedules = compile_config(config)
+    except ValueError as error:
+        return {"error": str(error)}
+
+    bets = random_bets(np.random.default_rng(seed), n_sessions)  # stesse puntate per ogni punto e condition
+    phase_ends = [bet_range[-1] for bet_range in PHASES.values()]
+    result = {}
+    for condition in conditions:
+        budgets = simulate_batch(condition, bets, schedules=schedules).budgets_cents / CENTS_PER_UNIT
+        result[condition] = [_distribution(budgets[:, end]) for end in phase_ends]
+    return {"phases": result}
+
+
+def _evaluate_job(job: tuple) -> dict:
+    config, conditions, n_sessions, seed = job
+    return evaluate_config(config, conditions, n_sessions, seed)
+
+
+def run_sweep(
+    points: list[dict],
+    conditions=DEFAULT_CONDITIONS,
+    n_sessions: int = 10_000,
+    seed: int = 0,
+    workers: int = 1,
+    cache_dir: Optional[str] = None,
+) -> list[dict]:
+    """Evaluate every configuration, reusing cached results.
+
+    Args:
+        points: Overrides per configuration (see expand_grid / sample_space).
+        conditions: Conditions to simulate.
+        n_sessions: Sessions per condition and configuration.
+        seed: Seed of the shared bets.
+        workers: Worker processes for the uncached points.
+        cache_dir: Result cache folder; defaults to data/sweep_cache.
+
+    Returns:
+        One dict per point: {"point", "hash", "cached", "result"}, in input order.
+    """
+    cache_dir = cache_dir or get_writable_path("data", "sweep_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    conditions = tuple(conditions)
+
+    entries, pending = [], []
+    for point in points:
+        config = effective_config(point)
+        # la condition fa parte della chiave: run con condition diverse non si sovrascrivono
+        key = config_hash(config, n_sessions, seed) + "_" + "-".join(conditions)
+        path = os.path.join(cache_dir, f"{key}.json")
+        result = _load_cache(path)
+        entry = {"point": point, "hash": key, "cached": result is not None, "result": result}
+        if result is None:
+            pending.append((entry, path, (config, conditions, n_sessions, seed)))
+        entries.append(entry)
+
+    jobs = [job for _, _, job in pending]
+    if workers <= 1:
+        results = [_evaluate_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_evaluate_job, jobs))
+
+    for (entry, path, _), result in zip(pending, results):
+        entry["result"] = result
+        _store_cache(path, result)
+    return entries
+
+
+def _load_cache(path: str) -> Optional[dict]:
+    """Risultato in cache, o None se manca o è illeggibile (es. file troncato da una versione precedente)."""
+    try:
+        with open(path, "r", encoding="utf-8") as cache_file:
+            return json.load(cache_file)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        return None  # JSON corrotto: il punto viene ricalcolato e il file sostituito
+
+
+def _store_cache(path: str, result: dict) -> None:
+    """Scrive il risultato su un file temporaneo della stessa cartella e lo sostituisce atomicamente."""
+    descriptor, temporary = tempfile.mkstemp(prefix=".sweep_", suffix=".tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(descriptor, "w", encoding="utf-8") as cache_file:
+            json.dump(result, cache_file)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+# ---------------CLI---------
+def _describe(point: dict) -> str:
+    parts = [f"inc[{bet}]={value}" for bet, value in point["increases"].items()]
+    parts += [f"dec[{bet}]={value}" for bet, value in point["decreases"].items()]
+    parts += [f"{condition[0]}[{bet}]={int(value)}" for condition, table in point["during_maps"].items()
+              for bet, value in table.items()]
+    return " ".join(parts) or "(defaults)"
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Sweep EXPECTED_PERCENTAGE tables and DURING maps.")
+    parser.add_argument("space", help="JSON search space (see module docstring).")
+    parser.add_argument("--random", type=int, default=None, help="Random search: number of points (default: full grid).")
+    parser.add_argument("--condition", nargs="+", default=list(DEFAULT_CONDITIONS), help="EQUAL / WIN / LOSE.")
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", default=None, help="Cache folder (default data/sweep_cache).")
+    parser.add_argument("--output", default=None, help="Write all results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    with open(args.space, "r", encoding="utf-8") as space_file:
+        space = json.load(space_file)
+    points = expand_grid(space) if args.random is None else sample_space(space, args.random, args.seed)
+    conditions = [condition.upper() for condition in args.condition]
+    entries = run_sweep(points, conditions, args.sessions, args.seed, args.workers, args.cache)
+
+    cached = sum(entry["cached"] for entry in entries)
+    print(f"[SWEEP] {len(entries)} points ({cached} cached, {len(entries) - cached} simulated), {args.sessions} sessions each")
+    for entry in entries:
+        result = entry["result"]
+        if "error" in result:
+            print(f"[SWEEP] {_describe(entry['point'])}: ERROR {result['error']}")
+            continue
+        summary = "  ".join(
+            f"{condition}: " + "/".join(f"{phase['mean']:.1f}" for phase in phases)
+            for condition, phases in result["phases"].items()
+        )
+        print(f"[SWEEP] {_describe(entry['point'])}: {summary}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(entries, output_file, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
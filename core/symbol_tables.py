@@ -0,0 +1,98 @@
+"""
+Batch symbol generator backed by precomputed outcome tables.
+
+Vectorized counterpart of `spin_reels`: instead of one `random.sample` per spin it
+draws an integer row index into tables built once at import time, for whole arrays
+of (reward, multiplier) such as the BatchResult of simulate_batch. Symbols are
+returned as compact uint8 Symbol IDs with a trailing axis of 3 reels.
+
+The draws follow the same distribution as spin_reels:
+    - loss: uniform over the 9 * 8 * 7 = 504 ordered triples of distinct symbols
+    - 2-of-a-kind: uniform over the 3 positions of the odd reel x 8 other symbols
+    - 3-of-a-kind: the only triple of the symbol
+"""
+
+from itertools import permutations
+
+import numpy as np
+
+from core.constants import SYMBOLS, REWARD_TABLE_MUL, Symbol
+from core.slot_logic import MULTIPLIER_KEYS
+
+# [504, 3]: tutte le terne ordinate di simboli diversi (esiti di una perdita)
+LOSS_TRIPLES = np.array(list(permutations(range(len(SYMBOLS)), 3)), dtype=np.uint8)
+
+
+def _pair_triples(code: int) -> np.ndarray:
+    """[24, 3] disposizioni di una vittoria a 2 del simbolo: posizione del rullo diverso x altro simbolo."""
+    others = [other for other in range(len(SYMBOLS)) if other != code]
+    rows = []
+    for odd_position in range(3):
+        for other in others:
+            row = [code, code, code]
+            row[odd_position] = other
+            rows.append(row)
+    return np.array(rows, dtype=np.uint8)
+
+
+# [9, 24, 3]: disposizioni delle vittorie a 2 per simbolo
+PAIR_TRIPLES = np.stack([_pair_triples(code) for code in range(len(SYMBOLS))])
+_ARRANGEMENTS = PAIR_TRIPLES.shape[1]
+
+
+def _win_triples() -> np.ndarray:
+    """[K, 24, 3] tabella per chiave di MULTIPLIER_KEYS; le vittorie a 3 ripetono l'unica terna su tutte le righe."""
+    tables = []
+    for key in MULTIPLIER_KEYS:
+        symbol, occurrence = REWARD_TABLE_MUL[key]
+        code = int(symbol)
+        if occurrence == 3:
+            tables.append(np.full((_ARRANGEMENTS, 3), code, dtype=np.uint8))
+        else:
+            tables.append(PAIR_TRIPLES[code])
+    return np.stack(tables)
+
+
+WIN_TRIPLES = _win_triples()
+_MUL_KEYS = np.array(MULTIPLIER_KEYS, dtype=np.float64)
+
+
+def spin_reels_batch(rewards, multipliers, rng: np.random.Generator = None) -> np.ndarray:
+    """Draw the reel symbols for whole arrays of spins.
+
+    Args:
+        rewards: Array of rewards (any shape); 0 means a loss.
+        multipliers: Array of real multipliers, same shape (ignored on losses, e.g. 0 from BatchResult).
+        rng: NumPy Generator for reproducible draws; a fresh one by default.
+
+    Returns:
+        uint8 array of shape rewards.shape + (3,) with the Symbol ID of each reel.
+
+    Raises:
+        ValueError: A win whose multiplier is not a key of REWARD_TABLE_MUL.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    rewards = np.asarray(rewards)
+    multipliers = np.asarray(multipliers, dtype=np.float64)
+    if multipliers.shape != rewards.shape:
+        raise ValueError(f"rewards and multipliers must have the same shape, got {rewards.shape} and {multipliers.shape}")
+
+    symbols = np.empty(rewards.shape + (3,), dtype=np.uint8)
+    loss = rewards == 0
+    symbols[loss] = LOSS_TRIPLES[rng.integers(0, len(LOSS_TRIPLES), size=int(np.count_nonzero(loss)))]
+
+    win = ~loss
+    win_multipliers = multipliers[win]
+    key_index = np.minimum(np.searchsorted(_MUL_KEYS, win_multipliers), len(_MUL_KEYS) - 1)
+    unknown = _MUL_KEYS[key_index] != win_multipliers
+    if unknown.any():
+        raise ValueError(f"Multiplier not in REWARD_TABLE_MUL for a win: {win_multipliers[unknown][0]}")
+    symbols[win] = WIN_TRIPLES[key_index, rng.integers(0, _ARRANGEMENTS, size=len(key_index))]
+    return symbols
+
+
+def decode_symbols(codes) -> list[tuple]:
+    """Converte codici [..., 3] in tuple di Symbol (stesso formato di spin_reels), es. per la GUI o il debug."""
+    flat = np.asarray(codes).reshape(-1, 3)
+    return [tuple(Symbol(code) for code in row) for row in flat.tolist()]
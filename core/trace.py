@@ -0,0 +1,87 @@
+"""
+Structured trace hook for the reward hot path.
+
+Disabled by default: SessionEngine only checks `active_sink is not None` per bet,
+builds no strings and calls no print(). When a sink is enabled, each bet emits one
+compact TraceRecord of raw values; formatting happens inside the sink, only for the
+records it actually writes.
+
+    from core import trace
+    trace.enable(trace.ConsoleTraceSink())        # debug on the console
+    trace.enable(trace.CsvTraceSink("trace.csv"))  # compact per-bet records
+    trace.disable()
+"""
+
+import csv
+from typing import NamedTuple, Optional
+
+from core.money import format_cents
+
+
+class TraceRecord(NamedTuple):
+    """One bet of the reward pipeline (amounts in integer cents).
+
+    expected_cents is the amount fed to calculate_multiplier: the expected reward for
+    BEFORE/AFTER/DURING-EQUAL/DURING-WIN, the loss difference for DURING-LOSE
+    (0 when the minimum checkpoint multiplier is used), 0 on a loss.
+    """
+
+    bet_number: int
+    phase: str
+    condition: str
+    initial_budget_cents: int
+    budget_cents: int
+    bet_cents: int
+    expected_cents: int
+    multiplier: Optional[float]
+    reward_cents: int
+
+
+class ConsoleTraceSink:
+    """Prints one human-readable line per bet (replaces the old print() calls)."""
+
+    def write(self, record: TraceRecord) -> None:
+        outcome = (
+            f"VITTORIA {record.multiplier}x, expected: {format_cents(record.expected_cents)}, reward: {format_cents(record.reward_cents)}"
+            if record.reward_cents > 0 else "perdita"
+        )
+        print(f"{record.phase} {record.bet_number}: initial budget: {format_cents(record.initial_budget_cents)}, "
+              f"condizione {record.condition}, budget: {format_cents(record.budget_cents)}, "
+              f"bet: {format_cents(record.bet_cents)} -> {outcome}")
+
+    def close(self) -> None:
+        pass
+
+
+class CsvTraceSink:
+    """Appends compact per-bet debug records to a CSV file (one row per TraceRecord)."""
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        if self._file.tell() == 0:
+            self._writer.writerow(TraceRecord._fields)
+
+    def write(self, record: TraceRecord) -> None:
+        self._writer.writerow(record)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+# sink attivo; None = tracing disabilitato (unico controllo eseguito nel hot path)
+active_sink = None
+
+
+def enable(sink) -> None:
+    """Activates tracing: every bet computed by a SessionEngine is written to `sink`."""
+    global active_sink
+    active_sink = sink
+
+
+def disable() -> None:
+    """Deactivates tracing and closes the current sink."""
+    global active_sink
+    sink, active_sink = active_sink, None
+    if sink is not None:
+        sink.close()
@@ -0,0 +1,174 @@
+"""
+Verification of logged sessions against the deterministic engine.
+
+calculate_reward_cents only depends on condition, bet number, bet and budget, so
+every BET row of a metrics CSV can be recomputed and compared with what was logged:
+
+    python -m core.verify data --workers 8
+
+Each session is replayed through its own SessionEngine, starting from
+INITIAL_BUDGET under the START_METRICS condition. Researcher events are applied
+where they were logged: CHANGE_CONDITION switches the engine condition and
+CHARGE_COIN sets the coins to the logged COIN (or adds the charged amount). A row
+diverges when RESULT or COIN differ from the recomputed values; after a divergence
+the replay resynchronizes on the logged COIN, so one bad row is reported once and
+does not cascade into the rest of the session. Sessions that cannot be replayed
+(no START_METRICS, or an empty or unknown condition) are skipped and listed with
+their reason.
+
+Files are verified in parallel (one job per file) and read as a stream. Exit
+status is 1 when at least one divergence is found.
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+from core.constants import INITIAL_BUDGET
+from core.metrics_reader import SessionLog, iter_sessions, metrics_files
+from core.money import format_cents, to_cents
+from core.slot_logic import SessionEngine
+
+
+@dataclass(frozen=True)
+class Divergence:
+    """A logged value that differs from the recomputed one.
+
+    Attributes:
+        path: CSV file.
+        line: Line of the row in the file.
+        bet_number: BET_NUMBER of the row.
+        field: "RESULT", "COIN" or "BET_NUMBER" (bet outside the schedule).
+        logged: Logged value (cents, or the raw bet number).
+        expected: Recomputed value (cents), or None when it cannot be computed.
+    """
+
+    path: str
+    line: int
+    bet_number: int
+    field: str
+    logged: Optional[int]
+    expected: Optional[int]
+
+    def describe(self) -> str:
+        if self.field == "BET_NUMBER":
+            return f"{self.path}:{self.line} bet {self.bet_number}: outside the session schedule"
+        logged = format_cents(self.logged) if self.logged is not None else "(empty)"
+        return f"{self.path}:{self.line} bet {self.bet_number}: {self.field} logged {logged}, expected {format_cents(self.expected)}"
+
+
+@dataclass
+class FileReport:
+    """Result of verify_file."""
+
+    path: str
+    sessions: int = 0
+    bets: int = 0
+    unverifiable_sessions: int = 0  # condition mancante, vuota o sconosciuta
+    skipped: list = field(default_factory=list)  # "path:line motivo" di ogni sessione non verificabile
+    divergences: list = field(default_factory=list)
+
+
+def verify_session(session: SessionLog) -> list[Divergence]:
+    """Replay one session and return its divergent rows (the session must have a condition).
+
+    Raises:
+        ValueError: The START_METRICS or a CHANGE_CONDITION condition is not a valid condition.
+    """
+    engine = SessionEngine(session.condition)
+    budget = to_cents(INITIAL_BUDGET)
+    divergences = []
+    events = iter(session.events)
+    event = next(events, None)
+    for index in range(session.n_bets):
+        # eventi del ricercatore registrati prima di questa bet
+        while event is not None and event.position <= index:
+            if event.kind == "CHANGE_CONDITION":
+                engine.update_condition(event.value)
+            elif event.kind == "CHARGE_COIN":
+                budget = event.coin_cents if event.coin_cents is not None else budget + (event.value or 0)
+            event = next(events, None)
+
+        bet_number, bet = session.bet_numbers[index], session.bets_cents[index]
+        logged_result, logged_coin = session.results_cents[index], session.coins_cents[index]
+        line = session.lines[index]
+        try:
+            reward, _ = engine.calculate_reward_cents(budget, bet_number, bet)
+        except ValueError:
+            divergences.append(Divergence(session.path, line, bet_number, "BET_NUMBER", bet_number, None))
+        else:
+            expected_result = reward if reward > 0 else -bet
+            expected_coin = budget - bet + reward
+            if logged_result != expected_result:
+                divergences.append(Divergence(session.path, line, bet_number, "RESULT", logged_result, expected_result))
+            if logged_coin != expected_coin:
+                divergences.append(Divergence(session.path, line, bet_number, "COIN", logged_coin, expected_coin))
+            budget = expected_coin
+        # risincronizzazione: la bet successiva parte dal COIN registrato
+        if logged_coin is not None:
+            budget = logged_coin
+    return divergences
+
+
+def verify_file(path: str) -> FileReport:
+    """Verify every session of one metrics CSV."""
+    report = FileReport(path=path)
+    for session in iter_sessions(path):
+        report.sessions += 1
+        if not session.n_bets:
+            continue
+        if not session.condition:
+            reason = "missing or empty START_METRICS condition"
+        else:
+            try:
+                report.divergences.extend(verify_session(session))
+                report.bets += session.n_bets
+                continue
+            except ValueError as error:
+                reason = str(error)  # es. "Invalid condition: FOO" (START_METRICS o CHANGE_CONDITION)
+        report.unverifiable_sessions += 1
+        report.skipped.append(f"{session.path}:{session.line} {reason}")
+    return report
+
+
+def verify_folder(path: str, workers: int = 1) -> list[FileReport]:
+    """Verify a metrics CSV or every metrics*.csv in a folder, one process per file."""
+    paths = metrics_files(path)
+    if workers <= 1 or len(paths) <= 1:
+        return [verify_file(file_path) for file_path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(verify_file, paths))
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check logged RESULT/COIN values against the deterministic engine.")
+    parser.add_argument("path", nargs="?", default="data", help="metrics CSV file or folder of metrics*.csv (default: data).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-report", type=int, default=50, help="Divergent rows to print (0 = all).")
+    args = parser.parse_args(argv)
+
+    reports = verify_folder(args.path, args.workers)
+    divergences = [divergence for report in reports for divergence in report.divergences]
+    shown = divergences if args.max_report <= 0 else divergences[:args.max_report]
+    for divergence in shown:
+        print(f"[VERIFY] {divergence.describe()}")
+    if len(shown) < len(divergences):
+        print(f"[VERIFY] ... {len(divergences) - len(shown)} more")
+
+    for report in reports:
+        for skipped in report.skipped:
+            print(f"[VERIFY] session skipped, {skipped}")
+
+    sessions = sum(report.sessions for report in reports)
+    bets = sum(report.bets for report in reports)
+    unverifiable = sum(report.unverifiable_sessions for report in reports)
+    print(f"[VERIFY] {len(reports)} files, {sessions} sessions, {bets} bets verified, "
+          f"{unverifiable} sessions skipped (no or unknown condition), {len(divergences)} divergences")
+    return 1 if divergences else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
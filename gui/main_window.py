@@ -6,7 +6,8 @@ from PyQt5.QtCore import Qt, QTimer
 import random
 import sys
 
-from core.slot_logic import spin_reels, calculate_reward
+from core.engines import get_engine
+from core.money import from_cents, format_cents, to_cents
 from core.sound_manager import play_sfx, play_bgm, stop_bgm
 from core.redeem_logic import validate_redeem_code
 from gui.message_window import MessageWindow
@@ -14,7 +15,8 @@ from gui.redeem_dialog import RedeemDialog
 from core.metrics_logger import MetricsLogger   # ← NEW
 from utils.file_manager import get_path
 from PyQt5.QtWidgets import QApplication
-from core.constants import INITIAL_BUDGET, MESSAGE_COUNTER_POINT, MIN_BET, MAX_BET, BET_STEP, TOTAL_SESSION_BETS, PHASE_LENGTH, TOTAL_TESTS, VALID_CONDITIONS
+from core.constants import Symbol, INITIAL_BUDGET, MIN_BET, MAX_BET, BET_STEP, TOTAL_TESTS, VALID_CONDITIONS
+from core.schedule import LAYOUT  # layout compilato da SESSION_SCHEDULE: durata sessione e punto del messaggio
  
 # FOR TESTING
 from core.remote_researcher import RemoteResearcher
@@ -42,6 +44,8 @@ class MainWindow(QWidget):
         #          LOG SETUP
         # ===============================
         self._metrics = metrics_logger
+        # engine di gioco scelto da config (SLOT_ENGINE): stessa istanza a cui RemoteResearcher passa la condition
+        self._engine = get_engine()
 
         # ===============================
         #          WINDOW SETUP
@@ -53,11 +57,11 @@ class MainWindow(QWidget):
         # ===============================
         #          GAME VARIABLES
         # ===============================
-        self.coins = INITIAL_BUDGET
+        self.coins_cents = to_cents(INITIAL_BUDGET)  # coin balance in integer cents (see core/money.py)
         self.current_bet = 0.00
         # Experimental session tracking
         self.bet_counter = 0  # counts from 0 -> increment before each bet to 1..60
-        self.current_reward = 0.00
+        self.current_reward_cents = 0
         self._spinning = False  # True while the spin animation is running
         
         # OLD: self.spin_cost = 5   (unused, removed)
@@ -68,23 +72,17 @@ class MainWindow(QWidget):
         self.current_frame = 0
 
         # NEW: tracks the currently displayed symbol on each reel (needed by resizeEvent to rescale)
-        self.reel_symbols = ["seven", "seven", "seven"]
+        self.reel_symbols = [Symbol.SEVEN, Symbol.SEVEN, Symbol.SEVEN]
         # NEW: music state flag — True = playing; drives toggle_music() and initial button label
         self._music_on = False
 
         # ===============================
         #          LOAD ASSETS
         # ===============================
+        # pixmap cache indicizzata per Symbol ID (stesso ID restituito da spin_reels)
         self.symbols = {
-            "banana":  QPixmap(get_path("gui", "assets", "icons", "banana.png")),
-            "bar":     QPixmap(get_path("gui", "assets", "icons", "bar.png")),
-            "bell":    QPixmap(get_path("gui", "assets", "icons", "bell.png")),
-            "cherry":  QPixmap(get_path("gui", "assets", "icons", "cherry.png")),
-            "diamond": QPixmap(get_path("gui", "assets", "icons", "diamond.png")),
-            "grape":   QPixmap(get_path("gui", "assets", "icons", "grape.png")),
-            "lemon":   QPixmap(get_path("gui", "assets", "icons", "lemon.png")),
-            "seven":   QPixmap(get_path("gui", "assets", "icons", "seven.png")),
-            "star":    QPixmap(get_path("gui", "assets", "icons", "star.png")),
+            symbol: QPixmap(get_path("gui", "assets", "icons", f"{symbol.label}.png"))
+            for symbol in Symbol
         }
 
         # ===============================
@@ -250,7 +248,7 @@ class MainWindow(QWidget):
 
 
     def update_coin_label(self):
-        self.coin_label.setText(f"🪙 {self.coins:.2f}")
+        self.coin_label.setText(f"🪙 {format_cents(self.coins_cents)}")
     
     def update_bet_display(self):
         """Updates bet display and validates without triggering editingFinished"""
@@ -306,7 +304,7 @@ class MainWindow(QWidget):
     
     def validate_bet(self):
         """Enable GIOCA button only if bet is valid (> 0 and <= available coins) AND not spinning."""
-        is_valid = self.current_bet > 0 and self.current_bet <= self.coins and not self._spinning
+        is_valid = self.current_bet > 0 and to_cents(self.current_bet) <= self.coins_cents and not self._spinning
         self.spin_btn.setEnabled(is_valid)
 
     # ------------------------------------------------------------------
@@ -399,7 +397,7 @@ class MainWindow(QWidget):
         self.watermark.setText("UPV Slot Machine")
         self.spin_btn.setDisabled(True)
         
-        if self.current_bet <= 0 or self.current_bet > self.coins:
+        if self.current_bet <= 0 or to_cents(self.current_bet) > self.coins_cents:
             self.watermark.setText("Puntata non valida!")
             self.spin_btn.setDisabled(False)
             return
@@ -408,18 +406,20 @@ class MainWindow(QWidget):
         
         # LOGICA DI GIOCO: 
         # prima si calcola la REWARD, poi tramite quella si pesca nella REWARD_TABLE il simbolo + le occorrenze.
-        budget_before_spin = self.coins #97.2
+        # tutti gli importi del pipeline sono in centesimi interi: nessun drift da arrotondamento float
+        budget_before_spin = self.coins_cents #9720
+        bet_cents = to_cents(self.current_bet) #20
         # Visualizzo real-time i coin: deduct bet from coins (we'll log result after reward is applied)
-        self.coins -= self.current_bet #97.2 - 0.2 = 97.0
-        self.update_coin_label() # mostro 97.0
+        self.coins_cents -= bet_cents #9720 - 20 = 9700
+        self.update_coin_label() # mostro 97.00
         
         # cosa fa calculate_reward (esempio):
         # expected_reward = 100 - 97.2 + 0.2 = 3.0
         # multiplier = 15x = reward / bet = 3.0 / 0.2 = 15
         # symbol = "lemon" , occurrence = 3
         # reward (gain_visualizzato, e reale per noi) = bet * multiplier = 0.2 * 15 = 3.0; attenzione bet già dedotta
-        self.current_reward, multiplier = calculate_reward(budget_before_spin, self.bet_counter, self.current_bet) 
-        self.final_result = spin_reels(self.current_reward, multiplier) #restituisce una tupla di 3 simboli, ad esempio ("cherry", "cherry", "lemon")
+        # l'engine restituisce reward, moltiplicatore e una tupla di 3 Symbol, ad esempio (Symbol.CHERRY, Symbol.CHERRY, Symbol.LEMON)
+        self.current_reward_cents, multiplier, self.final_result = self._engine.play_cents(budget_before_spin, self.bet_counter, bet_cents)
         
         self.current_frame = 0
         # Snapshot the stable window-derived reel size before animation.
@@ -456,7 +456,7 @@ class MainWindow(QWidget):
             self._spinning = False  # BUG3: release lock before show_final_result calls validate_bet
             self.show_final_result()
             # Re-enable only if session is not over (bet 60 disables permanently in show_final_result)
-            if self.bet_counter < TOTAL_SESSION_BETS:
+            if self.bet_counter < LAYOUT.total_bets:
                 self.spin_btn.setDisabled(False)
 
     def show_final_result(self):
@@ -471,8 +471,9 @@ class MainWindow(QWidget):
         self.reel_symbols = [r1, r2, r3]
         self._update_reels()
 
-        # reward already computed in on_spin via calculate_reward()
-        reward = self.current_reward
+        # reward (cents) already computed in on_spin via self._engine.play_cents()
+        reward = self.current_reward_cents
+        bet_cents = to_cents(self.current_bet)
         
         # Fino a questo punto è stato già fatto: coins = coins - bet 
         # gain_visualizzato (reward) = bet * multiplier
@@ -480,12 +481,12 @@ class MainWindow(QWidget):
         # quindi facendo coins + reward (gain visualizzato) 
         # -> coins effettivi post giocata = coins + bet*multiplier - bet
         # -> coins + gain_reale = (coins - bet) + gain_visualizzato
-        self.coins += reward
+        self.coins_cents += reward
         self.update_coin_label()
         self.validate_bet()
 
         # Compute result_gain: +reward for wins, -bet for losses
-        result_gain = reward if reward > 0 else -self.current_bet
+        result_gain = reward if reward > 0 else -bet_cents
 
         # LOG BET (consolidated event): bet number, bet, result, coin
         try:
@@ -495,21 +496,22 @@ class MainWindow(QWidget):
 
         self._metrics.log_bet(
             bet_number=bet_number,
-            bet=self.current_bet,
-            result_gain=result_gain,
-            current_coin=self.coins,
+            bet_cents=bet_cents,
+            result_gain_cents=result_gain,
+            current_coin_cents=self.coins_cents,
+            symbols=self.final_result,
         )
 
         if reward > 0:
             play_sfx("win.wav")
-            self.watermark.setText(f"Hai vinto +{reward:.2f}")
+            self.watermark.setText(f"Hai vinto +{format_cents(reward)}")
         else:
             self.watermark.setText("Try again!")
   
         # GESTIONE DEL MESSAGGIO
         # user in bet 40 (ultima di DURING) -> clicca spin -> risultato mostrato
         # alla fine lo spin button viene, temporalmente, abilitato a fare un altra cosa: on_message()
-        if self.bet_counter == MESSAGE_COUNTER_POINT:  # punto di trigger del messaggio, fine fase DURING
+        if self.bet_counter == LAYOUT.message_bet:  # punto di trigger del messaggio (MESSAGE_COUNTER_POINT), fine fase DURING
             # viene modificato
             print("TRIGGER MESSAGE SETTED for next bet")
             self.spin_btn.clicked.disconnect()
@@ -517,7 +519,7 @@ class MainWindow(QWidget):
 
         # FIX: auto-close AFTER bet 60 is fully processed and logged.
         # Old location (on_spin before processing) required a 61st press.
-        if self.bet_counter >= TOTAL_SESSION_BETS:
+        if self.bet_counter >= LAYOUT.total_bets:
             self.spin_btn.setDisabled(True)
             QTimer.singleShot(3000, self.close)
 
@@ -548,7 +550,7 @@ class MainWindow(QWidget):
     def redeem_code_callback(self, code: str) -> int:
         coins_to_add = validate_redeem_code(code)
         if coins_to_add:
-            self.coins += coins_to_add
+            self.coins_cents += to_cents(coins_to_add)
             self.update_coin_label()
             self.validate_bet()
             play_sfx("click.wav")
@@ -570,8 +572,9 @@ class MainWindow(QWidget):
 
     # CLOSE EVENT: CATCHED WHEN SELF.CLOSE() IS CALLED
     def closeEvent(self, event) -> None: 
-        """Intercepts window close to log SESSION_END before exit."""
+        """Intercepts window close to log SESSION_END and close the metrics file before exit."""
         self._metrics.log_session_end()
+        self._metrics.close()  # flush delle righe in buffer prima di sys.exit()
         super().closeEvent(event)
         sys.exit()
         
@@ -589,6 +592,11 @@ class MainWindow(QWidget):
     
     def get_current_coins(self) -> float:
         return self.coins
+
+    @property
+    def coins(self) -> float:
+        """Coin balance in coins (read-only view of coins_cents, for display/compatibility)."""
+        return from_cents(self.coins_cents)
     
     
     
@@ -603,30 +611,31 @@ class MainWindow(QWidget):
         Equivale a on_spin() + show_final_result() ma termina immediatamente,
         consentendo l'uso in un loop senza attendere i ~4 secondi di animazione.
         Mirrors the EXACT same pipeline as the real gameplay path:
-          budget_before_spin → deduct bet → calculate_reward → spin_reels → add reward → log
+          budget_before_spin → deduct bet → engine.play_cents (reward + symbols) → add reward → log
         """
-        if self.current_bet <= 0 or self.current_bet > self.coins:
+        if self.current_bet <= 0 or to_cents(self.current_bet) > self.coins_cents:
             return  # puntata non valida: salta lo spin
 
         # increment bet counter (mirrors on_spin)
         self.bet_counter += 1
 
         # CORRECT: same pipeline as on_spin + show_final_result
-        budget_before_spin = self.coins                                                     # snapshot before deduction
-        self.coins -= self.current_bet                                                      # deduct bet
-        reward, multiplier = calculate_reward(budget_before_spin, self.bet_counter, self.current_bet)  # deterministic reward
-        r1, r2, r3 = spin_reels(reward, multiplier)                                        # symbol selection from reward
-        self.coins += reward                                                                # apply reward
+        bet_cents = to_cents(self.current_bet)
+        budget_before_spin = self.coins_cents                                               # snapshot before deduction
+        self.coins_cents -= bet_cents                                                       # deduct bet
+        reward, multiplier, (r1, r2, r3) = self._engine.play_cents(budget_before_spin, self.bet_counter, bet_cents)  # reward + symbols
+        self.coins_cents += reward                                                          # apply reward
 
         # compute result_gain (+reward or -bet)
-        result_gain = reward if reward > 0 else -self.current_bet
+        result_gain = reward if reward > 0 else -bet_cents
 
         # consolidated log entry for the bet
         self._metrics.log_bet(
             bet_number=self.bet_counter,
-            bet=self.current_bet,
-            result_gain=result_gain,
-            current_coin=self.coins,
+            bet_cents=bet_cents,
+            result_gain_cents=result_gain,
+            current_coin_cents=self.coins_cents,
+            symbols=(r1, r2, r3),
         )
 
         # TEST VERSION 1: CHIUSURA AUTOMATICA DOPO 60 PUNTATE: >= TOTAL_SESSION_BETS
@@ -652,22 +661,19 @@ class MainWindow(QWidget):
           self.close() → closeEvent → SESSION_END loggato automaticamente.
 
         Resistente alle future modifiche di slot_logic.py: tutta la logica di vincita/perdita
-        è delegata a _execute_spin_logic → spin_reels() → calculate_reward(), esattamente
+        è delegata a _execute_spin_logic → engine.play_cents() (reward + simboli), esattamente
         come avverrebbe in una sessione reale dell'utente.
 
         Al riavvio dell'app una nuova sessione viene appesa al CSV esistente.
         """
         # Inizializza stato sessione come in una vera partita
-        self.coins = INITIAL_BUDGET
+        self.coins_cents = to_cents(INITIAL_BUDGET)
         self.bet_counter = 0
         self.current_bet = MIN_BET  # valore iniziale; verrà sovrascritto ad ogni iterazione del loop
 
-        # Reset phase-global budget variables in slot_logic before each TEST session.
+        # Reset phase budgets of the shared engine before each TEST session.
         # Without this, a second TEST run would use stale initial_budget_X from the previous session.
-        import core.slot_logic as _sl
-        _sl.initial_budget_before = None
-        _sl.initial_budget_during = None
-        _sl.initial_budget_after  = None
+        self._engine.reset()
 
         # enable_metrics already called by RemoteResearcher.start_metrics() — no need to repeat here.
         self.update_coin_label()
@@ -675,7 +681,7 @@ class MainWindow(QWidget):
 
         # Simula esattamente 60 puntate consecutive, ciascuna con puntata casuale [MIN_BET, MAX_BET].
         # Al termine dell'ultima, _execute_spin_logic chiama self.close() → SESSION_END.
-        for _ in range(TOTAL_SESSION_BETS):
+        for _ in range(LAYOUT.total_bets):
             # Random bet from MIN_BET to MAX_BET (inclusive) in BET_STEP increments: poichè random crea seq interi, prima la creo sulle decine, poi divido per 10
             self.current_bet = random.choice(range(int(MIN_BET*10), int(MAX_BET*10)+1, int(BET_STEP*10))) / 10.0
             self._execute_spin_logic()
@@ -698,7 +704,7 @@ class MainWindow(QWidget):
           self.close() → closeEvent → SESSION_END loggato automaticamente.
 
         Resistente alle future modifiche di slot_logic.py: tutta la logica di vincita/perdita
-        è delegata a _execute_spin_logic → spin_reels() → calculate_reward(), esattamente
+        è delegata a _execute_spin_logic → engine.play_cents() (reward + simboli), esattamente
         come avverrebbe in una sessione reale dell'utente.
 
         Al riavvio dell'app una nuova sessione viene appesa al CSV esistente.
@@ -706,15 +712,12 @@ class MainWindow(QWidget):
         # PER OGNI SESSEION TESTATA:
         for test in range(TOTAL_TESTS):
             # Inizializza stato sessione come in una vera partita
-            self.coins = INITIAL_BUDGET
+            self.coins_cents = to_cents(INITIAL_BUDGET)
             self.bet_counter = 0
             self.current_bet = MIN_BET  # valore iniziale; verrà sovrascritto ad ogni iterazione del loop
 
-            # Reset phase-global budget variables in slot_logic before each TEST of TOTAL_TESTS
-            import core.slot_logic as _sl
-            _sl.initial_budget_before = None
-            _sl.initial_budget_during = None
-            _sl.initial_budget_after  = None
+            # Reset phase budgets of the shared engine before each TEST of TOTAL_TESTS
+            self._engine.reset()
 
             self.update_coin_label()
             self.update_bet_display()
@@ -733,7 +736,7 @@ class MainWindow(QWidget):
             print(f"[TEST] Starting test {test+1}/{TOTAL_TESTS} with condition: {condition}")
 
             # Simula esattamente 60 puntate consecutive, ciascuna con puntata casuale [MIN_BET, MAX_BET].
-            for _ in range(TOTAL_SESSION_BETS):
+            for _ in range(LAYOUT.total_bets):
                 # Random bet from MIN_BET to MAX_BET (inclusive) in BET_STEP increments: poichè random crea seq interi, prima la creo sulle decine, poi divido per 10
                 self.current_bet = random.choice(range(int(MIN_BET*10), int(MAX_BET*10)+1, int(BET_STEP*10))) / 10.0
                 self._execute_spin_logic()
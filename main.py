@@ -1,3 +1,4 @@
+import os
 import sys
 from PyQt5.QtWidgets import QApplication
 from core.remote_researcher import RemoteResearcher
@@ -5,7 +6,9 @@ from gui.main_window import MainWindow
 from core.metrics_logger import MetricsLogger
 # from core.constants import BUILD_CONDITION # Variante
 from utils.build_config import BUILD_CONDITION
-from utils.file_manager import get_path
+from utils.file_manager import get_path, get_writable_path
+from core.metrics_journal import recover_folder
+from core import trace
 
 def load_stylesheet(x):
     # OLD senza build
@@ -21,6 +24,14 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     load_stylesheet(app)
 
+    # DEBUG: SLOT_TRACE=1 stampa in console un record per bet della logica di reward (disattivato di default)
+    if os.environ.get("SLOT_TRACE"):
+        trace.enable(trace.ConsoleTraceSink())
+
+    # RECUPERO: CSV rimasti con un journal (power loss / crash di una sessione precedente)
+    for report in recover_folder(get_writable_path("data")):
+        print(f"[METRICS] {report.path}: {report.describe()}")
+
     # ALL'AVVIO APP: viene creato metrics_logger, che prepara il file CSV (solo colonne) metriche
     metrics_logger = MetricsLogger()  # Initialize metrics logger (creates file if needed)
     # REMOTE RESEARCHER: ha il compito di avviare app con i parametri
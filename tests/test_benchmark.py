@@ -0,0 +1,21 @@
+"""Case selection and baseline handling of core/benchmark.py."""
+
+import core.benchmark as benchmark
+
+
+def test_broken_cases_run_only_when_selected(monkeypatch):
+    calls = []
+    cases = {name: (lambda name=name: calls.append(name) or ((lambda: None), 1)) for name in ("ok.scalar", "broken.scalar")}
+    monkeypatch.setattr(benchmark, "CASES", cases)
+    monkeypatch.setattr(benchmark, "BROKEN_CASES", frozenset({"broken.scalar"}))
+
+    assert list(benchmark.run_benchmarks(min_time=0)) == ["ok.scalar"]
+    assert list(benchmark.run_benchmarks(["broken.*"], min_time=0)) == ["broken.scalar"]
+
+
+def test_missing_baseline_is_skipped(monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(benchmark, "CASES", {"ok.scalar": lambda: ((lambda: None), 1)})
+    missing = str(tmp_path / "baseline.json")
+
+    assert benchmark.main(["--min-time", "0", "--baseline", missing]) == 0
+    assert "comparison skipped" in capsys.readouterr().out
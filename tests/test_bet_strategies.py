@@ -0,0 +1,16 @@
+"""Bet strategies of core/bet_strategies.py."""
+
+import numpy as np
+import pytest
+
+from core.bet_strategies import MartingaleBets
+
+
+def test_unknown_condition_lists_the_valid_ones():
+    with pytest.raises(ValueError, match="EQUAL, WIN, LOSE"):
+        MartingaleBets().bets(np.random.default_rng(0), 2, "WINN")
+
+
+def test_condition_abbreviation_is_accepted():
+    bets = MartingaleBets().bets(np.random.default_rng(0), 2, "w", n_bets=5)
+    assert bets.shape == (2, 5)
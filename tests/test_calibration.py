@@ -0,0 +1,13 @@
+"""Command-line targets of core/calibration.py."""
+
+import pytest
+
+from core.calibration import main
+
+
+def test_unknown_condition_is_a_usage_error(capsys):
+    with pytest.raises(SystemExit) as error:
+        main(["--target", "WINN:40:0.40"])
+
+    assert error.value.code == 2
+    assert "unknown condition 'WINN'" in capsys.readouterr().err
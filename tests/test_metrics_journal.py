@@ -0,0 +1,48 @@
+"""Crash recovery of the metrics journal (core/metrics_journal.py)."""
+
+import os
+
+from core.metrics_journal import JOURNAL_SUFFIX, MetricsJournal, recover
+from core.metrics_logger import MetricsLogger
+
+
+def _crash_with_rows(csv_path: str, rows: list) -> None:
+    """Journals rows that never reached the CSV, as after a power loss."""
+    journal = MetricsJournal(csv_path, os.path.getsize(csv_path) if os.path.exists(csv_path) else 0)
+    journal.append(rows)
+    journal._file.close()  # nessuna chiusura pulita: il journal resta su disco
+
+
+def test_recover_without_journal_does_not_create_the_csv(tmp_path):
+    csv_path = str(tmp_path / "participant.csv")
+
+    report = recover(csv_path)
+
+    assert report.clean
+    assert not os.path.exists(csv_path)
+
+
+def test_recover_of_empty_journal_does_not_create_the_csv(tmp_path):
+    csv_path = str(tmp_path / "participant.csv")
+    _crash_with_rows(csv_path, [])
+
+    recover(csv_path)
+
+    assert not os.path.exists(csv_path)
+    assert not os.path.exists(csv_path + JOURNAL_SUFFIX)
+
+
+def test_new_journal_continues_the_recovered_sequence(tmp_path):
+    csv_path = str(tmp_path / "participant.csv")
+    with open(csv_path, "w", encoding="utf-8", newline="") as csv_file:
+        csv_file.write("header\n")
+    _crash_with_rows(csv_path, [["a"], ["b"], ["c"]])
+
+    logger = MetricsLogger(csv_path, async_writes=False, journal=True)
+    try:
+        assert logger.recovery_report.restored_rows == 3
+        assert logger.recovery_report.next_seq == 3
+        with open(csv_path + JOURNAL_SUFFIX, "r", encoding="utf-8") as journal_file:
+            assert journal_file.readline().split("\t")[2] == "3"
+    finally:
+        logger.close()
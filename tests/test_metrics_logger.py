@@ -0,0 +1,63 @@
+"""MetricsLogger writer thread (core/metrics_logger.py)."""
+
+import csv
+import threading
+
+import pytest
+
+from core.metrics_logger import _STOP, MetricsLogger
+
+
+def _call_with_timeout(function, timeout: float = 5.0):
+    """Runs function on a thread; fails instead of hanging the test run if it never returns."""
+    outcome = {}
+
+    def target():
+        try:
+            outcome["value"] = function()
+        except BaseException as error:
+            outcome["error"] = error
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), f"{function.__name__} blocked for more than {timeout} s"
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("value")
+
+
+def test_non_oserror_in_writer_is_raised_by_flush_and_logging_continues(tmp_path):
+    path = tmp_path / "metrics.csv"
+    logger = MetricsLogger(str(path), async_writes=True, journal=True, sinks=[])
+    logger.log_session_start()
+    logger.enable_metrics("WIN")
+    logger._write_row(["2026-01-01 00:00:00.00", "MEX", object()])  # il journal non sa serializzarla: TypeError
+
+    with pytest.raises(TypeError):
+        _call_with_timeout(logger.flush)
+    assert logger.failed_rows >= 1
+
+    logger.log_bet(1, 100, 0, 9900, (1, 2, 3))
+    _call_with_timeout(logger.log_session_end)
+    _call_with_timeout(logger.close)
+
+    events = [row["EVENT"] for row in csv.DictReader(path.open(encoding="utf-8"))]
+    assert events[-2:] == ["BET", "SESSION_END"]
+
+
+def test_flush_and_close_do_not_hang_when_the_writer_thread_is_gone(tmp_path):
+    path = tmp_path / "metrics.csv"
+    logger = MetricsLogger(str(path), async_writes=True, sinks=[])
+    logger.log_session_start()
+    # thread fermato senza passare da close(): le righe successive restano in coda
+    logger._queue.put(_STOP)
+    logger._thread.join(5)
+    logger._write_row(["2026-01-01 00:00:00.00", "SESSION_END"])
+
+    with pytest.raises(RuntimeError):
+        _call_with_timeout(logger.flush)
+    _call_with_timeout(logger.close)
+
+    events = [row["EVENT"] for row in csv.DictReader(path.open(encoding="utf-8"))]
+    assert events == ["SESSION_START", "SESSION_END"]
@@ -0,0 +1,19 @@
+"""Paytable conversions of core/reel_optimizer.py."""
+
+import pytest
+
+from core.constants import Symbol
+from core.reel_optimizer import paytable_from_arrays
+from core.reel_strip import REEL_PAYTABLE, paytable_arrays
+
+
+def test_integer_paytable_round_trips():
+    assert paytable_from_arrays(paytable_arrays(REEL_PAYTABLE)) == REEL_PAYTABLE
+
+
+def test_fractional_payout_is_rejected_not_truncated():
+    pays = paytable_arrays(REEL_PAYTABLE)
+    pays[3, Symbol.SEVEN] = 2.9
+
+    with pytest.raises(ValueError, match="SEVEN"):
+        paytable_from_arrays(pays)
@@ -0,0 +1,51 @@
+"""Counterfactual replay of logged sessions (core/replay.py)."""
+
+import contextlib
+import io
+
+from core.constants import INITIAL_BUDGET
+from core.metrics_reader import SessionLog
+from core.money import to_cents
+from core.replay import CONDITIONS, replay_sessions
+from core.slot_logic import SessionEngine
+
+
+def _session(line: int, bet_numbers: list, bets_cents: list) -> SessionLog:
+    n_bets = len(bet_numbers)
+    return SessionLog(path="metrics.csv", line=line, condition="EQUAL", bet_numbers=bet_numbers,
+                      bets_cents=bets_cents, results_cents=[0] * n_bets, coins_cents=[0] * n_bets,
+                      lines=list(range(line + 1, line + 1 + n_bets)))
+
+
+def _scalar_trajectory(condition: str, bet_numbers: list, bets_cents: list) -> list:
+    engine = SessionEngine(condition)
+    budget = to_cents(INITIAL_BUDGET)
+    trajectory = [budget]
+    with contextlib.redirect_stdout(io.StringIO()):  # il motore stampa ogni bet
+        for bet_number, bet in zip(bet_numbers, bets_cents):
+            reward, _ = engine.calculate_reward_cents(budget, bet_number, bet)
+            budget = budget - bet + reward
+            trajectory.append(budget)
+    return trajectory
+
+
+def test_session_started_at_bet_39_is_replayed_under_its_bet_numbers():
+    full = _session(1, list(range(1, 46)), [40] * 45)
+    late = _session(100, [39, 40, 41, 42], [50, 120, 40, 200])
+
+    counterfactual = replay_sessions([full, late])
+
+    assert counterfactual.skipped == []
+    for row, session in enumerate([full, late]):
+        for code, condition in enumerate(CONDITIONS):
+            expected = _scalar_trajectory(condition, session.bet_numbers, session.bets_cents)
+            replayed = counterfactual.budgets_cents[row, code, :session.n_bets + 1].tolist()
+            assert replayed == expected, (session.line, condition)
+
+
+def test_sessions_with_gaps_in_the_bet_numbers_are_skipped():
+    gap = _session(7, [1, 2, 5], [10, 10, 10])
+    counterfactual = replay_sessions([gap])
+
+    assert counterfactual.sessions == []
+    assert counterfactual.skipped == ["metrics.csv:7 bet numbers are not consecutive"]
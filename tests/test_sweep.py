@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+from core.sweep import effective_config, expand_grid, run_sweep
+
+
+@pytest.mark.parametrize("during_maps", [{"WINN": {22: True}}, {"WIN": {5: True}}])
+def test_invalid_during_maps_are_rejected(during_maps):
+    with pytest.raises(ValueError):
+        effective_config({"during_maps": during_maps})
+
+
+def test_truncated_cache_entry_is_recomputed(tmp_path):
+    points = expand_grid({"during_maps": {"WIN": {"22": [True]}}})
+    first = run_sweep(points, n_sessions=50, cache_dir=str(tmp_path))
+    path = os.path.join(str(tmp_path), sorted(os.listdir(str(tmp_path)))[0])
+    with open(path, "w", encoding="utf-8") as cache_file:
+        cache_file.write('{"phases": {')
+
+    second = run_sweep(points, n_sessions=50, cache_dir=str(tmp_path))
+
+    assert not second[0]["cached"]
+    assert second[0]["result"] == first[0]["result"]
+    assert run_sweep(points, n_sessions=50, cache_dir=str(tmp_path))[0]["cached"]
+    assert not [name for name in os.listdir(str(tmp_path)) if name.endswith(".tmp")]
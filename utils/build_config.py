@@ -1,17 +1,19 @@
 """ 
 1) Sia mentre avviene l'esecuzione di build_all.py dove runtime ogni build avrà un file config/build.env incluso nel bundle, 
-con dentro la config specifica di quella build (BUILD_CONDITION e MESSAGE_TYPE), 
+con dentro la config specifica di quella build (BUILD_CONDITION, MESSAGE_TYPE e opzionalmente SLOT_ENGINE), 
 2) sia durante l'esecuzione via codice da main.py
 - quando eseguo la build_all.py / da codice -> il build_config prepara il file .env
 - esecuzione pyinstaller -> avvia main.py -> partendo dagli import in main.py
-- la catena di import arriva a from utils.build_config -> Python carica ed esegue il codice che prepara solo BUILD_CONDITION e MESSAGE_TYPE leggendo .env
+- la catena di import arriva a from utils.build_config -> Python carica ed esegue il codice che prepara solo BUILD_CONDITION, MESSAGE_TYPE e SLOT_ENGINE leggendo .env
 """
 
 import os
 
 from core.constants import BUILD_CONDITION as DEFAULT_BUILD_CONDITION
 from core.constants import MESSAGE_TYPE as DEFAULT_MESSAGE_TYPE
+from core.constants import SLOT_ENGINE as DEFAULT_SLOT_ENGINE
 from core.constants import VALID_CONDITIONS
+from core.engines import ENGINES
 from utils.file_manager import get_path
 
 _BUILD_ENV_PATH = ("config", "build.env")
@@ -60,6 +62,7 @@ _env_values = _read_env_file()
 
 _build_condition = _env_values.get("BUILD_CONDITION", DEFAULT_BUILD_CONDITION)
 _message_type = _env_values.get("MESSAGE_TYPE", DEFAULT_MESSAGE_TYPE)
+_slot_engine = _env_values.get("SLOT_ENGINE", DEFAULT_SLOT_ENGINE)
 
 BUILD_CONDITION = (
     _build_condition
@@ -71,4 +74,10 @@ MESSAGE_TYPE = (
     _message_type
     if _message_type in _VALID_MESSAGE_TYPES
     else DEFAULT_MESSAGE_TYPE
-)
\ No newline at end of file
+)
+
+SLOT_ENGINE = (
+    _slot_engine
+    if _slot_engine in ENGINES
+    else DEFAULT_SLOT_ENGINE
+)